@@ -0,0 +1,38 @@
+"""Create job_runs table for scheduled job history
+
+Revision ID: perf_002_job_runs
+Revises: perf_001_indexes
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'perf_002_job_runs'
+down_revision = 'perf_001_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'job_runs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('job_name', sa.String(100), nullable=False),
+        sa.Column('worker', sa.String(100), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column('duration_ms', sa.Integer(), nullable=False),
+        sa.Column('rows_affected', sa.Integer()),
+        sa.Column('succeeded', sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column('error', sa.String(500)),
+    )
+    op.create_index('ix_job_runs_job_name', 'job_runs', ['job_name'])
+    op.create_index('ix_job_runs_started_at', 'job_runs', ['started_at'])
+
+
+def downgrade():
+    op.drop_index('ix_job_runs_started_at', table_name='job_runs')
+    op.drop_index('ix_job_runs_job_name', table_name='job_runs')
+    op.drop_table('job_runs')
@@ -0,0 +1,45 @@
+"""Create notification_outbox table
+
+Revision ID: perf_003_notification_outbox
+Revises: perf_002_job_runs
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'perf_003_notification_outbox'
+down_revision = 'perf_002_job_runs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'notification_outbox',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('channel', sa.String(20), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('pending', 'processing', 'sent', 'dead', name='outbox_status'),
+            nullable=False,
+            server_default='pending'
+        ),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column('last_error', sa.Text()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('sent_at', sa.DateTime(timezone=True)),
+    )
+    op.create_index('ix_notification_outbox_status', 'notification_outbox', ['status'])
+    op.create_index('ix_notification_outbox_next_attempt_at', 'notification_outbox', ['next_attempt_at'])
+
+
+def downgrade():
+    op.drop_index('ix_notification_outbox_next_attempt_at', table_name='notification_outbox')
+    op.drop_index('ix_notification_outbox_status', table_name='notification_outbox')
+    op.drop_table('notification_outbox')
+    sa.Enum(name='outbox_status').drop(op.get_bind(), checkfirst=True)
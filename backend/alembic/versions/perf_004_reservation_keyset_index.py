@@ -0,0 +1,34 @@
+"""Add (created_at, id) indexes for keyset pagination of reservations
+
+Revision ID: perf_004_reservation_keyset
+Revises: perf_003_notification_outbox
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'perf_004_reservation_keyset'
+down_revision = 'perf_003_notification_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # GET /reservations (admin): ORDER BY created_at DESC, id DESC with a keyset cursor
+    op.create_index(
+        'ix_reservations_created_at_id',
+        'reservations',
+        ['created_at', 'id']
+    )
+    # Same listing for a client's own reservations
+    op.create_index(
+        'ix_reservations_client_created_at_id',
+        'reservations',
+        ['client_id', 'created_at', 'id']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_reservations_client_created_at_id', table_name='reservations')
+    op.drop_index('ix_reservations_created_at_id', table_name='reservations')
@@ -0,0 +1,45 @@
+"""Create trip_space_counts (materialized spaces per status of each trip)
+
+Revision ID: perf_005_trip_space_counts
+Revises: perf_004_reservation_keyset
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'perf_005_trip_space_counts'
+down_revision = 'perf_004_reservation_keyset'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'trip_space_counts',
+        sa.Column('trip_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('trips.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('available', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('on_hold', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('reserved', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('blocked', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('internal', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    # Backfill from the current spaces
+    op.execute("""
+        INSERT INTO trip_space_counts (trip_id, available, on_hold, reserved, blocked, internal)
+        SELECT trip_id,
+               count(*) FILTER (WHERE status = 'available'),
+               count(*) FILTER (WHERE status = 'on_hold'),
+               count(*) FILTER (WHERE status = 'reserved'),
+               count(*) FILTER (WHERE status = 'blocked'),
+               count(*) FILTER (WHERE status = 'internal')
+        FROM spaces
+        GROUP BY trip_id
+    """)
+
+
+def downgrade():
+    op.drop_table('trip_space_counts')
@@ -0,0 +1,42 @@
+"""Create revenue_totals (paid amounts per currency and month)
+
+Revision ID: perf_006_revenue_totals
+Revises: perf_005_trip_space_counts
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'perf_006_revenue_totals'
+down_revision = 'perf_005_trip_space_counts'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'revenue_totals',
+        sa.Column('currency', sa.String(3), primary_key=True),
+        sa.Column('month', sa.Date(), primary_key=True),
+        sa.Column('amount', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('reservations', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    # Backfill from the paid reservations (months in UTC)
+    op.execute("""
+        INSERT INTO revenue_totals (currency, month, amount, reservations)
+        SELECT t.currency,
+               date_trunc('month', r.created_at AT TIME ZONE 'UTC')::date,
+               sum(r.total_amount),
+               count(*)
+        FROM reservations r
+        JOIN trips t ON t.id = r.trip_id
+        WHERE r.payment_status = 'paid'
+        GROUP BY 1, 2
+    """)
+
+
+def downgrade():
+    op.drop_table('revenue_totals')
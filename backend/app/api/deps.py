@@ -1,12 +1,15 @@
-from typing import Optional
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
 from fastapi import Depends, Header
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exceptions import UnauthorizedException
 from app.core.security import verify_token
 from app.database import get_db
-from app.models.user import User
-from app.services.user_service import UserService
+from app.models.user import User, UserRole
+from app.services.read_routing import read_routing
+from app.services.user_cache import user_cache
 
 
 async def get_db_session() -> AsyncSession:
@@ -14,10 +17,21 @@ async def get_db_session() -> AsyncSession:
         yield session
 
 
-async def get_current_user(
-    db: AsyncSession = Depends(get_db_session),
-    authorization: Optional[str] = Header(None),
-) -> User:
+async def get_read_db_session(authorization: Optional[str] = Header(None)) -> AsyncSession:
+    """
+    Session for read-only endpoints: on the replica, unless the caller wrote
+    recently (see services/read_routing). Authentication is left to the
+    endpoint's own dependencies; the token is only used to identify the caller.
+    """
+    try:
+        user_id = _access_token_payload(authorization)["sub"]
+    except UnauthorizedException:
+        user_id = None
+    async with read_routing.session_factory(user_id)() as session:
+        yield session
+
+
+def _access_token_payload(authorization: Optional[str]) -> Dict[str, Any]:
     if not authorization or not authorization.lower().startswith("bearer "):
         raise UnauthorizedException()
     token = authorization.split(" ", 1)[1]
@@ -25,18 +39,51 @@ async def get_current_user(
         payload = verify_token(token)
     except ValueError:
         raise UnauthorizedException()
-    if payload.get("type") != "access":
-        raise UnauthorizedException()
-    user_id = payload.get("sub")
-    if not user_id:
+    if payload.get("type") != "access" or not payload.get("sub"):
         raise UnauthorizedException()
-    service = UserService(db)
-    user = await service.get_user_by_id(user_id)
+    return payload
+
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_db_session),
+    authorization: Optional[str] = Header(None),
+) -> User:
+    payload = _access_token_payload(authorization)
+    # Served from the per-worker user cache when possible (see services/user_cache)
+    user = await user_cache.get(db, payload["sub"])
     if not user:
         raise UnauthorizedException()
+    read_routing.set_request_user(user.id)
     return user
 
 
+@dataclass(frozen=True)
+class TokenPrincipal:
+    """The caller of a request authenticated by `get_token_principal`."""
+    id: uuid.UUID
+    role: UserRole
+
+
+async def get_token_principal(authorization: Optional[str] = Header(None)) -> TokenPrincipal:
+    """
+    Token-only authentication for read endpoints that only need the caller's
+    id and role: no request session, and no database access on a user cache
+    hit. Id and role come from the user cache like in `get_current_user`
+    (not from the token's claims), so a role change or deletion is seen by
+    both at the same time.
+    """
+    payload = _access_token_payload(authorization)
+    try:
+        user_id = uuid.UUID(str(payload["sub"]))
+    except ValueError:
+        raise UnauthorizedException()
+    user = await user_cache.get_detached(user_id)
+    if not user:
+        raise UnauthorizedException()
+    read_routing.set_request_user(user_id)
+    return TokenPrincipal(id=user_id, role=user.role)
+
+
 async def require_manager_or_superadmin(current_user: User = Depends(get_current_user)) -> User:
     if not current_user.is_manager_like():
         raise UnauthorizedException("Not enough permissions")
@@ -10,6 +10,7 @@ from app.api.deps import get_db_session, get_current_user
 from app.core.security import create_access_token, create_refresh_token, verify_token
 from app.models.user import User, UserRole
 from app.schemas.auth import LoginRequest, RefreshRequest, RegisterRequest, Token, TokenRefresh, UserOut
+from app.services.user_cache import user_cache
 from app.services.user_service import UserService
 from app.core.exceptions import UnauthorizedException
 from app.config import settings
@@ -118,8 +119,9 @@ async def login(payload: LoginRequest, db: AsyncSession = Depends(get_db_session
         # Allow login if pending verification but not if rejected/banned
         pass
         
-    access_token = create_access_token(str(user.id))
-    refresh_token = create_refresh_token(str(user.id))
+    claims = {"role": user.role.value}
+    access_token = create_access_token(str(user.id), extra_claims=claims)
+    refresh_token = create_refresh_token(str(user.id), extra_claims=claims)
     return Token(
         access_token=access_token,
         refresh_token=refresh_token,
@@ -146,14 +148,18 @@ Renueva el access token usando un refresh token válido.
         401: {"description": "Refresh token inválido o expirado"},
     }
 )
-async def refresh(payload: RefreshRequest):
+async def refresh(payload: RefreshRequest, db: AsyncSession = Depends(get_db_session)):
     token_data = verify_token(payload.refresh_token)
     if token_data.get("type") != "refresh":
         raise UnauthorizedException()
     user_id = token_data.get("sub")
     if not user_id:
         raise UnauthorizedException()
-    new_access = create_access_token(user_id)
+    # Current role, not the one at login: it may have changed since
+    user = await user_cache.get(db, user_id)
+    if not user:
+        raise UnauthorizedException()
+    new_access = create_access_token(user_id, extra_claims={"role": user.role.value})
     return TokenRefresh(access_token=new_access, expires_in=settings.access_token_expire_minutes * 60)
 
 
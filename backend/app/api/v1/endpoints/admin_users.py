@@ -64,11 +64,11 @@ async def create_user(
     # Actually, let's use service.create_user and then update if needed, OR just create manually here
     # Reuse service logic but override status
     
-    from app.core.security import get_password_hash
+    from app.core.security import hash_password
     
     user = User(
         email=user_in.email,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=await hash_password(user_in.password),
         full_name=user_in.full_name,
         phone=user_in.phone,
         role=user_in.role,
@@ -182,9 +182,12 @@ async def delete_user(
     # 2. Release any held spaces
     from app.models.space import Space, SpaceStatus
     from sqlalchemy import update
+    from app.services.trip_occupancy import trip_occupancy
+    from app.services.space_cache import space_cache
+    from app.api.v1.spaces import space_ws_manager
     
     # Release holds where this user is the holder
-    await db.execute(
+    result = await db.execute(
         update(Space)
         .where(Space.held_by == user_id)
         .values(
@@ -192,9 +195,21 @@ async def delete_user(
             status=SpaceStatus.available,
             hold_expires_at=None
         )
+        .returning(Space.id, Space.trip_id, Space.space_number)
     )
+    released = result.all()
+    trip_ids = {str(row.trip_id) for row in released}
+    trip_occupancy.mark(db, trip_ids)
     
     await db.delete(user)
     await db.commit()
+    space_cache.invalidate_many(trip_ids)
+    for row in released:
+        space_ws_manager.queue_space_update(str(row.trip_id), {
+            "space_id": str(row.id),
+            "space_number": row.space_number,
+            "status": "available",
+            "trip_id": str(row.trip_id)
+        })
     
     return {"message": "User deleted successfully"}
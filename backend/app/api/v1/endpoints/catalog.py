@@ -24,7 +24,7 @@ def check_admin_access(user: User):
 async def read_products(
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(deps.get_db_session),
+    db: AsyncSession = Depends(deps.get_read_db_session),
     current_user: User = Depends(deps.get_current_user),
 ):
     service = CatalogService(db)
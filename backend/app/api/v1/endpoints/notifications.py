@@ -6,29 +6,46 @@ from sqlalchemy import select, update, desc
 
 logger = logging.getLogger(__name__)
 
-from app.api.deps import get_current_user, get_db_session
+from app.api.deps import get_current_user, get_db_session, get_read_db_session, get_token_principal
 from app.models.notification import Notification
 from app.schemas.notification import NotificationResponse, NotificationUpdate
 from app.core.security import verify_token
+from app.core.permissions import require_manager_or_superadmin
+from app.services.websocket_fanout import FanoutMetrics, QueuedConnection
 
 router = APIRouter()
 
 # Store active connections
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
-        self.user_connections: dict = {}
+        # user_id -> queued websocket connections
+        self.user_connections: Dict[str, List[QueuedConnection]] = {}
+        # Send latency / queue depth, one room per user
+        self.metrics = FanoutMetrics()
 
     async def connect(self, websocket: WebSocket, user_id: str):
         await websocket.accept()
+        connection = QueuedConnection(websocket, user_id, self.metrics, on_evict=self._remove)
+        connection.start()
         if user_id not in self.user_connections:
             self.user_connections[user_id] = []
-        self.user_connections[user_id].append(websocket)
+        self.user_connections[user_id].append(connection)
 
     def disconnect(self, websocket: WebSocket, user_id: str):
-        if user_id in self.user_connections:
-            if websocket in self.user_connections[user_id]:
-                self.user_connections[user_id].remove(websocket)
+        for connection in list(self.user_connections.get(user_id, [])):
+            if connection.websocket is websocket:
+                connection.stop()
+                self._remove(connection)
+
+    def _remove(self, connection: QueuedConnection):
+        connections = self.user_connections.get(connection.room)
+        if connections is None:
+            return
+        if connection in connections:
+            connections.remove(connection)
+        if len(connections) == 0:
+            del self.user_connections[connection.room]
+            self.metrics.drop(connection.room)
 
     async def send_personal_message(self, message: str | dict, user_id: str):
         if user_id in self.user_connections:
@@ -38,19 +55,44 @@ class ConnectionManager:
             else:
                 text = message
                 
-            for connection in self.user_connections[user_id]:
-                await connection.send_text(text)
+            for connection in list(self.user_connections[user_id]):
+                connection.offer(text)
+
+    async def send_to_users(self, message: dict, user_ids: List[str]):
+        """Send one message to many users, serializing it only once"""
+        import json
+        text = json.dumps(message)
+        for user_id in user_ids:
+            for connection in list(self.user_connections.get(user_id, ())):
+                connection.offer(text)
 
     async def broadcast(self, message: dict):
         """Send a message to all connected users"""
         import json
         text = json.dumps(message)
-        for user_id, connections in self.user_connections.items():
-            for connection in connections:
-                try:
-                    await connection.send_text(text)
-                except Exception as e:
-                    logger.warning(f"Failed to send message to user {user_id}: {e}")
+        # Only enqueues; slow sockets are evicted instead of delaying everyone
+        for user_id, connections in list(self.user_connections.items()):
+            for connection in list(connections):
+                connection.offer(text)
+
+    async def drain(self):
+        """Wait until every queued message has been sent (or its socket evicted)"""
+        for connections in list(self.user_connections.values()):
+            for connection in list(connections):
+                await connection.queue.join()
+
+    def metrics_snapshot(self) -> dict:
+        rooms = self.metrics.rooms.values()
+        connections = [c for conns in self.user_connections.values() for c in conns]
+        latencies = sorted(l for room in rooms for l in room.latencies_ms)
+        return {
+            "connected_users": len(self.user_connections),
+            "connections": len(connections),
+            "messages_sent": sum(room.sent for room in rooms),
+            "evicted": self.metrics.evicted,
+            "queue_depth": sum(c.queue.qsize() for c in connections),
+            "latency_ms_p95": round(latencies[int(0.95 * (len(latencies) - 1))], 2) if latencies else None,
+        }
 
 manager = ConnectionManager()
 
@@ -59,11 +101,11 @@ manager = ConnectionManager()
 async def list_notifications(
     skip: int = 0,
     limit: int = 50,
-    db: AsyncSession = Depends(get_db_session),
-    current_user = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db_session),
+    current_user = Depends(get_token_principal)
 ):
     """
-    List current user's notifications
+    List current user's notifications (token-only auth: no user lookup)
     """
     stmt = select(Notification).where(
         Notification.user_id == current_user.id
@@ -139,10 +181,21 @@ async def websocket_endpoint(
     try:
         while True:
             await websocket.receive_text()
-    except WebSocketDisconnect:
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: socket already closed by a slow-consumer eviction
+        pass
+    finally:
         manager.disconnect(websocket, user_id)
 
 
+@router.get("/ws/metrics")
+async def notification_ws_metrics(current_user = Depends(require_manager_or_superadmin)):
+    """
+    WebSocket fan-out metrics for this worker (Admin/Manager only)
+    """
+    return manager.metrics_snapshot()
+
+
 @router.delete("/{id}")
 async def delete_notification(
     id: str,
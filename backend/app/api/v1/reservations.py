@@ -1,8 +1,7 @@
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, Response
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from pathlib import Path
 
@@ -28,6 +27,7 @@ from app.schemas.reservation import (
 )
 from app.services.reservation_service import ReservationService
 from app.services.notification_service import notification_service
+from app.services.pdf_cache import pdf_cache
 
 router = APIRouter()
 
@@ -117,9 +117,6 @@ async def create_reservation(
         items=[LoadItemResponse.model_validate(item) for item in items]
     )
     
-    # Notify about new reservation
-    await notification_service.notify_reservation_created(reservation, current_user)
-    
     return response
 
 
@@ -197,6 +194,8 @@ async def list_reservations(
     payment_status: Optional[PaymentStatus] = None,
     page: int = 1,
     page_size: int = 20,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     db: AsyncSession = Depends(get_db_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -204,67 +203,73 @@ async def list_reservations(
     List reservations - Optimized with JOINs to avoid N+1 queries
     - Clients see only their own
     - Admins/Managers see all with filters
+    - Pass `next_cursor` back as `cursor` for the next page (keyset on
+      created_at, id); `page` is only used without a cursor
+    - `total` is a planner estimate unless `include_total=true`
     """
     from sqlalchemy import select, func
     from app.models.trip import Trip
     from app.models.reservation import Reservation
-    from app.models.space import Space
+    from app.models.reservation_space import ReservationSpace
+    from app.core.pagination import count_rows, keyset_page
 
     skip = (page - 1) * page_size
 
-    # Base query with JOINs
-    base_stmt = (
-        select(Reservation, Trip, User)
-        .join(Trip, Reservation.trip_id == Trip.id)
-        .join(User, Reservation.client_id == User.id)
-    )
-
     # Apply filters
+    filters = []
     if current_user.role == UserRole.client:
-        base_stmt = base_stmt.where(Reservation.client_id == current_user.id)
+        filters.append(Reservation.client_id == current_user.id)
     else:
         if trip_id:
-            base_stmt = base_stmt.where(Reservation.trip_id == UUID(trip_id))
+            filters.append(Reservation.trip_id == UUID(trip_id))
         if client_id:
-            base_stmt = base_stmt.where(Reservation.client_id == UUID(client_id))
+            filters.append(Reservation.client_id == UUID(client_id))
 
     if status:
-        base_stmt = base_stmt.where(Reservation.status == status)
+        filters.append(Reservation.status == status)
     if payment_status:
-        base_stmt = base_stmt.where(Reservation.payment_status == payment_status)
+        filters.append(Reservation.payment_status == payment_status)
+
+    # Spaces per reservation, computed in the same query (indexed on reservation_id)
+    spaces_count = (
+        select(func.count())
+        .where(ReservationSpace.reservation_id == Reservation.id)
+        .correlate(Reservation)
+        .scalar_subquery()
+    )
 
-    # Count query (reuse filters)
-    count_stmt = select(func.count()).select_from(base_stmt.subquery())
-    total = await db.scalar(count_stmt) or 0
+    # Base query with JOINs
+    base_stmt = (
+        select(Reservation, Trip, User, spaces_count.label("spaces_count"))
+        .join(Trip, Reservation.trip_id == Trip.id)
+        .join(User, Reservation.client_id == User.id)
+        .where(*filters)
+    )
 
     # Get paginated results
-    data_stmt = (
-        base_stmt
-        .order_by(Reservation.created_at.desc())
-        .offset(skip)
-        .limit(page_size)
+    rows, next_cursor = await keyset_page(
+        db,
+        base_stmt,
+        created_at=Reservation.created_at,
+        id=Reservation.id,
+        key=lambda row: (row[0].created_at, row[0].id),
+        page_size=page_size,
+        cursor=cursor,
+        offset=skip,
     )
-    result = await db.execute(data_stmt)
-    rows = result.all()
-
-    # Get space counts for all reservations in ONE query
-    reservation_ids = [row[0].id for row in rows]
-    spaces_count_map = {}
-
-    if reservation_ids:
-        spaces_stmt = (
-            select(Space.reservation_id, func.count(Space.id))
-            .where(Space.reservation_id.in_(reservation_ids))
-            .group_by(Space.reservation_id)
-        )
-        spaces_result = await db.execute(spaces_stmt)
-        spaces_count_map = {
-            str(rid): cnt for rid, cnt in spaces_result.all()
-        }
+
+    # Count (the joins never drop rows, so only the filters matter)
+    if not cursor and next_cursor is None:
+        # Last page reached by offset: the total is known
+        total, total_is_estimate = skip + len(rows), False
+    else:
+        total, total_is_estimate = await count_rows(db, select(Reservation.id).where(*filters), exact=include_total)
+        if not cursor:
+            total = max(total, skip + len(rows) + 1)
 
     # Build response items
     items = []
-    for reservation, trip, client in rows:
+    for reservation, trip, client, reservation_spaces_count in rows:
         items.append(ReservationListItem(
             id=str(reservation.id),
             trip_id=str(reservation.trip_id),
@@ -272,7 +277,7 @@ async def list_reservations(
             payment_status=reservation.payment_status,
             payment_method=reservation.payment_method,
             total_amount=reservation.total_amount,
-            spaces_count=spaces_count_map.get(str(reservation.id), 0),
+            spaces_count=reservation_spaces_count,
             created_at=reservation.created_at,
             trip_origin=trip.origin,
             trip_destination=trip.destination,
@@ -288,7 +293,9 @@ async def list_reservations(
         total=total,
         page=page,
         page_size=page_size,
-        pages=pages
+        pages=pages,
+        next_cursor=next_cursor,
+        total_is_estimate=total_is_estimate,
     )
 
 
@@ -431,22 +438,15 @@ async def cancel_reservation(
         reason=reason
     )
     
-    # Notify about cancellation
+    # Notify waiting clients about the released spaces
     from app.models.reservation import Reservation
     from sqlalchemy import select
     reservation_stmt = select(Reservation).where(Reservation.id == UUID(reservation_id))
     reservation_result = await db.execute(reservation_stmt)
     reservation = reservation_result.scalars().first()
     
+    # The client's cancellation notice is queued by the service with the cancel itself
     if reservation:
-        # Get client
-        from app.models.user import User
-        client_stmt = select(User).where(User.id == reservation.client_id)
-        client_result = await db.execute(client_stmt)
-        client = client_result.scalars().first()
-        
-        await notification_service.notify_reservation_cancelled(reservation, client or current_user)
-        
         # If there's a trip, notify about space availability
         from app.models.trip import Trip
         trip_stmt = select(Trip).where(Trip.id == reservation.trip_id)
@@ -559,19 +559,8 @@ async def confirm_payment(
             "notes": payload.notes
         }
     )
-    await db.commit()  # Commit the audit log
-    
-    # Notify client about payment decision
-    from app.models.user import User
-    client_stmt = select(User).where(User.id == reservation.client_id)
-    client_result = await db.execute(client_stmt)
-    client = client_result.scalars().first()
     
-    if client:
-        if payload.approved:
-            await notification_service.notify_payment_approved(reservation, client)
-        else:
-            await notification_service.notify_payment_rejected(reservation, client, payload.notes)
+    await db.commit()  # Commit the audit log
     
     message = "Pago aprobado exitosamente" if payload.approved else "Pago rechazado"
     
@@ -626,6 +615,7 @@ async def get_reservation_audit_history(
 @router.get("/{reservation_id}/ticket")
 async def download_ticket(
     reservation_id: str,
+    request: Request,
     db: AsyncSession = Depends(get_db_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -648,16 +638,13 @@ async def download_ticket(
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="Ticket file not found")
     
-    return FileResponse(
-        path=str(file_path),
-        filename=f"ticket_{reservation_id}.pdf",
-        media_type="application/pdf"
-    )
+    return pdf_cache.file_response(request, file_path, filename=f"ticket_{reservation_id}.pdf")
 
 
 @router.get("/{reservation_id}/summary-pdf")
 async def download_summary(
     reservation_id: str,
+    request: Request,
     db: AsyncSession = Depends(get_db_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -686,7 +673,7 @@ async def download_summary(
     space_numbers = sorted([s.space_number for s in spaces])
     
     # Load all system config for PDF
-    from app.models.system_config import SystemConfig
+    from app.services.system_config_service import system_config_service
     config_keys = [
         'bank_details_invoice', 'bank_details_no_invoice',
         'company_name', 'company_email', 'company_website', 'company_phone',
@@ -694,9 +681,7 @@ async def download_summary(
         'payment_instructions_cash', 'payment_instructions_transfer', 
         'payment_instructions_mercadopago', 'cash_payment_info'
     ]
-    config_stmt = select(SystemConfig).where(SystemConfig.key.in_(config_keys))
-    config_result = await db.execute(config_stmt)
-    configs = {c.key: c.value for c in config_result.scalars().all()}
+    configs = (await system_config_service.get(db)).subset(config_keys)
     
     # Generate PDF
     from app.utils.pdf_generator import generate_pre_reservation_summary
@@ -707,7 +692,8 @@ async def download_summary(
         PaymentMethod.mercadopago: "MercadoPago"
     }
     
-    summary_path = generate_pre_reservation_summary(
+    summary_pdf = await pdf_cache.get_or_render(
+        generate_pre_reservation_summary,
         reservation_id=str(reservation.id),
         client_name=current_user.full_name,
         client_email=current_user.email,
@@ -729,12 +715,10 @@ async def download_summary(
         exchange_rate=float(trip.exchange_rate or 1.0)
     )
     
-    file_path = Path(settings.upload_dir) / summary_path
-    
-    return FileResponse(
-        path=str(file_path),
+    return pdf_cache.response(
+        request,
+        summary_pdf,
         filename=f"resumen_{reservation_id[:8]}.pdf",
-        media_type="application/pdf",
         headers={
             "Content-Disposition": f'attachment; filename="resumen_{reservation_id[:8]}.pdf"'
         }
@@ -748,6 +732,7 @@ async def download_summary(
 @router.get("/public/summary/{reservation_id}")
 async def public_download_summary(
     reservation_id: str,
+    request: Request,
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -758,7 +743,7 @@ async def public_download_summary(
     from app.models.reservation import Reservation
     from app.models.trip import Trip
     from app.models.user import User as UserModel
-    from app.models.system_config import SystemConfig
+    from app.services.system_config_service import system_config_service
     from app.utils.pdf_generator import generate_pre_reservation_summary
     
     # Load reservation without auth check
@@ -795,9 +780,7 @@ async def public_download_summary(
         'payment_instructions_cash', 'payment_instructions_transfer', 
         'payment_instructions_mercadopago', 'cash_payment_info'
     ]
-    config_stmt = select(SystemConfig).where(SystemConfig.key.in_(config_keys))
-    config_result = await db.execute(config_stmt)
-    configs = {c.key: c.value for c in config_result.scalars().all()}
+    configs = (await system_config_service.get(db)).subset(config_keys)
     
     payment_method_labels = {
         PaymentMethod.cash: "Efectivo (bodega/OXXO/banco)",
@@ -805,7 +788,8 @@ async def public_download_summary(
         PaymentMethod.mercadopago: "MercadoPago"
     }
     
-    summary_path = generate_pre_reservation_summary(
+    summary_pdf = await pdf_cache.get_or_render(
+        generate_pre_reservation_summary,
         reservation_id=str(reservation.id),
         client_name=client.full_name if client else "Cliente",
         client_email=client.email if client else "",
@@ -827,18 +811,13 @@ async def public_download_summary(
         exchange_rate=float(trip.exchange_rate or 1.0)
     )
     
-    file_path = Path(settings.upload_dir) / summary_path
-    
-    return FileResponse(
-        path=str(file_path),
-        filename=f"resumen_{reservation_id[:8]}.pdf",
-        media_type="application/pdf"
-    )
+    return pdf_cache.response(request, summary_pdf, filename=f"resumen_{reservation_id[:8]}.pdf")
 
 
 @router.get("/public/ticket/{reservation_id}")
 async def public_download_ticket(
     reservation_id: str,
+    request: Request,
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -869,8 +848,4 @@ async def public_download_ticket(
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="Archivo de ticket no encontrado")
     
-    return FileResponse(
-        path=str(file_path),
-        filename=f"ticket_{reservation_id[:8]}.pdf",
-        media_type="application/pdf"
-    )
+    return pdf_cache.file_response(request, file_path, filename=f"ticket_{reservation_id[:8]}.pdf")
@@ -1,14 +1,22 @@
 from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, Query, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import Dict, List
+from typing import Dict, List, Optional
 from uuid import UUID
+import asyncio
 import json
 
-from app.api.deps import get_current_user, get_db_session
+from app.api.deps import get_current_user, get_db_session, get_token_principal
+from app.config import settings
+from app.services.read_routing import read_routing
+from app.database import AsyncSessionLocal
+from app.core.permissions import require_manager_or_superadmin
 from app.models.space import Space, SpaceStatus
 from app.schemas.space import TripSpacesResponse, SpaceBase, SpaceSummary
 from app.services.trip_service import TripService
+from app.services.space_cache import space_cache
+from app.services.event_bus import EventBus
+from app.services.websocket_fanout import FanoutMetrics, QueuedConnection
 from app.core.security import verify_token
 
 router = APIRouter()
@@ -24,87 +32,205 @@ async def get_space_by_id(db: AsyncSession, space_id: str) -> Space | None:
         return None
 
 
+SPACE_EVENTS_CHANNEL = "space_updates"
+
+
 # WebSocket Manager for Space Updates (per-trip rooms)
 class SpaceConnectionManager:
     def __init__(self):
-        # Dict of trip_id -> list of websocket connections
-        self.trip_connections: Dict[str, List[WebSocket]] = {}
+        # Dict of trip_id -> queued websocket connections
+        self.trip_connections: Dict[str, List[QueuedConnection]] = {}
+        # Per-trip send latency / queue depth
+        self.metrics = FanoutMetrics()
+        # Relays updates to the other uvicorn workers (set by attach_bus)
+        self.bus: Optional[EventBus] = None
+        # trip_id -> {space_id: latest update} waiting for the coalescing window
+        self.pending_updates: Dict[str, Dict[str, dict]] = {}
+        self._flush_tasks: Dict[str, asyncio.Task] = {}
+        # Where batch versions and snapshots are read from (the primary)
+        self.session_factory = AsyncSessionLocal
+
+    async def attach_bus(self, bus: EventBus):
+        """Publish local broadcasts on `bus` and relay the ones from other workers."""
+        self.bus = bus
+        await bus.subscribe(SPACE_EVENTS_CHANNEL, self._on_remote_event)
 
     async def connect(self, websocket: WebSocket, trip_id: str):
         await websocket.accept()
+        connection = QueuedConnection(websocket, trip_id, self.metrics, on_evict=self._remove)
+        connection.start()
         if trip_id not in self.trip_connections:
             self.trip_connections[trip_id] = []
-        self.trip_connections[trip_id].append(websocket)
+        self.trip_connections[trip_id].append(connection)
         print(f"[SpaceWS] Client connected to trip {trip_id}. Total: {len(self.trip_connections[trip_id])}")
 
     def disconnect(self, websocket: WebSocket, trip_id: str):
-        if trip_id in self.trip_connections:
-            if websocket in self.trip_connections[trip_id]:
-                self.trip_connections[trip_id].remove(websocket)
-            if len(self.trip_connections[trip_id]) == 0:
-                del self.trip_connections[trip_id]
+        for connection in list(self.trip_connections.get(trip_id, [])):
+            if connection.websocket is websocket:
+                connection.stop()
+                self._remove(connection)
         print(f"[SpaceWS] Client disconnected from trip {trip_id}")
 
+    def _remove(self, connection: QueuedConnection):
+        connections = self.trip_connections.get(connection.room)
+        if connections is None:
+            return
+        if connection in connections:
+            connections.remove(connection)
+        if len(connections) == 0:
+            del self.trip_connections[connection.room]
+            self.metrics.drop(connection.room)
+
     async def broadcast_to_trip(self, trip_id: str, message: dict):
-        """Send update to all clients watching a specific trip"""
-        if trip_id in self.trip_connections:
-            text = json.dumps(message)
-            dead_connections = []
-            for connection in self.trip_connections[trip_id]:
-                try:
-                    await connection.send_text(text)
-                except Exception:
-                    dead_connections.append(connection)
-            # Clean up dead connections
-            for conn in dead_connections:
-                self.trip_connections[trip_id].remove(conn)
+        """Send update to all clients watching a specific trip, on every worker"""
+        self._send_local(trip_id, message)
+        if self.bus is not None:
+            await self.bus.publish(SPACE_EVENTS_CHANNEL, {"trip_id": trip_id, "message": message})
+
+    def queue_space_update(self, trip_id: str, update: dict):
+        """
+        Merge a space change into the trip's next `spaces_batch_update`.
+        Changes within SPACE_UPDATE_COALESCE_MS are sent as one event; a later
+        change to the same space replaces the earlier one.
+        """
+        pending = self.pending_updates.setdefault(trip_id, {})
+        pending[update["space_id"]] = update
+        if trip_id not in self._flush_tasks:
+            self._flush_tasks[trip_id] = asyncio.create_task(self._flush_later(trip_id))
+
+    async def _flush_later(self, trip_id: str):
+        await asyncio.sleep(settings.space_update_coalesce_ms / 1000)
+        await self._flush_trip(trip_id)
+
+    async def _flush_trip(self, trip_id: str):
+        self._flush_tasks.pop(trip_id, None)
+        updates = self.pending_updates.pop(trip_id, None)
+        if not updates:
+            return
+        try:
+            # The DB-derived space_version, so every worker stamps batches alike
+            version = (await self._snapshot(trip_id)).space_version
+        except Exception as e:
+            print(f"[SpaceWS] Could not version batch for trip {trip_id}: {e}")
+            await self.broadcast_to_trip(trip_id, {"event": "spaces_resync", "data": {"trip_id": trip_id}})
+            return
+        await self.broadcast_to_trip(trip_id, {
+            "event": "spaces_batch_update",
+            "version": version,
+            "data": {"trip_id": trip_id, "spaces": list(updates.values())},
+        })
+
+    async def flush(self):
+        """Send every pending batch now instead of waiting for its window"""
+        for trip_id in list(self.pending_updates):
+            task = self._flush_tasks.pop(trip_id, None)
+            if task is not None:
+                task.cancel()
+            await self._flush_trip(trip_id)
+
+    async def _on_remote_event(self, payload: dict):
+        """Relay an update published by another worker to this worker's sockets"""
+        trip_id = payload.get("trip_id")
+        if not trip_id:
+            return
+        # The write happened elsewhere, so our snapshot of the trip is stale
+        space_cache.invalidate(trip_id, publish=False)
+        message = payload.get("message")
+        if message:
+            self._send_local(trip_id, message)
+        else:
+            # The update was too big to relay: clients fetch a fresh snapshot
+            self._send_local(trip_id, {"event": "spaces_resync", "data": {"trip_id": trip_id}})
+
+    async def send_snapshot(self, websocket: WebSocket, trip_id: str, user_id: str, since_version: Optional[int] = None):
+        """
+        Queue a full `spaces_snapshot` for one socket that fell behind.
+        Nothing is sent when the client already has the current `space_version`.
+        """
+        connection = next((c for c in self.trip_connections.get(trip_id, []) if c.websocket is websocket), None)
+        if connection is None:
+            return
+        snapshot = await self._snapshot(trip_id)
+        if since_version == snapshot.space_version:
+            return
+        response = TripSpacesResponse(
+            trip_id=snapshot.trip_id,
+            total_spaces=snapshot.total_spaces,
+            spaces=snapshot.spaces(user_id),
+            summary=snapshot.summary(),
+            space_version=snapshot.space_version,
+        )
+        connection.offer(json.dumps({
+            "event": "spaces_snapshot",
+            "version": snapshot.space_version,
+            "data": response.model_dump(mode="json"),
+        }))
+
+    async def _snapshot(self, trip_id: str):
+        async with self.session_factory() as db:
+            snapshot = space_cache.peek(trip_id)
+            if snapshot is None:
+                trip = await TripService(db).get_trip(trip_id)
+                snapshot = await space_cache.get(db, trip)
+        return snapshot
+
+    def _send_local(self, trip_id: str, message: dict):
+        """Encode once and enqueue on every socket; each writer task sends concurrently"""
+        connections = self.trip_connections.get(trip_id)
+        if not connections:
+            return
+        text = json.dumps(message)
+        for connection in list(connections):
+            connection.offer(text)
+
+    async def drain(self):
+        """Flush pending batches, then wait until every queued message has been sent (or its socket evicted)"""
+        await self.flush()
+        for connections in list(self.trip_connections.values()):
+            for connection in list(connections):
+                await connection.queue.join()
+
+    def metrics_snapshot(self) -> dict:
+        return {
+            trip_id: room.as_dict(
+                queue_depth=sum(c.queue.qsize() for c in self.trip_connections.get(trip_id, [])),
+                connections=len(self.trip_connections.get(trip_id, [])),
+            )
+            for trip_id, room in self.metrics.rooms.items()
+        }
 
 
 space_ws_manager = SpaceConnectionManager()
 
 
 @router.get("/trip/{trip_id}", response_model=TripSpacesResponse)
-async def get_trip_spaces(trip_id: str, db: AsyncSession = Depends(get_db_session), current_user=Depends(get_current_user)):
-    from sqlalchemy import select
-    from app.models.reservation import Reservation, ReservationStatus
-    from app.models.reservation_space import ReservationSpace
-    
-    service = TripService(db)
-    trip = await service.get_trip(trip_id)
-    spaces = await service.list_spaces(trip)
-    
-    # Get all spaces that belong to user's pending reservations for this trip
-    pending_res_stmt = select(ReservationSpace.space_id).join(
-        Reservation, Reservation.id == ReservationSpace.reservation_id
-    ).where(
-        Reservation.trip_id == trip.id,
-        Reservation.client_id == current_user.id,
-        Reservation.status == ReservationStatus.pending
-    )
-    result = await db.execute(pending_res_stmt)
-    my_pending_space_ids = {str(row[0]) for row in result.fetchall()}
-    
-    summary = SpaceSummary()
-    for space in spaces:
-        setattr(summary, space.status.value, getattr(summary, space.status.value) + 1)
-    
-    spaces_out = []
-    for s in spaces:
-        sb = SpaceBase.model_validate(s)
-        # is_mine is true if:
-        # 1. Space is on_hold and held_by current user, OR
-        # 2. Space belongs to user's pending reservation
-        is_mine_from_hold = s.status == SpaceStatus.on_hold and str(s.held_by) == str(current_user.id)
-        is_mine_from_reservation = str(s.id) in my_pending_space_ids
-        sb.is_mine = is_mine_from_hold or is_mine_from_reservation
-        sb.has_pending_reservation = is_mine_from_reservation
-        spaces_out.append(sb)
+async def get_trip_spaces(
+    trip_id: str,
+    since: Optional[int] = Query(None, ge=0, description="space_version of the map the client already has"),
+    current_user=Depends(get_token_principal),
+):
+    # Served from the per-trip snapshot; only the is_mine overlay is per-user.
+    # A session is opened only to rebuild it.
+    snapshot = space_cache.peek(trip_id)
+    if snapshot is None:
+        # The snapshot is shared: rebuild it from the primary unless the trip is
+        # known to be unchanged for longer than a replica may lag
+        session_factory = AsyncSessionLocal
+        if space_cache.settled_for(trip_id, read_routing.window_seconds):
+            session_factory = read_routing.session_factory(current_user.id)
+        async with session_factory() as db:
+            trip = await TripService(db).get_trip(trip_id)
+            snapshot = await space_cache.get(db, trip)
 
+    # Only the changed spaces when the client's version is recent enough, else a full map
+    delta = snapshot.is_delta(since)
     return TripSpacesResponse(
-        trip_id=str(trip.id),
-        total_spaces=trip.total_spaces,
-        spaces=spaces_out,
-        summary=summary,
+        trip_id=snapshot.trip_id,
+        total_spaces=snapshot.total_spaces,
+        spaces=snapshot.spaces(str(current_user.id), since=since if delta else None),
+        summary=snapshot.summary(),
+        space_version=snapshot.space_version,
+        delta=delta,
     )
 
 
@@ -123,14 +249,11 @@ async def hold_space(
     updated = await service.hold_space(space, str(current_user.id))
     
     # Broadcast space update
-    await space_ws_manager.broadcast_to_trip(str(updated.trip_id), {
-        "event": "space_update",
-        "data": {
-            "space_id": str(updated.id),
-            "space_number": updated.space_number,
-            "status": updated.status.value,
-            "trip_id": str(updated.trip_id)
-        }
+    space_ws_manager.queue_space_update(str(updated.trip_id), {
+        "space_id": str(updated.id),
+        "space_number": updated.space_number,
+        "status": updated.status.value,
+        "trip_id": str(updated.trip_id)
     })
     
     return SpaceBase.model_validate(updated)
@@ -151,20 +274,18 @@ async def block_space(
     space.held_by = None
     space.hold_expires_at = None
     await db.commit()
+    space_cache.invalidate(space.trip_id)
     await db.refresh(space)
     
     # Broadcast space update
-    await space_ws_manager.broadcast_to_trip(str(space.trip_id), {
-        "event": "space_update",
-        "data": {
-            "space_id": str(space.id),
-            "space_number": space.space_number,
-            "status": target.status.value,
-            "trip_id": str(target.trip_id)
-        }
+    space_ws_manager.queue_space_update(str(space.trip_id), {
+        "space_id": str(space.id),
+        "space_number": space.space_number,
+        "status": space.status.value,
+        "trip_id": str(space.trip_id)
     })
     
-    return SpaceBase.model_validate(target)
+    return SpaceBase.model_validate(space)
 
 
 @router.put("/{space_id}/status", response_model=SpaceBase)
@@ -204,22 +325,30 @@ async def update_space_status(
 
     space.status = status
     await db.commit()
+    space_cache.invalidate(space.trip_id)
     await db.refresh(space)
     
     # Broadcast space update to all clients watching this trip
-    await space_ws_manager.broadcast_to_trip(str(space.trip_id), {
-        "event": "space_update",
-        "data": {
-            "space_id": str(space.id),
-            "space_number": space.space_number,
-            "status": space.status.value,
-            "trip_id": str(space.trip_id)
-        }
+    space_ws_manager.queue_space_update(str(space.trip_id), {
+        "space_id": str(space.id),
+        "space_number": space.space_number,
+        "status": space.status.value,
+        "trip_id": str(space.trip_id)
     })
     
     return SpaceBase.model_validate(space)
 
 
+@router.get("/ws/metrics")
+async def space_ws_metrics(current_user=Depends(require_manager_or_superadmin)):
+    """
+    Per-trip WebSocket fan-out metrics for this worker (Admin/Manager only):
+    connections, queue depth, send latency percentiles and evictions, plus
+    evictions since startup (including trips nobody watches any more).
+    """
+    return {"trips": space_ws_manager.metrics_snapshot(), "evicted": space_ws_manager.metrics.evicted}
+
+
 # WebSocket endpoint for real-time space updates
 @router.websocket("/ws/trip/{trip_id}")
 async def space_websocket(websocket: WebSocket, trip_id: str, token: str = Query(...)):
@@ -237,8 +366,16 @@ async def space_websocket(websocket: WebSocket, trip_id: str, token: str = Query
     
     try:
         while True:
-            # Just keep connection alive, we only send from server
+            # Only client message: {"action": "sync", "version": <last seen>}
             data = await websocket.receive_text()
-            # Optionally handle ping/pong or client messages here
-    except WebSocketDisconnect:
+            try:
+                request = json.loads(data)
+            except ValueError:
+                continue
+            if isinstance(request, dict) and request.get("action") == "sync":
+                await space_ws_manager.send_snapshot(websocket, trip_id, user_id, request.get("version"))
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: socket already closed by a slow-consumer eviction
+        pass
+    finally:
         space_ws_manager.disconnect(websocket, trip_id)
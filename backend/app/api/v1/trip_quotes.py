@@ -9,7 +9,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.api.deps import get_db_session, get_current_user
+from app.api.deps import get_db_session, get_current_user, get_read_db_session
 from app.core.permissions import require_manager_or_superadmin
 from app.models import User, UserRole, Trip, TripStatus
 from app.models.trip_quote import TripQuote, QuoteStatus
@@ -239,7 +239,7 @@ async def list_quotes(
     status: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
     current_user: User = Depends(get_current_user)
 ):
     """Lista cotizaciones con paginación. Clientes ven las suyas, admins ven todas."""
@@ -1,24 +1,33 @@
 import logging
 from datetime import date, time
-from pathlib import Path
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user, get_db_session
+from app.api.deps import get_current_user, get_db_session, get_read_db_session
+from app.core.exceptions import BadRequestException, NotFoundException
 from app.core.permissions import require_manager_or_superadmin
 from app.models.trip import TripStatus, Trip
 from app.schemas.trip import TripCreate, TripOut, TripUpdate
-from app.schemas.space import TripSpacesResponse, SpaceSummary, SpaceBase
+from app.schemas.space import TripSpacesResponse, SpaceBase
 from app.services.trip_service import TripService
+from app.services.manifest_service import MANIFEST_KINDS, ManifestService, merged_pdf, stream_zip
+from app.services.space_cache import space_cache
 from app.services.notification_service import notification_service
 
 router = APIRouter()
 
+# Longest date range accepted by the bulk manifest export
+MAX_EXPORT_DAYS = 31
+# A merged PDF is one render in one pool process, bounded by PDF_RENDER_TIMEOUT_SECONDS:
+# larger exports must use the ZIP, which renders each manifest on its own
+MAX_MERGED_PDF_DAYS = 7
+MAX_MERGED_PDF_MANIFESTS = 20
+
 
 @router.get("/", response_model=list[TripOut])
-async def list_trips(status: TripStatus | None = None, future_only: bool = False, db: AsyncSession = Depends(get_db_session)):
+async def list_trips(status: TripStatus | None = None, future_only: bool = False, db: AsyncSession = Depends(get_read_db_session)):
     service = TripService(db)
     trips_data = await service.list_trips_with_stats(status, future_only)
     
@@ -44,8 +53,8 @@ async def list_trips(status: TripStatus | None = None, future_only: bool = False
 async def get_trip(trip_id: str, db: AsyncSession = Depends(get_db_session)):
     service = TripService(db)
     trip = await service.get_trip(trip_id)
-    spaces = await service.list_spaces(trip)
-    summary = _build_summary(spaces)
+    snapshot = await space_cache.get(db, trip)
+    summary = snapshot.summary()
     return TripOut.model_validate(trip).model_copy(update={
         "available_spaces": summary.available,
         "reserved_spaces": summary.reserved,
@@ -57,9 +66,11 @@ async def get_trip(trip_id: str, db: AsyncSession = Depends(get_db_session)):
 @router.get("/{trip_id}/spaces", response_model=list[SpaceBase])
 async def list_trip_spaces(trip_id: str, db: AsyncSession = Depends(get_db_session)):
     service = TripService(db)
-    trip = await service.get_trip(trip_id)
-    spaces = await service.list_spaces(trip)
-    return spaces
+    snapshot = space_cache.peek(trip_id)
+    if snapshot is None:
+        trip = await service.get_trip(trip_id)
+        snapshot = await space_cache.get(db, trip)
+    return snapshot.spaces()
 
 
 @router.post("/", response_model=TripOut, status_code=201)
@@ -309,9 +320,64 @@ async def clone_trip(
 
 # ==================== MANIFEST ENDPOINT ====================
 
+@router.get("/manifests/export")
+async def export_manifests(
+    date_from: date,
+    date_to: date,
+    manifest_type: str = "both",  # office, driver or both
+    format: str = "zip",  # zip or pdf
+    db: AsyncSession = Depends(get_db_session),
+    current_user=Depends(require_manager_or_superadmin)
+):
+    """
+    Download the manifests of every trip departing between date_from and date_to.
+
+    Streams a ZIP with one PDF per trip and manifest type as they render, or
+    a single merged PDF (format=pdf, for up to MAX_MERGED_PDF_DAYS days and
+    MAX_MERGED_PDF_MANIFESTS manifests). Nothing is written to disk.
+    """
+    if manifest_type not in ("office", "driver", "both"):
+        raise BadRequestException("Tipo de manifiesto inválido (office, driver o both)")
+    if format not in ("zip", "pdf"):
+        raise BadRequestException("Formato inválido (zip o pdf)")
+    if date_to < date_from:
+        raise BadRequestException("La fecha final debe ser posterior a la inicial")
+    if (date_to - date_from).days > MAX_EXPORT_DAYS:
+        raise BadRequestException(f"El rango máximo es de {MAX_EXPORT_DAYS} días")
+    if format == "pdf" and (date_to - date_from).days > MAX_MERGED_PDF_DAYS:
+        raise BadRequestException(f"El rango máximo en PDF es de {MAX_MERGED_PDF_DAYS} días, usa el formato zip")
+
+    service = ManifestService(db)
+    trips = await service.trips_departing(date_from, date_to)
+    if not trips:
+        raise NotFoundException("No hay viajes en ese rango de fechas")
+
+    kinds = MANIFEST_KINDS if manifest_type == "both" else (manifest_type,)
+    manifests = await service.export_manifests(trips, kinds)
+    name = f"manifiestos_{date_from.strftime('%Y%m%d')}_{date_to.strftime('%Y%m%d')}"
+
+    if format == "pdf":
+        if len(manifests) > MAX_MERGED_PDF_MANIFESTS:
+            raise BadRequestException(
+                f"Demasiados manifiestos para un solo PDF (máximo {MAX_MERGED_PDF_MANIFESTS}), usa el formato zip"
+            )
+        pdf = await merged_pdf(manifests)
+        return Response(
+            content=pdf,
+            media_type="application/pdf",
+            headers={"Content-Disposition": f'attachment; filename="{name}.pdf"'}
+        )
+    return StreamingResponse(
+        stream_zip(manifests),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{name}.zip"'}
+    )
+
+
 @router.get("/{trip_id}/manifest")
 async def download_manifest(
     trip_id: str,
+    request: Request,
     manifest_type: str = "office",  # office or driver
     db: AsyncSession = Depends(get_db_session),
     current_user=Depends(require_manager_or_superadmin)
@@ -326,134 +392,29 @@ async def download_manifest(
     
     try:
         from app.utils.pdf_generator import generate_trip_manifest, generate_driver_manifest
-        from app.models.reservation import Reservation
-        from app.models.load_item import LoadItem
-        from app.models.system_config import SystemConfig
-        from sqlalchemy import select
-        from sqlalchemy.orm import selectinload
-        from uuid import UUID
-        from app.config import settings
+        from app.services.pdf_cache import pdf_cache
         
         service = TripService(db)
         trip = await service.get_trip(trip_id)
         
-        # Get all reservations for this trip with client relationship
-        stmt = select(Reservation).where(
-            Reservation.trip_id == UUID(trip_id)
-        ).options(selectinload(Reservation.client), selectinload(Reservation.items))
-        
-        result = await db.execute(stmt)
-        reservations = result.scalars().all()
-        
-        # OPTIMIZED: Get all space numbers in ONE query instead of N queries
-        from app.models.space import Space
-        from app.models.reservation_space import ReservationSpace
-        
-        reservation_ids = [res.id for res in reservations]
-        space_map: dict = {}
-        
-        if reservation_ids:
-            all_spaces_stmt = (
-                select(ReservationSpace.reservation_id, Space.space_number)
-                .join(Space, ReservationSpace.space_id == Space.id)
-                .where(ReservationSpace.reservation_id.in_(reservation_ids))
-            )
-            all_spaces_result = await db.execute(all_spaces_stmt)
-            for res_id, space_num in all_spaces_result.all():
-                if res_id not in space_map:
-                    space_map[res_id] = []
-                space_map[res_id].append(space_num)
-        
-        # Build reservations data for PDF
-        reservations_data = []
-        for res in reservations:
-            # Use pre-fetched space numbers
-            space_numbers = space_map.get(res.id, [])
-            
-            res_data = {
-                "client_name": res.client.full_name if res.client else "Desconocido",
-                "client_phone": res.client.phone if res.client else None,
-                "client_email": res.client.email if res.client else None,
-                "space_numbers": space_numbers,
-                "payment_status": res.payment_status.value if res.payment_status else "unpaid",
-                "total_amount": float(res.total_amount) if res.total_amount else 0,
-            }
-            
-            # For driver manifest, add extra details
-            if manifest_type == "driver":
-                # Items/cargo details
-                items_data = []
-                for item in res.items:
-                    items_data.append({
-                        "product_name": item.product_name,
-                        "box_count": item.box_count,
-                        "total_weight": float(item.total_weight) if item.total_weight else 0,
-                    })
-                res_data["items"] = items_data
-                
-                # Pickup address from pickup_details JSON
-                pickup_details = res.pickup_details or {}
-                pickup_address = pickup_details.get("address", None)
-                res_data["pickup_address"] = pickup_address
-                
-                # Internal notes
-                res_data["notes"] = res.discount_reason or ""  # Using discount_reason as notes for now
-            
-            reservations_data.append(res_data)
-        
-        # Get PDF config from system settings
-        config_stmt = select(SystemConfig)
-        config_result = await db.execute(config_stmt)
-        pdf_config = {c.key: c.value for c in config_result.scalars().all()}
+        # Reservations, clients, items and space numbers in a fixed number of queries
+        manifests = ManifestService(db)
+        rows = await manifests.reservations_by_trip([trip.id], detailed=manifest_type == "driver")
+        pdf_config = await manifests.pdf_config()
+        manifest_args = manifests.manifest_args(trip, rows[trip.id], pdf_config)
         
         # Generate appropriate PDF
         if manifest_type == "driver":
-            relative_path = generate_driver_manifest(
-                trip_id=str(trip.id),
-                origin=trip.origin,
-                destination=trip.destination,
-                departure_date=trip.departure_date.strftime("%d/%m/%Y"),
-                departure_time=trip.departure_time.strftime("%H:%M") if trip.departure_time else None,
-                truck_plate=trip.truck_plate,
-                trailer_plate=trip.trailer_plate,
-                driver_name=trip.driver_name,
-                driver_phone=trip.driver_phone,
-                total_spaces=trip.total_spaces,
-                reservations=reservations_data,
-                pdf_config=pdf_config,
-                currency=trip.currency or "USD"
-            )
+            manifest_pdf = await pdf_cache.get_or_render(generate_driver_manifest, **manifest_args)
             filename_prefix = "chofer"
         else:
-            relative_path = generate_trip_manifest(
-                trip_id=str(trip.id),
-                origin=trip.origin,
-                destination=trip.destination,
-                departure_date=trip.departure_date.strftime("%d/%m/%Y"),
-                departure_time=trip.departure_time.strftime("%H:%M") if trip.departure_time else None,
-                truck_plate=trip.truck_plate,
-                trailer_plate=trip.trailer_plate,
-                driver_name=trip.driver_name,
-                driver_phone=trip.driver_phone,
-                total_spaces=trip.total_spaces,
-                reservations=reservations_data,
-                pdf_config=pdf_config,
-                currency=trip.currency or "USD"
-            )
+            manifest_pdf = await pdf_cache.get_or_render(generate_trip_manifest, **manifest_args)
             filename_prefix = "oficina"
         
-        file_path = Path(settings.upload_dir) / relative_path
-        
-        if not file_path.exists():
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error generando el manifiesto: archivo no existe en {file_path}"
-            )
-        
-        return FileResponse(
-            path=str(file_path),
+        return pdf_cache.response(
+            request,
+            manifest_pdf,
             filename=f"manifiesto_{filename_prefix}_{trip.origin}_{trip.destination}_{trip.departure_date.strftime('%Y%m%d')}.pdf",
-            media_type="application/pdf"
         )
     except HTTPException:
         raise
@@ -572,10 +533,3 @@ async def get_waitlist_status(
         "spaces_requested": user_entry.spaces_requested
     }
 
-
-def _build_summary(spaces: list) -> SpaceSummary:
-    summary = SpaceSummary()
-    for space in spaces:
-        summary_value = getattr(summary, space.status.value)
-        setattr(summary, space.status.value, summary_value + 1)
-    return summary
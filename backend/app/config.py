@@ -18,11 +18,28 @@ class Settings(BaseSettings):
     postgres_db: str = Field("keikichi_logistics", alias="POSTGRES_DB")
     postgres_user: str = Field("keikichi", alias="POSTGRES_USER")
     postgres_password: str = Field("password", alias="POSTGRES_PASSWORD")
+    # Optional replica for read-only endpoints (defaults to the primary); users who
+    # wrote within the last REPLICA_READ_YOUR_WRITES_SECONDS keep reading the primary
+    database_read_url: str | None = Field(None, alias="DATABASE_READ_URL")
+    replica_read_your_writes_seconds: float = Field(10.0, alias="REPLICA_READ_YOUR_WRITES_SECONDS")
+
+    # Connection pool, per uvicorn worker (see app/core/db_pool.py)
+    db_pool_size: int = Field(10, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout_seconds: float = Field(10.0, alias="DB_POOL_TIMEOUT_SECONDS")
+    db_pool_pre_ping: bool = Field(True, alias="DB_POOL_PRE_PING")
+    db_pool_recycle_seconds: int = Field(1800, alias="DB_POOL_RECYCLE_SECONDS")
+    db_statement_cache_size: int = Field(100, alias="DB_STATEMENT_CACHE_SIZE")
+    # Log every SQL statement (independent of DEBUG)
+    sql_echo: bool = Field(False, alias="SQL_ECHO")
 
     jwt_secret_key: str = Field(..., alias="JWT_SECRET_KEY")
     jwt_algorithm: str = Field("HS256", alias="JWT_ALGORITHM")
     access_token_expire_minutes: int = Field(30, alias="ACCESS_TOKEN_EXPIRE_MINUTES")
     refresh_token_expire_days: int = Field(7, alias="REFRESH_TOKEN_EXPIRE_DAYS")
+    # bcrypt cost factor (existing hashes are upgraded at login) and hashing threads per worker
+    bcrypt_rounds: int = Field(12, alias="BCRYPT_ROUNDS")
+    password_hash_workers: int = Field(2, alias="PASSWORD_HASH_WORKERS")
 
     backend_host: str = Field("0.0.0.0", alias="BACKEND_HOST")
     backend_port: int = Field(8000, alias="BACKEND_PORT")
@@ -55,10 +72,41 @@ class Settings(BaseSettings):
 
     default_spaces_per_trip: int = Field(28, alias="DEFAULT_SPACES_PER_TRIP")
     space_hold_minutes: int = Field(10, alias="SPACE_HOLD_MINUTES")
+    space_cache_ttl_seconds: float = Field(5.0, alias="SPACE_CACHE_TTL_SECONDS")
+    # Admin dashboard statistics are shared by every admin for this long
+    dashboard_cache_ttl_seconds: float = Field(15.0, alias="DASHBOARD_CACHE_TTL_SECONDS")
+    # Authenticated users are reused across requests for this long (0 disables)
+    user_cache_ttl_seconds: float = Field(30.0, alias="USER_CACHE_TTL_SECONDS")
+
+    # WebSocket fan-out: per-connection outbound queue and send timeout
+    ws_send_queue_size: int = Field(100, alias="WS_SEND_QUEUE_SIZE")
+    ws_send_timeout_seconds: float = Field(10.0, alias="WS_SEND_TIMEOUT_SECONDS")
+    # Space changes on a trip within this window go out as one spaces_batch_update
+    space_update_coalesce_ms: int = Field(50, alias="SPACE_UPDATE_COALESCE_MS")
+
+    # Cross-worker event fan-out: "postgres" (LISTEN/NOTIFY) or "memory"
+    event_bus_backend: str = Field("postgres", alias="EVENT_BUS_BACKEND")
     reservation_cancel_hours: int = Field(24, alias="RESERVATION_CANCEL_HOURS")
     default_currency: str = Field("MXN", alias="DEFAULT_CURRENCY")
     default_tax_rate: float = Field(0.16, alias="DEFAULT_TAX_RATE")
 
+    # Scheduled jobs: "leader" (one worker, PostgreSQL advisory lock), "all" or "off"
+    scheduler_mode: str = Field("leader", alias="SCHEDULER_MODE")
+    scheduler_leader_retry_seconds: float = Field(10.0, alias="SCHEDULER_LEADER_RETRY_SECONDS")
+
+    # PDF rendering process pool (per uvicorn worker; 0 = render in a thread)
+    pdf_render_workers: int = Field(2, alias="PDF_RENDER_WORKERS")
+    pdf_render_timeout_seconds: float = Field(30.0, alias="PDF_RENDER_TIMEOUT_SECONDS")
+    # Generated PDFs kept in upload_dir/pdf_cache (least recently used evicted first)
+    pdf_cache_max_mb: int = Field(256, alias="PDF_CACHE_MAX_MB")
+
+    # Notification outbox workers (per uvicorn worker)
+    notification_workers: int = Field(4, alias="NOTIFICATION_WORKERS")
+    notification_max_attempts: int = Field(8, alias="NOTIFICATION_MAX_ATTEMPTS")
+    notification_retry_base_seconds: float = Field(10.0, alias="NOTIFICATION_RETRY_BASE_SECONDS")
+    # Sent and dead-lettered outbox rows are deleted after this many days
+    notification_retention_days: int = Field(14, alias="NOTIFICATION_RETENTION_DAYS")
+
     # Email Settings
     mail_username: str = Field("admin@keikichi.com", alias="MAIL_USERNAME")
     mail_password: str = Field("password", alias="MAIL_PASSWORD")
@@ -70,6 +118,9 @@ class Settings(BaseSettings):
     mail_ssl_tls: bool = Field(False, alias="MAIL_SSL_TLS")
     use_credentials: bool = Field(True, alias="USE_CREDENTIALS")
     validate_certs: bool = Field(True, alias="VALIDATE_CERTS")
+    # Reused SMTP sessions: max concurrent connections, messages before reconnecting
+    smtp_pool_size: int = Field(3, alias="SMTP_POOL_SIZE")
+    smtp_max_messages_per_connection: int = Field(100, alias="SMTP_MAX_MESSAGES_PER_CONNECTION")
 
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
 
@@ -0,0 +1,115 @@
+"""
+Database engine options and connection-pool metrics.
+
+Pool sizing comes from the DB_POOL_* settings. Each uvicorn worker has its
+own pool, so the database must allow
+workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections (plus the read pool
+and the event bus connections).
+
+`InstrumentedPool` records how long each checkout waited for a usable
+connection (queueing, opening a new one, pre-ping) and how many timed out.
+`pool_metrics(engine)` reports those numbers with the pool's live occupancy.
+"""
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.config import settings
+
+
+class PoolMetrics:
+    def __init__(self, window: int = 1024):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.max_wait_ms = 0.0
+        self.waits_ms: Deque[float] = deque(maxlen=window)
+
+    def record_wait(self, wait_ms: float) -> None:
+        self.checkouts += 1
+        self.waits_ms.append(wait_ms)
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def as_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.waits_ms)
+
+        def pct(p: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 2)
+
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_ms_p50": pct(0.50),
+            "wait_ms_p95": pct(0.95),
+            "wait_ms_p99": pct(0.99),
+            "wait_ms_max": round(self.max_wait_ms, 2),
+        }
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that times every connection checkout."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.record_wait((time.perf_counter() - started) * 1000)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool: keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """Keyword arguments for `create_async_engine(url, ...)`."""
+    options: Dict[str, Any] = {"echo": settings.sql_echo, "future": True}
+    if not url.startswith("postgresql"):
+        # SQLite (tests, local tools): keep SQLAlchemy's default pool for the URL
+        return options
+    options.update(
+        poolclass=InstrumentedPool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_recycle=settings.db_pool_recycle_seconds,
+    )
+    if "+asyncpg" in url:
+        # SQLAlchemy's and asyncpg's prepared statement caches (0 behind PgBouncer)
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+            "statement_cache_size": settings.db_statement_cache_size,
+        }
+    return options
+
+
+def pool_metrics(engine: AsyncEngine) -> Dict[str, Any]:
+    pool = engine.sync_engine.pool
+    data: Dict[str, Any] = {"pool": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, InstrumentedPool):
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        data.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=pool.overflow(),
+            saturation=round(pool.checkedout() / capacity, 3) if capacity else None,
+            **pool.metrics.as_dict(),
+        )
+    return data
@@ -0,0 +1,84 @@
+"""
+Keyset pagination helpers.
+
+A cursor is an opaque token holding the sort key of the last row of a page,
+so the next page is a `WHERE (created_at, id) < (...)` range scan on an index
+instead of an OFFSET that reads and discards every earlier row.
+"""
+import base64
+import json
+import logging
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement, Select
+
+from app.core.exceptions import BadRequestException
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(created_at: datetime, id: UUID) -> str:
+    raw = json.dumps([created_at.isoformat(), str(id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, id = json.loads(raw)
+        return datetime.fromisoformat(created_at), UUID(id)
+    except (ValueError, TypeError):
+        raise BadRequestException("Cursor de paginación inválido")
+
+
+async def keyset_page(
+    db: AsyncSession,
+    stmt: Select,
+    created_at: ColumnElement,
+    id: ColumnElement,
+    key: Callable[[Any], Tuple[datetime, UUID]],
+    page_size: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetch one page of `stmt`, newest first by (`created_at`, `id`), starting
+    after `cursor` (or at `offset` when there is none). `key` extracts the
+    sort key from a result row. Returns the rows and the next page's cursor.
+    """
+    stmt = stmt.order_by(created_at.desc(), id.desc())
+    if cursor:
+        stmt = stmt.where(tuple_(created_at, id) < tuple_(*decode_cursor(cursor)))
+    elif offset:
+        stmt = stmt.offset(offset)
+    # One extra row tells whether there is a next page without counting
+    rows = (await db.execute(stmt.limit(page_size + 1))).all()
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor(*key(rows[-1]))
+
+
+async def count_rows(db: AsyncSession, stmt: Select, exact: bool = False) -> Tuple[int, bool]:
+    """
+    Count the rows `stmt` would return. Unless `exact`, PostgreSQL's planner
+    estimate is used instead of scanning them. Returns (count, is_estimate).
+    """
+    if not exact and db.bind.dialect.name == "postgresql":
+        try:
+            compiled = stmt.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+            # Savepoint: a failed EXPLAIN must not abort the caller's transaction
+            async with db.begin_nested():
+                conn = await db.connection()
+                plan = (await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"]), True
+        except Exception as e:
+            logger.warning(f"[Pagination] Count estimate failed, counting exactly: {e}")
+    total = await db.scalar(select(func.count()).select_from(stmt.subquery()))
+    return total or 0, False
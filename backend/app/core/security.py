@@ -1,12 +1,26 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict
+from functools import partial
+from typing import Any, Dict, Optional, Tuple
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from app.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min = max = default: hashes made with any other cost "need update" and are rehashed at login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds,
+)
+
+# bcrypt takes ~250 ms at cost 12 and releases the GIL: hashing runs on a few
+# threads so a burst of logins queues there instead of freezing the event loop
+_password_executor = ThreadPoolExecutor(max_workers=settings.password_hash_workers, thread_name_prefix="bcrypt")
 
 
 def create_access_token(
@@ -43,3 +57,20 @@ def get_password_hash(password: str) -> str:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+async def _run_hashing(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_password_executor, partial(func, *args))
+
+
+async def hash_password(password: str) -> str:
+    """`get_password_hash` on the password thread pool."""
+    return await _run_hashing(pwd_context.hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Check a password on the password thread pool. The second item is a new
+    hash to store when `hashed_password` was made with an outdated cost.
+    """
+    return await _run_hashing(pwd_context.verify_and_update, plain_password, hashed_password)
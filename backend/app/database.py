@@ -2,8 +2,15 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
+from app.core.db_pool import engine_options
 
-engine = create_async_engine(settings.database_url, echo=settings.debug, future=True)
+engine = create_async_engine(settings.database_url, **engine_options(settings.database_url))
+
+# Read-only sessions go to DATABASE_READ_URL (a replica) when it is set
+if settings.database_read_url:
+    read_engine = create_async_engine(settings.database_read_url, **engine_options(settings.database_read_url))
+else:
+    read_engine = engine
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -13,7 +20,20 @@ AsyncSessionLocal = sessionmaker(
     autocommit=False,
 )
 
+ReadSessionLocal = sessionmaker(
+    bind=read_engine,
+    expire_on_commit=False,
+    class_=AsyncSession,
+    autoflush=False,
+    autocommit=False,
+)
+
 
 async def get_db() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_read_db() -> AsyncSession:
+    async with ReadSessionLocal() as session:
+        yield session
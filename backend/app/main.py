@@ -12,13 +12,29 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from app import models
 from app.config import settings
 from app.api.v1.router import api_router
-from app.database import engine, AsyncSessionLocal
+from app.database import engine, read_engine, AsyncSessionLocal
 from app.utils.file_upload import ensure_upload_directories
-from app.tasks.hold_expiration import release_expired_holds
+from app.tasks.hold_expiration import release_expired_holds, hold_expiry_timer
 from app.tasks.payment_deadline import cancel_unpaid_reservations
+from app.tasks.scheduling import create_scheduler_leader, recorded_job
+from app.services.notification_outbox import notification_outbox
+from app.services.notification_service import notification_service
+from app.services.pdf_renderer import pdf_renderer
+from app.services.trip_occupancy import trip_occupancy
+from app.services.revenue_totals import revenue_totals
+from app.services.event_bus import InMemoryEventBus, create_event_bus
+from app.services.space_cache import space_cache
+from app.api.v1.spaces import space_ws_manager
+from app.services.user_cache import user_cache
+from app.services.system_config_service import system_config_service
+from app.services.read_routing import read_routing
 
-# Scheduler instance
+# Scheduler instance (started only on the leader worker, see app.tasks.scheduling)
 scheduler = AsyncIOScheduler()
+scheduler_leader = create_scheduler_leader(scheduler)
+
+# Cross-worker fan-out for real-time space updates
+event_bus = create_event_bus()
 
 
 # OpenAPI Tags for better documentation organization
@@ -97,6 +113,8 @@ async def lifespan(app: FastAPI):
     
     This is the modern FastAPI pattern for handling startup and shutdown.
     """
+    global event_bus
+
     # === STARTUP ===
     # Create database tables
     async with engine.begin() as conn:
@@ -110,34 +128,98 @@ async def lifespan(app: FastAPI):
     # Ensure upload directories exist
     ensure_upload_directories()
     print("[Startup] Upload directories initialized")
+
+    # Render PDFs in worker processes, off the event loop
+    pdf_renderer.start()
+    
+    # Relay space updates between uvicorn workers
+    try:
+        await event_bus.start()
+    except Exception as e:
+        # Keep serving: updates and invalidations stay within this worker
+        print(f"[Startup] WARNING: event bus unavailable ({e}), running local-only")
+        event_bus = InMemoryEventBus()
+    await space_ws_manager.attach_bus(event_bus)
+    await space_cache.attach_bus(event_bus)
+    await user_cache.attach_bus(event_bus)
+    await system_config_service.attach_bus(event_bus)
+    await read_routing.attach_bus(event_bus)
+    print(f"[Startup] Event bus started ({type(event_bus).__name__})")
+    
+    # Deliver queued notifications (email, in-app) in the background
+    await notification_outbox.start(notification_service.deliver)
+    
+    # Release each hold as soon as it expires (deadlines rebuilt from the DB)
+    await hold_expiry_timer.start()
     
     # Start scheduled tasks
+    # Safety net only: the hold expiry timer releases holds within seconds
     scheduler.add_job(
-        release_expired_holds,
+        recorded_job("release_expired_holds", release_expired_holds),
         'interval',
-        minutes=5,
+        minutes=15,
         id='release_expired_holds',
         max_instances=1,
         replace_existing=True
     )
     scheduler.add_job(
-        cancel_unpaid_reservations,
+        recorded_job("cancel_unpaid_reservations", cancel_unpaid_reservations),
         'interval',
         hours=1,
         id='cancel_unpaid_reservations',
         max_instances=1,
         replace_existing=True
     )
-    scheduler.start()
-    print("[Startup] Scheduled tasks initialized")
-    print("  - Hold expiration: every 5 minutes")
+    # Counts are kept in step on every write; this only repairs drift
+    scheduler.add_job(
+        recorded_job("reconcile_trip_space_counts", trip_occupancy.reconcile),
+        'interval',
+        minutes=30,
+        id='reconcile_trip_space_counts',
+        max_instances=1,
+        replace_existing=True
+    )
+    scheduler.add_job(
+        recorded_job("repair_revenue_totals", revenue_totals.repair),
+        'interval',
+        hours=24,
+        id='repair_revenue_totals',
+        max_instances=1,
+        replace_existing=True
+    )
+    scheduler.add_job(
+        recorded_job("prune_notification_outbox", notification_outbox.prune),
+        'interval',
+        hours=24,
+        id='prune_notification_outbox',
+        max_instances=1,
+        replace_existing=True
+    )
+    if scheduler_leader is not None:
+        await scheduler_leader.start()
+    print(f"[Startup] Scheduled tasks initialized (mode: {settings.scheduler_mode})")
+    print("  - Hold expiration: on deadline (sweep every 15 minutes)")
     print("  - Payment deadline: every 1 hour")
+    print("  - Trip space counts reconciliation: every 30 minutes")
+    print("  - Revenue totals repair: every 24 hours")
+    print(f"  - Notification outbox pruning: every 24 hours (keeps {settings.notification_retention_days} days)")
     
     yield  # Application runs here
     
     # === SHUTDOWN ===
-    scheduler.shutdown()
+    if scheduler_leader is not None:
+        await scheduler_leader.stop()
+    await hold_expiry_timer.stop()
+    await notification_outbox.stop()
+    await notification_service.smtp.close()
+    pdf_renderer.shutdown()
     print("[Shutdown] Scheduler stopped")
+    await space_ws_manager.flush()
+    await event_bus.stop()
+    print("[Shutdown] Event bus stopped")
+    if read_engine is not engine:
+        await read_engine.dispose()
+    await engine.dispose()
 
 
 def custom_openapi():
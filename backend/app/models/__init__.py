@@ -15,6 +15,10 @@ from app.models.label_price import LabelPrice
 from app.models.waitlist import Waitlist
 from app.models.trip_quote import TripQuote, QuoteStatus
 from app.models.notification import Notification
+from app.models.job_run import JobRun
+from app.models.notification_outbox import NotificationOutbox, OutboxStatus
+from app.models.trip_space_counts import TripSpaceCounts
+from app.models.revenue_total import RevenueTotal
 
 __all__ = [
     "Base",
@@ -43,5 +47,10 @@ __all__ = [
     "TripQuote",
     "QuoteStatus",
     "Notification",
+    "JobRun",
+    "NotificationOutbox",
+    "OutboxStatus",
+    "TripSpaceCounts",
+    "RevenueTotal",
 ]
 
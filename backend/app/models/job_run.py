@@ -0,0 +1,20 @@
+import uuid
+from sqlalchemy import Boolean, Column, DateTime, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.models.base import Base
+
+
+class JobRun(Base):
+    """One execution of a scheduled job (duration and rows touched)."""
+    __tablename__ = "job_runs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_name = Column(String(100), nullable=False, index=True)
+    worker = Column(String(100), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+    duration_ms = Column(Integer, nullable=False)
+    rows_affected = Column(Integer)
+    succeeded = Column(Boolean, nullable=False, default=True)
+    error = Column(String(500))
@@ -0,0 +1,34 @@
+import enum
+import uuid
+from sqlalchemy import Column, DateTime, Enum, Integer, JSON, String, Text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.models.base import Base
+
+
+class OutboxStatus(str, enum.Enum):
+    pending = "pending"
+    processing = "processing"
+    sent = "sent"
+    dead = "dead"
+
+
+class NotificationOutbox(Base):
+    """
+    A notification waiting to be delivered (email, in-app, WhatsApp).
+    Written in the same transaction as the change that triggers it and
+    drained by the outbox workers.
+    """
+    __tablename__ = "notification_outbox"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    channel = Column(String(20), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(Enum(OutboxStatus, name="outbox_status"), nullable=False, default=OutboxStatus.pending, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    # When pending: earliest retry time. When processing: lease expiry.
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True))
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Date, DateTime, Integer, Numeric, String
+from sqlalchemy.sql import func
+
+from app.models.base import Base
+
+
+class RevenueTotal(Base):
+    """Paid reservation amounts per trip currency and creation month (see services/revenue_totals)."""
+    __tablename__ = "revenue_totals"
+
+    currency = Column(String(3), primary_key=True)
+    month = Column(Date, primary_key=True)
+    amount = Column(Numeric(14, 2), nullable=False, default=0)
+    reservations = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
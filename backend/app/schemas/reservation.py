@@ -267,6 +267,10 @@ class ReservationListResponse(BaseModel):
     page: int
     page_size: int
     pages: int
+    # Cursor for the next page (None on the last one)
+    next_cursor: Optional[str] = None
+    # `total` is the planner's estimate (pass include_total=true for an exact count)
+    total_is_estimate: bool = False
 
 
 # ==================== Payment Proof ====================
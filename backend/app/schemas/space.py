@@ -32,3 +32,7 @@ class TripSpacesResponse(BaseModel):
     total_spaces: int
     spaces: List[SpaceBase]
     summary: SpaceSummary
+    # Pass back as `?since=` (or WebSocket sync) to receive only the spaces changed after this map
+    space_version: Optional[int] = None
+    # True when `spaces` holds only the changes since the requested version
+    delta: bool = False
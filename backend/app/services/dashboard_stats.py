@@ -0,0 +1,215 @@
+"""
+Admin dashboard statistics.
+
+The payload is computed once and shared by every admin for
+DASHBOARD_CACHE_TTL_SECONDS (concurrent refreshes wait for the same
+computation). Its independent queries run concurrently, each on its own
+pooled connection, and revenue comes from the `revenue_totals` buckets kept
+up to date by payment events (see services/revenue_totals), so no request
+sums the whole reservation history. A committed revenue change drops this
+worker's cached payload right away.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.config import settings
+from app.models.reservation import Reservation, PaymentStatus
+from app.models.revenue_total import RevenueTotal
+from app.models.trip import Trip, TripStatus
+from app.models.trip_quote import TripQuote, QuoteStatus
+from app.models.trip_space_counts import TripSpaceCounts
+from app.models.user import User
+from app.services.revenue_totals import month_of
+
+Query = Callable[[AsyncSession], Awaitable[Dict[str, Any]]]
+
+
+def _value(enum_or_str) -> str:
+    return enum_or_str.value if hasattr(enum_or_str, "value") else str(enum_or_str)
+
+
+class DashboardStatsService:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._stats: Optional[Dict[str, Any]] = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self._stats = None
+
+    def _fresh(self) -> Optional[Dict[str, Any]]:
+        if self._stats is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+            return self._stats
+        return None
+
+    async def get(self, db: AsyncSession) -> Dict[str, Any]:
+        stats = self._fresh()
+        if stats is not None:
+            return stats
+        async with self._lock:
+            stats = self._fresh()
+            if stats is None:
+                stats = await self._compute(db)
+                self._stats, self._loaded_at = stats, time.monotonic()
+            return stats
+
+    async def _compute(self, db: AsyncSession) -> Dict[str, Any]:
+        queries: List[Query] = [
+            self._reservation_counts,
+            self._revenue,
+            self._active_trips,
+            self._upcoming_trips,
+            self._recent_reservations,
+            self._quote_counts,
+            self._recent_quotes,
+        ]
+        if db.bind.dialect.name == "postgresql":
+            parts = await asyncio.gather(*(self._on_own_connection(db, query) for query in queries))
+        else:
+            # SQLite serializes on one connection anyway
+            parts = [await query(db) for query in queries]
+
+        stats: Dict[str, Any] = {}
+        for part in parts:
+            stats.update(part)
+        return stats
+
+    async def _on_own_connection(self, db: AsyncSession, query: Query) -> Dict[str, Any]:
+        async with AsyncSession(db.bind, expire_on_commit=False) as session:
+            return await query(session)
+
+    # --- Queries ---------------------------------------------------------
+
+    async def _reservation_counts(self, db: AsyncSession) -> Dict[str, Any]:
+        row = (await db.execute(
+            select(
+                func.count(Reservation.id).filter(Reservation.payment_status == PaymentStatus.pending_review),
+                func.count(Reservation.id),
+            )
+        )).one()
+        return {"pending_payments": row[0] or 0, "total_reservations": row[1] or 0}
+
+    async def _revenue(self, db: AsyncSession) -> Dict[str, Any]:
+        this_month = month_of(datetime.now(timezone.utc))
+        rows = (await db.execute(
+            select(
+                RevenueTotal.currency,
+                func.sum(RevenueTotal.amount),
+                func.sum(RevenueTotal.amount).filter(RevenueTotal.month == this_month),
+            )
+            .group_by(RevenueTotal.currency)
+        )).all()
+        total = {currency: float(amount or 0) for currency, amount, _ in rows if amount}
+        monthly = {currency: float(amount) for currency, _, amount in rows if amount}
+        return {
+            "revenue_by_currency": {"total": total, "monthly": monthly},
+            "total_revenue": sum(total.values()),
+            "monthly_revenue": sum(monthly.values()),
+        }
+
+    async def _active_trips(self, db: AsyncSession) -> Dict[str, Any]:
+        today = datetime.now().date()
+        active = await db.scalar(
+            select(func.count(Trip.id)).where(
+                and_(
+                    Trip.departure_date >= today,
+                    Trip.status != TripStatus.cancelled
+                )
+            )
+        )
+        return {"active_trips": active or 0}
+
+    async def _upcoming_trips(self, db: AsyncSession) -> Dict[str, Any]:
+        today = datetime.now().date()
+        # Trips with their materialized space counts (see trip_occupancy)
+        result = await db.execute(
+            select(Trip, TripSpaceCounts)
+            .outerjoin(TripSpaceCounts, TripSpaceCounts.trip_id == Trip.id)
+            .where(
+                and_(
+                    Trip.departure_date >= today,
+                    Trip.departure_date <= today + timedelta(days=7),
+                    Trip.status == TripStatus.scheduled
+                )
+            )
+            .order_by(Trip.departure_date)
+            .limit(5)
+        )
+        upcoming = []
+        for trip, counts in result.all():
+            reserved = counts.reserved if counts else 0
+            total = trip.total_spaces
+            upcoming.append({
+                "id": str(trip.id),
+                "origin": trip.origin,
+                "destination": trip.destination,
+                "departure_date": str(trip.departure_date),
+                "total_spaces": total,
+                "available": counts.available if counts else 0,
+                "on_hold": counts.on_hold if counts else 0,
+                "reserved": reserved,
+                "occupancy_percent": round((reserved / total * 100) if total > 0 else 0, 1)
+            })
+        return {"upcoming_trips": upcoming}
+
+    async def _recent_reservations(self, db: AsyncSession) -> Dict[str, Any]:
+        result = await db.execute(
+            select(Reservation, Trip, User)
+            .join(Trip, Reservation.trip_id == Trip.id)
+            .join(User, Reservation.client_id == User.id)
+            .order_by(Reservation.created_at.desc())
+            .limit(5)
+        )
+        recent = [
+            {
+                "id": str(res.id),
+                "client_name": client.full_name if client else "Unknown",
+                "amount": float(res.total_amount),
+                "currency": trip.currency,
+                "status": _value(res.status),
+                "payment_status": _value(res.payment_status),
+                "created_at": res.created_at.isoformat() if res.created_at else None
+            }
+            for res, trip, client in result.all()
+        ]
+        return {"recent_reservations": recent}
+
+    async def _quote_counts(self, db: AsyncSession) -> Dict[str, Any]:
+        row = (await db.execute(
+            select(
+                func.count(TripQuote.id).filter(TripQuote.status == QuoteStatus.pending),
+                func.count(TripQuote.id),
+            )
+        )).one()
+        return {"pending_quotes": row[0] or 0, "total_quotes": row[1] or 0}
+
+    async def _recent_quotes(self, db: AsyncSession) -> Dict[str, Any]:
+        result = await db.execute(
+            select(TripQuote)
+            .options(selectinload(TripQuote.client))
+            .order_by(TripQuote.created_at.desc())
+            .limit(5)
+        )
+        quotes = [
+            {
+                "id": str(q.id),
+                "client_name": q.client.full_name if q.client else "N/A",
+                "client_email": q.client.email if q.client else "N/A",
+                "origin": q.origin,
+                "destination": q.destination,
+                "status": _value(q.status),
+                "created_at": q.created_at.isoformat() if q.created_at else None
+            }
+            for q in result.scalars().all()
+        ]
+        return {"recent_quotes": quotes}
+
+
+dashboard_stats = DashboardStatsService(ttl_seconds=settings.dashboard_cache_ttl_seconds)
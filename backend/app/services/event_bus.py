@@ -0,0 +1,200 @@
+"""
+Cross-worker pub/sub for real-time events.
+
+Each uvicorn worker keeps its own WebSocket connections, so an event raised
+on one worker must be relayed to the others. A bus delivers every published
+message to the handlers subscribed on *other* workers; the publishing worker
+is expected to deliver to its own sockets directly.
+
+Backends:
+- `PostgresEventBus`: PostgreSQL LISTEN/NOTIFY on the application database.
+- `InMemoryEventBus`: buses sharing an `InMemoryBroker` talk to each other
+  in-process. Used in tests and when the database is not PostgreSQL.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_PAYLOAD_BYTES = 7900
+
+
+class EventBus:
+    """Base class. Subclasses implement `_send` and, if needed, `start`/`stop`."""
+
+    # Largest envelope the transport accepts (None: no limit)
+    max_payload_bytes: Optional[int] = None
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        self._tasks.clear()
+
+    async def subscribe(self, channel: str, handler: Handler) -> None:
+        self._handlers.setdefault(channel, []).append(handler)
+
+    async def publish(self, channel: str, payload: Dict[str, Any]) -> None:
+        envelope = self._envelope(payload)
+        if self.max_payload_bytes is not None and len(envelope.encode()) > self.max_payload_bytes:
+            if "trip_id" not in payload:
+                logger.warning(f"[EventBus] Dropping {len(envelope)} byte event on {channel}: over the size limit")
+                return
+            # Too big to relay: send just the trip so other workers invalidate and resync it
+            logger.warning(f"[EventBus] Event on {channel} over the size limit, sending trip_id only")
+            envelope = self._envelope({"trip_id": payload["trip_id"]})
+        try:
+            await self._send(channel, envelope)
+        except Exception as e:
+            # Remote workers miss this event; local delivery already happened
+            logger.warning(f"[EventBus] Failed to publish on {channel}: {e}")
+
+    def _envelope(self, payload: Dict[str, Any]) -> str:
+        return json.dumps({"origin": self.origin, "payload": payload})
+
+    async def _send(self, channel: str, envelope: str) -> None:
+        raise NotImplementedError
+
+    def _deliver(self, channel: str, envelope: str) -> None:
+        """Dispatch a received envelope to this worker's handlers, skipping our own events."""
+        try:
+            data = json.loads(envelope)
+        except ValueError:
+            logger.warning(f"[EventBus] Dropping malformed message on {channel}")
+            return
+        if data.get("origin") == self.origin:
+            return
+        for handler in self._handlers.get(channel, []):
+            task = asyncio.create_task(handler(data.get("payload") or {}))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+
+class InMemoryBroker:
+    """Shared hub connecting in-memory buses, one bus per simulated worker."""
+
+    def __init__(self):
+        self.buses: List["InMemoryEventBus"] = []
+
+
+class InMemoryEventBus(EventBus):
+    def __init__(self, broker: Optional[InMemoryBroker] = None):
+        super().__init__()
+        self.broker = broker or InMemoryBroker()
+        self.broker.buses.append(self)
+
+    async def stop(self) -> None:
+        if self in self.broker.buses:
+            self.broker.buses.remove(self)
+        await super().stop()
+
+    async def _send(self, channel: str, envelope: str) -> None:
+        for bus in list(self.broker.buses):
+            bus._deliver(channel, envelope)
+
+
+class PostgresEventBus(EventBus):
+    """
+    LISTEN/NOTIFY bus. Uses one dedicated asyncpg connection for listening
+    and one for publishing, outside the SQLAlchemy pool.
+    """
+
+    max_payload_bytes = MAX_NOTIFY_PAYLOAD_BYTES
+
+    def __init__(self, dsn: str, reconnect_delay: float = 2.0):
+        super().__init__()
+        self.dsn = dsn
+        self.reconnect_delay = reconnect_delay
+        self._listen_conn = None
+        self._publish_conn = None
+        self._publish_lock = asyncio.Lock()
+        self._stopping = False
+
+    async def start(self) -> None:
+        self._stopping = False
+        await self._connect_listener()
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for conn in (self._listen_conn, self._publish_conn):
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        self._listen_conn = None
+        self._publish_conn = None
+        await super().stop()
+
+    async def subscribe(self, channel: str, handler: Handler) -> None:
+        first = channel not in self._handlers
+        await super().subscribe(channel, handler)
+        if first and self._listen_conn is not None:
+            await self._listen_conn.add_listener(channel, self._on_notify)
+
+    async def _connect_listener(self) -> None:
+        import asyncpg
+
+        self._listen_conn = await asyncpg.connect(self.dsn)
+        self._listen_conn.add_termination_listener(self._on_listener_lost)
+        for channel in self._handlers:
+            await self._listen_conn.add_listener(channel, self._on_notify)
+        logger.info(f"[EventBus] Listening on {list(self._handlers) or 'no channels yet'}")
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        self._deliver(channel, payload)
+
+    def _on_listener_lost(self, connection) -> None:
+        if self._stopping:
+            return
+        logger.warning("[EventBus] Listener connection lost, reconnecting")
+        task = asyncio.create_task(self._reconnect())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _reconnect(self) -> None:
+        while not self._stopping:
+            try:
+                await self._connect_listener()
+                return
+            except Exception as e:
+                logger.warning(f"[EventBus] Reconnect failed: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+
+    async def _send(self, channel: str, envelope: str) -> None:
+        import asyncpg
+
+        async with self._publish_lock:
+            if self._publish_conn is None or self._publish_conn.is_closed():
+                self._publish_conn = await asyncpg.connect(self.dsn)
+            await self._publish_conn.execute("SELECT pg_notify($1, $2)", channel, envelope)
+
+
+def asyncpg_dsn(database_url: str) -> str:
+    """Plain postgresql:// DSN for asyncpg from the SQLAlchemy DATABASE_URL."""
+    from sqlalchemy.engine import make_url
+
+    url = make_url(database_url).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+def create_event_bus() -> EventBus:
+    """Build the bus selected by EVENT_BUS_BACKEND ("postgres" or "memory")."""
+    backend = settings.event_bus_backend.lower()
+    if backend == "postgres":
+        if settings.database_url.startswith("postgresql"):
+            return PostgresEventBus(asyncpg_dsn(settings.database_url))
+        logger.warning("[EventBus] DATABASE_URL is not PostgreSQL, using in-memory bus")
+    return InMemoryEventBus()
@@ -0,0 +1,45 @@
+"""
+Hold deadline notifications.
+
+Services report every new hold deadline with `hold_deadlines.publish`.
+Background tasks that act on deadlines (the hold expiry timer in
+app.tasks.hold_expiration) subscribe here, so the service layer never
+imports the tasks layer.
+
+Deadlines are aware UTC datetimes; `as_utc` normalizes values read back
+from the database (SQLite returns them naive).
+"""
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+HoldListener = Callable[[datetime], None]
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Aware UTC datetime; naive values are taken to be UTC already."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class HoldDeadlines:
+    def __init__(self):
+        self._listeners: List[HoldListener] = []
+
+    def subscribe(self, listener: HoldListener) -> None:
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener: HoldListener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def publish(self, expires_at: datetime) -> None:
+        expires_at = as_utc(expires_at)
+        for listener in list(self._listeners):
+            listener(expires_at)
+
+
+hold_deadlines = HoldDeadlines()
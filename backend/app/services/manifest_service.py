@@ -0,0 +1,190 @@
+"""
+Trip manifests: data loading and multi-trip export.
+
+Reservations, clients, cargo items and space numbers for any number of
+trips are fetched with a fixed handful of set-based queries. The export
+renders manifests in the PDF pool (a few ahead, never more than the pool
+can run) and streams them out as a ZIP, or as one merged PDF, without
+writing anything to disk.
+"""
+import asyncio
+import io
+import zipfile
+from collections import defaultdict
+from datetime import date, datetime
+from typing import AsyncIterator, Dict, Iterable, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models.reservation import Reservation
+from app.models.reservation_space import ReservationSpace
+from app.models.space import Space
+from app.models.trip import Trip, TripStatus
+from app.services.pdf_renderer import pdf_renderer
+from app.services.system_config_service import system_config_service
+from app.utils.pdf_generator import render_manifests
+
+MANIFEST_KINDS = ("office", "driver")
+FILENAME_PREFIXES = {"office": "oficina", "driver": "chofer"}
+
+
+class _ZipSink(io.RawIOBase):
+    """Unseekable write target: zipfile writes into it, the response drains it."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ManifestService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def pdf_config(self) -> Dict[str, str]:
+        return (await system_config_service.get(self.db)).as_dict()
+
+    async def trips_departing(self, date_from: date, date_to: date) -> List[Trip]:
+        stmt = (
+            select(Trip)
+            .where(
+                Trip.departure_date >= date_from,
+                Trip.departure_date <= date_to,
+                Trip.status != TripStatus.cancelled,
+            )
+            .order_by(Trip.departure_date, Trip.departure_time, Trip.origin)
+        )
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
+    async def reservations_by_trip(self, trip_ids: Iterable[UUID], detailed: bool) -> Dict[UUID, List[dict]]:
+        """
+        Manifest rows per trip: reservations with their client (and, if
+        `detailed`, cargo items) plus space numbers. Four queries in total,
+        however many trips.
+        """
+        trip_ids = list(trip_ids)
+        stmt = select(Reservation).where(Reservation.trip_id.in_(trip_ids)).options(selectinload(Reservation.client))
+        if detailed:
+            stmt = stmt.options(selectinload(Reservation.items))
+        result = await self.db.execute(stmt)
+        reservations = result.scalars().all()
+
+        space_map: Dict[UUID, List[int]] = defaultdict(list)
+        if reservations:
+            spaces_stmt = (
+                select(ReservationSpace.reservation_id, Space.space_number)
+                .join(Space, ReservationSpace.space_id == Space.id)
+                .where(ReservationSpace.reservation_id.in_([res.id for res in reservations]))
+            )
+            for res_id, space_number in (await self.db.execute(spaces_stmt)).all():
+                space_map[res_id].append(space_number)
+
+        by_trip: Dict[UUID, List[dict]] = {trip_id: [] for trip_id in trip_ids}
+        for res in reservations:
+            res_data = {
+                "client_name": res.client.full_name if res.client else "Desconocido",
+                "client_phone": res.client.phone if res.client else None,
+                "client_email": res.client.email if res.client else None,
+                "space_numbers": space_map.get(res.id, []),
+                "payment_status": res.payment_status.value if res.payment_status else "unpaid",
+                "total_amount": float(res.total_amount) if res.total_amount else 0,
+            }
+            if detailed:
+                res_data["items"] = [
+                    {
+                        "product_name": item.product_name,
+                        "box_count": item.box_count,
+                        "total_weight": float(item.total_weight) if item.total_weight else 0,
+                    }
+                    for item in res.items
+                ]
+                res_data["pickup_address"] = (res.pickup_details or {}).get("address", None)
+                res_data["notes"] = res.discount_reason or ""  # Using discount_reason as notes for now
+            by_trip[res.trip_id].append(res_data)
+        return by_trip
+
+    @staticmethod
+    def manifest_args(trip: Trip, reservations: List[dict], pdf_config: Dict[str, str]) -> dict:
+        """Arguments for generate_trip_manifest / generate_driver_manifest."""
+        return dict(
+            trip_id=str(trip.id),
+            origin=trip.origin,
+            destination=trip.destination,
+            departure_date=trip.departure_date.strftime("%d/%m/%Y"),
+            departure_time=trip.departure_time.strftime("%H:%M") if trip.departure_time else None,
+            truck_plate=trip.truck_plate,
+            trailer_plate=trip.trailer_plate,
+            driver_name=trip.driver_name,
+            driver_phone=trip.driver_phone,
+            total_spaces=trip.total_spaces,
+            reservations=reservations,
+            pdf_config=pdf_config,
+            currency=trip.currency or "USD",
+        )
+
+    @staticmethod
+    def filename(trip: Trip, kind: str) -> str:
+        return (
+            f"manifiesto_{FILENAME_PREFIXES[kind]}_{trip.origin}_{trip.destination}_"
+            f"{trip.departure_date.strftime('%Y%m%d')}_{str(trip.id)[:8]}.pdf"
+        )
+
+    async def export_manifests(self, trips: List[Trip], kinds: Tuple[str, ...]) -> List[Tuple[str, str, dict]]:
+        """(filename, kind, arguments) for every trip and manifest kind, loaded set-based."""
+        pdf_config = await self.pdf_config()
+        rows = await self.reservations_by_trip([trip.id for trip in trips], detailed="driver" in kinds)
+        manifests = []
+        for trip in trips:
+            for kind in kinds:
+                reservations = rows[trip.id]
+                if kind == "office":
+                    reservations = [
+                        {k: v for k, v in r.items() if k not in ("items", "pickup_address", "notes")}
+                        for r in reservations
+                    ]
+                manifests.append((self.filename(trip, kind), kind, self.manifest_args(trip, reservations, pdf_config)))
+        return manifests
+
+
+async def stream_zip(manifests: List[Tuple[str, str, dict]]) -> AsyncIterator[bytes]:
+    """Yield a ZIP of the manifests, each entry as soon as it (and those before it) rendered."""
+    sink = _ZipSink()
+    archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED)
+    look_ahead = max(pdf_renderer.workers, 1)
+    pending: List[asyncio.Task] = []
+    try:
+        for index in range(len(manifests)):
+            # Keep up to `look_ahead` renders in flight, emit in order
+            while len(pending) < look_ahead and index + len(pending) < len(manifests):
+                _, kind, args = manifests[index + len(pending)]
+                pending.append(asyncio.ensure_future(
+                    pdf_renderer.render(render_manifests, manifests=[(kind, args)])
+                ))
+            pdf = await pending.pop(0)
+            entry = zipfile.ZipInfo(manifests[index][0], date_time=datetime.now().timetuple()[:6])
+            archive.writestr(entry, pdf)
+            yield sink.drain()
+        archive.close()
+        yield sink.drain()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def merged_pdf(manifests: List[Tuple[str, str, dict]]) -> bytes:
+    """All manifests in one PDF (a single render in the PDF pool: callers cap how many)."""
+    return await pdf_renderer.render(render_manifests, manifests=[(kind, args) for _, kind, args in manifests])
@@ -0,0 +1,211 @@
+"""
+Transactional outbox for notifications.
+
+`NotificationService.send_email` / `send_in_app` / `send_whatsapp` only
+write a `NotificationOutbox` row. Inside `notification_service.outbox(db)`
+the row joins the caller's transaction, so a notification exists if and only
+if the business change committed; outside it the row is written in its own
+short transaction. A pool of async workers (on every uvicorn worker) claims
+due rows with FOR UPDATE SKIP LOCKED, delivers them, and retries failures
+with exponential backoff until they are dead-lettered. Sent and dead rows
+are pruned after NOTIFICATION_RETENTION_DAYS (`prune`, a scheduled job).
+"""
+import asyncio
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.notification_outbox import NotificationOutbox, OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+# Session whose transaction new outbox rows should join (see `transaction`)
+_outbox_session: ContextVar[Optional[AsyncSession]] = ContextVar("notification_outbox_session", default=None)
+
+MAX_RETRY_DELAY_SECONDS = 3600
+
+
+class NotificationOutboxWorkers:
+    def __init__(
+        self,
+        session_factory: sessionmaker = AsyncSessionLocal,
+        workers: Optional[int] = None,
+        batch_size: int = 20,
+        poll_seconds: float = 1.0,
+        max_attempts: Optional[int] = None,
+        retry_base_seconds: Optional[float] = None,
+        lease_seconds: float = 300.0,
+    ):
+        self.session_factory = session_factory
+        self.workers = workers or settings.notification_workers
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts or settings.notification_max_attempts
+        self.retry_base_seconds = retry_base_seconds or settings.notification_retry_base_seconds
+        # A claimed row is handed out again if its worker has not finished by then
+        self.lease_seconds = lease_seconds
+        self.retention_days = settings.notification_retention_days
+        self.deliver: Optional[Deliver] = None
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    # --- Producing -------------------------------------------------------
+
+    @contextmanager
+    def transaction(self, db: AsyncSession):
+        """Make notifications queued inside this block part of `db`'s transaction."""
+        token = _outbox_session.set(db)
+        try:
+            yield
+        finally:
+            _outbox_session.reset(token)
+
+    async def enqueue(self, channel: str, payload: Dict[str, Any]) -> None:
+        db = _outbox_session.get()
+        if db is not None:
+            db.add(NotificationOutbox(channel=channel, payload=payload))
+            db.sync_session.info["notification_outbox"] = True  # wake workers on commit
+            return
+        async with self.session_factory() as own:
+            own.add(NotificationOutbox(channel=channel, payload=payload))
+            await own.commit()
+        self.wake()
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    # --- Consuming -------------------------------------------------------
+
+    async def start(self, deliver: Deliver) -> None:
+        self.deliver = deliver
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+        print(f"[Outbox] Started {self.workers} notification workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                processed = await self.process_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[Outbox] Worker error: {e}")
+                processed = 0
+            if processed == 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def process_batch(self) -> int:
+        """Claim and deliver up to `batch_size` due messages. Returns how many were claimed."""
+        rows = await self._claim()
+        if rows:
+            # Deliver concurrently (the SMTP pool caps connections), then record all outcomes at once
+            errors = await asyncio.gather(*(self._attempt(row) for row in rows))
+            await self._record(rows, errors)
+        return len(rows)
+
+    async def _claim(self):
+        now = datetime.now(timezone.utc)
+        due = (
+            select(NotificationOutbox.id)
+            .where(
+                NotificationOutbox.status.in_([OutboxStatus.pending, OutboxStatus.processing]),
+                NotificationOutbox.next_attempt_at <= now,
+            )
+            .order_by(NotificationOutbox.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(due))
+            .values(
+                status=OutboxStatus.processing,
+                attempts=NotificationOutbox.attempts + 1,
+                next_attempt_at=now + timedelta(seconds=self.lease_seconds),
+            )
+            .returning(
+                NotificationOutbox.id,
+                NotificationOutbox.channel,
+                NotificationOutbox.payload,
+                NotificationOutbox.attempts,
+            )
+        )
+        async with self.session_factory() as db:
+            result = await db.execute(stmt, execution_options={"synchronize_session": False})
+            rows = result.all()
+            await db.commit()
+        return rows
+
+    async def _attempt(self, row) -> Optional[str]:
+        try:
+            await self.deliver(row.channel, row.payload)
+            return None
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
+
+    async def _record(self, rows, errors: List[Optional[str]]) -> None:
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as db:
+            for row, error in zip(rows, errors):
+                if error is None:
+                    values = dict(status=OutboxStatus.sent, sent_at=now, last_error=None)
+                elif row.attempts >= self.max_attempts:
+                    logger.error(f"[Outbox] Dead-lettering {row.channel} message {row.id} after {row.attempts} attempts: {error}")
+                    values = dict(status=OutboxStatus.dead, last_error=error)
+                else:
+                    delay = min(self.retry_base_seconds * 2 ** (row.attempts - 1), MAX_RETRY_DELAY_SECONDS)
+                    logger.warning(f"[Outbox] {row.channel} message {row.id} failed (attempt {row.attempts}), retrying in {delay:.0f}s: {error}")
+                    values = dict(status=OutboxStatus.pending, next_attempt_at=now + timedelta(seconds=delay), last_error=error)
+                await db.execute(
+                    update(NotificationOutbox).where(NotificationOutbox.id == row.id).values(**values),
+                    execution_options={"synchronize_session": False},
+                )
+            await db.commit()
+
+    # --- Retention -------------------------------------------------------
+
+    async def prune(self) -> int:
+        """Delete sent and dead-lettered rows older than the retention period. Returns how many."""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+        stmt = delete(NotificationOutbox).where(
+            NotificationOutbox.status.in_([OutboxStatus.sent, OutboxStatus.dead]),
+            NotificationOutbox.created_at < cutoff,
+        )
+        async with self.session_factory() as db:
+            result = await db.execute(stmt, execution_options={"synchronize_session": False})
+            await db.commit()
+        if result.rowcount:
+            print(f"[Outbox] Pruned {result.rowcount} delivered or dead messages")
+        return result.rowcount
+
+
+notification_outbox = NotificationOutboxWorkers()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_after_commit(session) -> None:
+    if session.info.pop("notification_outbox", False):
+        notification_outbox.wake()
@@ -1,29 +1,32 @@
 import logging
-from typing import List, Optional, Dict, Any
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import insert
+from fastapi_mail import MessageType
 from pydantic import EmailStr
 from app.config import settings
+from app.services.notification_outbox import notification_outbox
+from app.services.smtp_pool import SMTPPool
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Email Configuration
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.mail_username,
-    MAIL_PASSWORD=settings.mail_password,
-    MAIL_FROM=settings.mail_from,
-    MAIL_PORT=settings.mail_port,
-    MAIL_SERVER=settings.mail_server,
-    MAIL_FROM_NAME=settings.mail_from_name,
-    MAIL_STARTTLS=settings.mail_starttls,
-    MAIL_SSL_TLS=settings.mail_ssl_tls,
-    USE_CREDENTIALS=settings.use_credentials,
-    VALIDATE_CERTS=settings.validate_certs
-)
-
 class NotificationService:
+    """
+    Notifications are queued in the notification outbox and delivered by
+    background workers (see app/services/notification_outbox.py), so
+    SMTP latency never lands on the request. Wrap the notify_* calls in
+    `with notification_service.outbox(db):` before committing to make them
+    part of the same transaction as the business change.
+    """
+
     def __init__(self):
-        self.fastmail = FastMail(conf)
+        # Shared, long-lived SMTP sessions (see app/services/smtp_pool.py)
+        self.smtp = SMTPPool.from_settings()
+
+    def outbox(self, db):
+        """Queue the notifications sent inside this block in `db`'s transaction."""
+        return notification_outbox.transaction(db)
 
     async def send_email(
         self, 
@@ -33,59 +36,91 @@ class NotificationService:
         subtype: MessageType = MessageType.html
     ):
         """
-        Send an email using FastAPI-Mail
+        Queue an email (sent by the outbox workers over the SMTP pool)
         """
-        message = MessageSchema(
-            subject=subject,
-            recipients=recipients,
-            body=body,
-            subtype=subtype
-        )
-        
-        try:
-            await self.fastmail.send_message(message)
-            logger.info(f"Email sent to {recipients}")
-        except Exception as e:
-            logger.error(f"Error sending email: {e}")
-            # Don't raise exception to avoid blocking main flow, just log it
-            # In production, you might want to queue this or handle it more robustly
+        await notification_outbox.enqueue("email", {
+            "subject": subject,
+            "recipients": [str(r) for r in recipients],
+            "body": body,
+            "subtype": subtype.value,
+        })
 
     async def send_whatsapp(self, phone: str, message: str):
         """
-        Send a WhatsApp message (Placeholder)
+        Queue a WhatsApp message (Placeholder)
+        """
+        await notification_outbox.enqueue("whatsapp", {"phone": phone, "message": message})
+
+    async def send_in_app(self, user_id: str, title: str, message: str, link: str = None, type: str = "info"):
         """
+        Queue an in-app notification (saved to DB and sent via WebSocket by the outbox workers)
+        """
+        await notification_outbox.enqueue("in_app", {
+            "user_id": str(user_id),
+            "title": title,
+            "message": message,
+            "link": link,
+            "type": type,
+        })
+
+    async def send_in_app_bulk(self, user_ids: Iterable, title: str, message: str, link: str = None, type: str = "info"):
+        """
+        Queue the same in-app notification for many users (one outbox row,
+        delivered with a single multi-row INSERT and one WebSocket pass)
+        """
+        user_ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+        if not user_ids:
+            return
+        await notification_outbox.enqueue("in_app_bulk", {
+            "user_ids": user_ids,
+            "title": title,
+            "message": message,
+            "link": link,
+            "type": type,
+        })
+
+    async def deliver(self, channel: str, payload: Dict[str, Any]):
+        """
+        Deliver one outbox message. Raises on failure so the outbox retries it.
+        """
+        if channel == "email":
+            await self._deliver_email(**payload)
+        elif channel == "in_app":
+            await self._deliver_in_app(**payload)
+        elif channel == "in_app_bulk":
+            await self._deliver_in_app_bulk(**payload)
+        elif channel == "whatsapp":
+            await self._deliver_whatsapp(**payload)
+        else:
+            raise ValueError(f"Unknown notification channel: {channel}")
+
+    async def _deliver_email(self, subject: str, recipients: List[str], body: str, subtype: str = "html"):
+        message = self.smtp.build_message(subject, recipients, body, subtype)
+        await self.smtp.send(message)
+        logger.info(f"Email sent to {recipients}")
+
+    async def _deliver_whatsapp(self, phone: str, message: str):
         # Integration with Twilio or Meta API would go here
         # For now, we just log it as requested
         logger.info(f"WHATSAPP to {phone}: {message}")
         print(f"WHATSAPP to {phone}: {message}")
 
-    async def send_in_app(self, user_id: str, title: str, message: str, link: str = None, type: str = "info"):
-        """
-        Save notification to DB and send via WebSocket
-        """
+    async def _deliver_in_app(self, user_id: str, title: str, message: str, link: str = None, type: str = "info"):
         from app.database import AsyncSessionLocal
-        from app.models.notification import Notification, NotificationType
+        from app.models.notification import Notification
         from app.api.v1.endpoints.notifications import manager
-        
-        # Save to DB
-        try:
-            print(f"[NOTIFICATION] Attempting to save notification for user {user_id}: {title}")
-            async with AsyncSessionLocal() as db:
-                notification = Notification(
-                    user_id=user_id,
-                    title=title,
-                    message=message,
-                    link=link,
-                    type=type
-                )
-                db.add(notification)
-                await db.commit()
-                print(f"[NOTIFICATION] Successfully saved to DB with ID: {notification.id}")
-                
-        except Exception as e:
-            print(f"[NOTIFICATION] CRITICAL ERROR saving to DB: {e}")
-            import traceback
-            traceback.print_exc()
+
+        # Save to DB (errors propagate so the message is retried)
+        async with AsyncSessionLocal() as db:
+            notification = Notification(
+                user_id=uuid.UUID(str(user_id)),
+                title=title,
+                message=message,
+                link=link,
+                type=type
+            )
+            db.add(notification)
+            await db.commit()
 
         # Send via WebSocket
         try:
@@ -99,7 +134,36 @@ class NotificationService:
                 }
             }
             await manager.send_personal_message(payload, str(user_id))
-            print(f"[NOTIFICATION] WebSocket message sent to {user_id}")
+        except Exception as e:
+            print(f"[NOTIFICATION] WebSocket error: {e}")
+
+    async def _deliver_in_app_bulk(self, user_ids: List[str], title: str, message: str, link: str = None, type: str = "info"):
+        from app.database import AsyncSessionLocal
+        from app.models.notification import Notification
+        from app.api.v1.endpoints.notifications import manager
+
+        # One multi-row INSERT ... RETURNING; all or nothing, so a retry never duplicates
+        rows = [
+            {"user_id": uuid.UUID(user_id), "title": title, "message": message, "link": link, "type": type}
+            for user_id in user_ids
+        ]
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(insert(Notification).returning(Notification.user_id), rows)
+            recipients = [str(user_id) for user_id in result.scalars().all()]
+            await db.commit()
+
+        # Serialize once, push to whoever is connected
+        try:
+            payload = {
+                "type": "NOTIFICATION",
+                "payload": {
+                    "title": title,
+                    "message": message,
+                    "link": link,
+                    "type": type
+                }
+            }
+            await manager.send_to_users(payload, recipients)
         except Exception as e:
             print(f"[NOTIFICATION] WebSocket error: {e}")
 
@@ -232,18 +296,11 @@ class NotificationService:
         # Notify all clients if not admin-only
         if not admins_only:
             async with AsyncSessionLocal() as db:
-                query = select(User).where(User.role == UserRole.client, User.is_active == True)
+                query = select(User.id).where(User.role == UserRole.client, User.is_active == True)
                 result = await db.execute(query)
-                clients = result.scalars().all()
-                
-                for client in clients:
-                    await self.send_in_app(
-                        str(client.id),
-                        title,
-                        message,
-                        f"/trips/{trip.id}",
-                        "info"
-                    )
+                client_ids = result.scalars().all()
+
+            await self.send_in_app_bulk(client_ids, title, message, f"/trips/{trip.id}", "info")
 
     async def notify_trip_updated(self, trip, affected_user_ids: list = None):
         """
@@ -254,14 +311,7 @@ class NotificationService:
         
         # If specific users affected, notify them
         if affected_user_ids:
-            for user_id in affected_user_ids:
-                await self.send_in_app(
-                    str(user_id),
-                    title,
-                    message,
-                    f"/trips/{trip.id}",
-                    "warning"
-                )
+            await self.send_in_app_bulk(affected_user_ids, title, message, f"/trips/{trip.id}", "warning")
         
         # Always notify admins
         await self.notify_admins(title, message, f"/admin/trips", "info")
@@ -279,29 +329,27 @@ class NotificationService:
         
         # Notify affected users (those with reservations)
         if affected_user_ids:
-            for user_id in affected_user_ids:
-                await self.send_in_app(
-                    str(user_id),
-                    title,
-                    f"{message}. Tu reservación será reembolsada.",
-                    "/reservations",
-                    "error"
-                )
+            await self.send_in_app_bulk(
+                affected_user_ids,
+                title,
+                f"{message}. Tu reservación será reembolsada.",
+                "/reservations",
+                "error"
+            )
         else:
             # No reservations - notify all clients about trip removal
             async with AsyncSessionLocal() as db:
-                query = select(User).where(User.role == UserRole.client, User.is_active == True)
+                query = select(User.id).where(User.role == UserRole.client, User.is_active == True)
                 result = await db.execute(query)
-                clients = result.scalars().all()
-                
-                for client in clients:
-                    await self.send_in_app(
-                        str(client.id),
-                        title,
-                        f"{message}. Ya no está disponible para reservar.",
-                        "/trips",
-                        "warning"
-                    )
+                client_ids = result.scalars().all()
+
+            await self.send_in_app_bulk(
+                client_ids,
+                title,
+                f"{message}. Ya no está disponible para reservar.",
+                "/trips",
+                "warning"
+            )
         
         # Notify admins
         await self.notify_admins(title, message, f"/admin/trips", "warning")
@@ -363,38 +411,30 @@ class NotificationService:
         
         async with AsyncSessionLocal() as db:
             # 1. Check Waitlist first
-            waitlist_stmt = select(Waitlist).where(Waitlist.trip_id == trip.id).order_by(Waitlist.created_at)
+            waitlist_stmt = select(Waitlist.user_id).where(Waitlist.trip_id == trip.id).order_by(Waitlist.created_at)
             waitlist_result = await db.execute(waitlist_stmt)
-            waitlist_entries = waitlist_result.scalars().all()
-            
-            if waitlist_entries:
-                # Notify only waitlisted users
-                print(f"Notifying {len(waitlist_entries)} users on waitlist for trip {trip.id}")
-                for entry in waitlist_entries:
-                    await self.send_in_app(
-                        str(entry.user_id),
-                        title,
-                        f"¡Buenas noticias! Se han liberado espacios en el viaje que esperabas: {trip.origin} → {trip.destination}. ¡Reserva ahora!",
-                        f"/trips/{trip.id}",
-                        "success"
-                    )
-                    # We could verify if they have email/phone here too
-            else:
+            waitlisted_ids = waitlist_result.scalars().all()
+
+            if not waitlisted_ids:
                 # 2. No waitlist? Notify everyone (Broadcast)
                 # Only if it makes sense to spam everyone. Maybe limit this?
                 # For now, keeping original logic: Notify all active clients
-                query = select(User).where(User.role == UserRole.client, User.is_active == True)
+                query = select(User.id).where(User.role == UserRole.client, User.is_active == True)
                 result = await db.execute(query)
-                clients = result.scalars().all()
-                
-                for client in clients:
-                    await self.send_in_app(
-                        str(client.id),
-                        title,
-                        message,
-                        f"/trips/{trip.id}",
-                        "success"
-                    )
+                client_ids = result.scalars().all()
+
+        if waitlisted_ids:
+            # Notify only waitlisted users
+            print(f"Notifying {len(waitlisted_ids)} users on waitlist for trip {trip.id}")
+            await self.send_in_app_bulk(
+                waitlisted_ids,
+                title,
+                f"¡Buenas noticias! Se han liberado espacios en el viaje que esperabas: {trip.origin} → {trip.destination}. ¡Reserva ahora!",
+                f"/trips/{trip.id}",
+                "success"
+            )
+        else:
+            await self.send_in_app_bulk(client_ids, title, message, f"/trips/{trip.id}", "success")
 
     async def notify_account_verified(self, user):
         """
@@ -421,23 +461,16 @@ class NotificationService:
         
         async with AsyncSessionLocal() as db:
             # Find all admins and managers
-            query = select(User).where(
+            query = select(User.id).where(
                 or_(
                     User.role == UserRole.superadmin,
                     User.role == UserRole.manager
                 )
             )
             result = await db.execute(query)
-            admins = result.scalars().all()
-            
-            for admin in admins:
-                await self.send_in_app(
-                    user_id=str(admin.id),
-                    title=title,
-                    message=message,
-                    link=link,
-                    type=type
-                )
+            admin_ids = result.scalars().all()
+
+        await self.send_in_app_bulk(admin_ids, title, message, link, type)
 
     async def notify_new_user(self, user):
         """
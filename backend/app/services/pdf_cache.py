@@ -0,0 +1,167 @@
+"""
+Content-addressed cache for generated PDFs.
+
+A document is keyed by a SHA-256 of the generator name and every argument
+passed to it (reservation/trip data, space numbers and the SystemConfig
+values in `pdf_config`), so it is re-rendered only when one of them
+changes. Cached files live in upload_dir/pdf_cache, are served with the key
+as ETag (304 on If-None-Match), and the least recently used ones are
+evicted once the directory grows past PDF_CACHE_MAX_MB.
+
+Cached generators take an `output_path` (each render writes its own
+temporary file) and must not embed the render time: a hit serves the file
+rendered earlier for the same inputs. Responses are built from the bytes
+read at lookup, so a concurrent eviction cannot pull the file from under them;
+files are read and written in a thread, off the event loop.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import quote
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+from app.config import settings
+from app.services.pdf_renderer import pdf_renderer
+
+logger = logging.getLogger(__name__)
+
+# Bump when a PDF template changes so cached documents are re-rendered
+CACHE_VERSION = 1
+
+
+@dataclass
+class CachedPDF:
+    path: Path
+    etag: str
+    content: bytes
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+class PDFCache:
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes if max_bytes is not None else settings.pdf_cache_max_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def directory(self) -> Path:
+        return Path(settings.upload_dir) / "pdf_cache"
+
+    @staticmethod
+    def key(generate: Callable[..., str], **kwargs) -> str:
+        payload = json.dumps(
+            {"v": CACHE_VERSION, "generator": generate.__qualname__, "args": kwargs},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get_or_render(self, generate: Callable[..., str], **kwargs) -> CachedPDF:
+        """Return the cached PDF for these inputs, rendering it (in the PDF pool) on a miss."""
+        digest = self.key(generate, **kwargs)
+        cached = self.directory / f"{digest}.pdf"
+        etag = f'"{digest[:32]}"'
+
+        try:
+            content = await asyncio.to_thread(_read_and_touch, cached)
+            self.hits += 1
+            return CachedPDF(cached, etag, content)
+        except FileNotFoundError:
+            pass  # not rendered yet, or just evicted
+
+        self.misses += 1
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # A path of its own, so concurrent renders never write the same file
+        tmp = self.directory / f"{digest}.{uuid.uuid4().hex}.tmp"
+        try:
+            await pdf_renderer.render(generate, output_path=str(tmp), **kwargs)
+            content = await asyncio.to_thread(_read_and_publish, tmp, cached)
+        finally:
+            tmp.unlink(missing_ok=True)
+        await asyncio.to_thread(self._evict)
+        return CachedPDF(cached, etag, content)
+
+    def _evict(self) -> None:
+        files = []
+        for path in self.directory.glob("*.pdf"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # evicted by another worker
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def response(self, request: Request, cached: CachedPDF, filename: str, headers: Optional[dict] = None) -> Response:
+        """The PDF with its ETag, or 304 Not Modified when the client already has this version."""
+        cache_headers = {"ETag": cached.etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(request, cached.etag):
+            return Response(status_code=304, headers=cache_headers)
+        return Response(
+            content=cached.content,
+            media_type="application/pdf",
+            headers={**cache_headers, "Content-Disposition": _content_disposition(filename), **(headers or {})},
+        )
+
+    def file_response(self, request: Request, path: Path, filename: str, headers: Optional[dict] = None) -> Response:
+        """Same as `response` for a stored file (tickets), with an ETag from its size and mtime."""
+        stat = path.stat()
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        return _conditional_file_response(request, path, etag, filename, headers)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def _read_and_touch(path: Path) -> bytes:
+    content = path.read_bytes()
+    os.utime(path)  # mark as recently used
+    return content
+
+
+def _read_and_publish(tmp: Path, cached: Path) -> bytes:
+    content = tmp.read_bytes()
+    os.replace(tmp, cached)
+    return content
+
+
+def _content_disposition(filename: str) -> str:
+    # Same encoding as FileResponse (RFC 6266 filename* for non-ASCII names)
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def _conditional_file_response(request: Request, path: Path, etag: str, filename: str, headers: Optional[dict]) -> Response:
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=cache_headers)
+    return FileResponse(
+        path=str(path),
+        filename=filename,
+        media_type="application/pdf",
+        headers={**cache_headers, **(headers or {})},
+    )
+
+
+pdf_cache = PDFCache()
@@ -0,0 +1,78 @@
+"""
+PDF rendering off the event loop.
+
+ReportLab and qrcode are synchronous and CPU-bound: a manifest render run
+inside an async handler stalls every request and WebSocket on that worker.
+`pdf_renderer.render(generate_x, **kwargs)` runs one of the
+`app.utils.pdf_generator` functions in a dedicated process pool and returns
+its result (the path relative to upload_dir) unchanged.
+
+PDF_RENDER_WORKERS=0 renders in a thread instead (tests, tiny deployments).
+"""
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Callable, Optional
+
+from app.config import settings
+from app.core.exceptions import ServiceUnavailableException
+
+logger = logging.getLogger(__name__)
+
+
+def _init_worker(upload_dir: str) -> None:
+    """Runs once in each pool process: share the parent's upload_dir, preload ReportLab and assets."""
+    from app.config import settings as worker_settings
+    from app.utils.pdf_generator import assets
+
+    worker_settings.upload_dir = upload_dir
+    assets.load()
+
+
+class PDFRenderer:
+    def __init__(self, workers: Optional[int] = None, timeout: Optional[float] = None):
+        self.workers = settings.pdf_render_workers if workers is None else workers
+        self.timeout = timeout or settings.pdf_render_timeout_seconds
+        self._executor: Optional[Executor] = None
+
+    def start(self) -> None:
+        if self._executor is not None:
+            return
+        if self.workers > 0:
+            # spawn, not fork: never copy a running event loop or open DB connections
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(settings.upload_dir,),
+            )
+            print(f"[PDF] Rendering in {self.workers} worker processes")
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def render(self, generate: Callable[..., str], **kwargs) -> str:
+        """Run `generate(**kwargs)` in the pool; raises 503 if it takes longer than the timeout."""
+        self.start()
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._executor, partial(generate, **kwargs))
+            return await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"[PDF] {generate.__name__} exceeded {self.timeout}s")
+            raise ServiceUnavailableException("El PDF tardó demasiado en generarse, intenta de nuevo")
+        except BrokenProcessPool:
+            # A worker died (OOM, segfault): start a fresh pool for the next render
+            logger.error(f"[PDF] Worker pool broke while rendering {generate.__name__}")
+            self.shutdown()
+            raise ServiceUnavailableException("No se pudo generar el PDF, intenta de nuevo")
+
+
+pdf_renderer = PDFRenderer()
@@ -0,0 +1,122 @@
+"""
+Read-replica routing.
+
+Read-only endpoints take their session from `get_read_db_session`. It goes
+to the replica (DATABASE_READ_URL) unless the caller committed a write in
+the last REPLICA_READ_YOUR_WRITES_SECONDS. Those callers are served by the
+primary, so they always see their own changes even while the replica lags.
+Without DATABASE_READ_URL every session is on the primary. Results cached
+for everyone are refilled from the primary: dashboard stats always, seat-map
+snapshots unless the trip is known to be unchanged for longer than the window.
+
+The caller is the user authenticated for the current request
+(`get_current_user` / `get_token_principal` record it). A session that
+inserts, updates or deletes anything marks that user when it commits. The
+mark is relayed to the other uvicorn workers over the event bus, because the
+next request may land on another worker.
+"""
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import settings
+from app.database import AsyncSessionLocal, ReadSessionLocal, engine, read_engine
+from app.services.event_bus import EventBus
+
+logger = logging.getLogger(__name__)
+
+READ_ROUTING_CHANNEL = "read_routing_writes"
+
+_WROTE_KEY = "read_routing_wrote"
+
+# Prune expired marks once this many users are tracked
+_PRUNE_AT = 10_000
+
+# User authenticated for the request being handled
+_request_user: ContextVar[Optional[str]] = ContextVar("read_routing_request_user", default=None)
+
+
+class ReadRouting:
+    def __init__(self, window_seconds: float, replica: bool):
+        self.window_seconds = window_seconds
+        self.replica = replica
+        # user id -> monotonic time of their last committed write
+        self._writes: Dict[str, float] = {}
+        # Relays write marks to the other uvicorn workers (set by attach_bus)
+        self.bus: Optional[EventBus] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def attach_bus(self, bus: EventBus) -> None:
+        self.bus = bus
+        await bus.subscribe(READ_ROUTING_CHANNEL, self._on_remote_event)
+
+    def set_request_user(self, user_id: Any) -> None:
+        _request_user.set(str(user_id))
+
+    def note_write(self, user_id: Any, publish: bool = True) -> None:
+        now = time.monotonic()
+        if len(self._writes) >= _PRUNE_AT:
+            self._writes = {u: t for u, t in self._writes.items() if now - t < self.window_seconds}
+        self._writes[str(user_id)] = now
+        if publish and self.bus is not None:
+            try:
+                task = asyncio.get_running_loop().create_task(
+                    self.bus.publish(READ_ROUTING_CHANNEL, {"user_id": str(user_id)})
+                )
+            except RuntimeError:
+                return
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def wrote_recently(self, user_id: Any) -> bool:
+        if user_id is None:
+            return False
+        written_at = self._writes.get(str(user_id))
+        return written_at is not None and time.monotonic() - written_at < self.window_seconds
+
+    def session_factory(self, user_id: Any = None) -> sessionmaker:
+        """Where this user's reads go: the replica, or the primary right after they wrote."""
+        if self.replica and not self.wrote_recently(user_id):
+            return ReadSessionLocal
+        return AsyncSessionLocal
+
+    async def _on_remote_event(self, payload: Dict[str, Any]) -> None:
+        user_id = payload.get("user_id")
+        if user_id:
+            self.note_write(user_id, publish=False)
+
+
+read_routing = ReadRouting(
+    window_seconds=settings.replica_read_your_writes_seconds,
+    replica=read_engine is not engine,
+)
+
+
+@event.listens_for(Session, "before_flush")
+def _mark_flushed_writes(session, flush_context, instances) -> None:
+    if session.new or session.dirty or session.deleted:
+        session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_statement_writes(orm_execute_state) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _note_committed_write(session) -> None:
+    if session.info.pop(_WROTE_KEY, False):
+        user_id = _request_user.get()
+        if user_id is not None:
+            read_routing.note_write(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session) -> None:
+    session.info.pop(_WROTE_KEY, None)
@@ -1,12 +1,12 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from typing import List, Optional
 from uuid import UUID
 
 from fastapi import HTTPException, UploadFile
-from sqlalchemy import select, and_, or_, func
+from sqlalchemy import select, update, and_, or_, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
 
 from app.config import settings
 from app.core.exceptions import NotFoundException, ConflictException, ForbiddenException
@@ -21,6 +21,10 @@ from app.schemas.reservation import (
     PriceCalculation,
     ReservationListItem,
 )
+from app.services.pdf_renderer import pdf_renderer
+from app.services.hold_deadlines import as_utc, hold_deadlines
+from app.services.space_cache import space_cache
+from app.services.trip_occupancy import trip_occupancy
 from app.utils.file_upload import save_upload_file, delete_file
 from app.utils.pdf_generator import generate_reservation_ticket
 
@@ -73,7 +77,7 @@ class ReservationService:
             # If space is on hold, check if it belongs to the current user
             if s.status == SpaceStatus.on_hold and user_id and s.held_by == user_id:
                 # Check if hold is expired
-                if s.hold_expires_at and s.hold_expires_at > datetime.now():
+                if s.hold_expires_at and as_utc(s.hold_expires_at) > datetime.now(timezone.utc):
                     continue
             
             unavailable.append(s)
@@ -95,86 +99,171 @@ class ReservationService:
         """
         Create a temporary hold on spaces
        
-        Spaces are locked for SPACE_HOLD_MINUTES minutes
+        Spaces are locked for SPACE_HOLD_MINUTES minutes.
+
+        All requested spaces are claimed with a single conditional
+        UPDATE ... RETURNING, which also enforces max_spaces_per_client.
+        If fewer rows come back than were requested, the transaction is
+        rolled back and the conflicting spaces are reported.
+        """
+        now = datetime.now(timezone.utc)
+        hold_expires_at = now + timedelta(minutes=settings.space_hold_minutes)
+
+        stmt = self._build_hold_statement(user_id, trip_id, space_ids, now, hold_expires_at)
+        result = await self.db.execute(stmt, execution_options={"synchronize_session": False})
+        claimed = result.all()
+
+        if len(claimed) != len(space_ids):
+            await self.db.rollback()
+            await self._raise_hold_conflict(user_id, trip_id, space_ids, now)
+
+        trip_occupancy.mark(self.db, [trip_id])
+        await self.db.commit()
+        space_cache.invalidate(trip_id)
+        hold_deadlines.publish(hold_expires_at)
+
+        return {
+            "message": "Espacios reservados temporalmente",
+            "trip_id": str(trip_id),
+            "space_ids": [str(sid) for sid in space_ids],
+            "spaces_count": len(space_ids),
+            "hold_expires_at": hold_expires_at,
+            "expires_in_minutes": settings.space_hold_minutes
+        }
+
+    def _owned_spaces_count(self, user_id: UUID, trip_id: UUID, exclude_ids: List[UUID]):
+        """
+        Scalar subquery counting the spaces a client already has on a trip
+        (live holds or spaces of non-cancelled reservations), excluding the
+        spaces being requested so re-holds are not counted twice.
+        """
+        owned = aliased(Space)
+        return (
+            select(func.count(owned.id))
+            .where(
+                owned.trip_id == trip_id,
+                owned.id.not_in(exclude_ids),
+                or_(
+                    and_(owned.status == SpaceStatus.on_hold, owned.held_by == user_id),
+                    and_(
+                        owned.status == SpaceStatus.reserved,
+                        owned.id.in_(
+                            select(ReservationSpace.space_id).join(
+                                Reservation,
+                                ReservationSpace.reservation_id == Reservation.id
+                            ).where(
+                                Reservation.client_id == user_id,
+                                Reservation.status != ReservationStatus.cancelled
+                            )
+                        )
+                    )
+                )
+            )
+            .scalar_subquery()
+        )
+
+    def _build_hold_statement(
+        self,
+        user_id: UUID,
+        trip_id: UUID,
+        space_ids: List[UUID],
+        now: datetime,
+        hold_expires_at: datetime
+    ):
+        """
+        Build the conditional UPDATE that claims every requested space that is
+        available or already held by the same user with a live hold, provided
+        the trip's per-client limit allows the whole request.
+        """
+        trip_limit = (
+            select(Trip.max_spaces_per_client)
+            .where(Trip.id == trip_id)
+            .scalar_subquery()
+        )
+        owned_count = self._owned_spaces_count(user_id, trip_id, space_ids)
+
+        return (
+            update(Space)
+            .where(
+                Space.trip_id == trip_id,
+                Space.id.in_(space_ids),
+                or_(
+                    Space.status == SpaceStatus.available,
+                    and_(
+                        Space.status == SpaceStatus.on_hold,
+                        Space.held_by == user_id,
+                        Space.hold_expires_at > now
+                    )
+                ),
+                # NULL or 0 means no limit
+                or_(
+                    func.coalesce(trip_limit, 0) == 0,
+                    owned_count + len(space_ids) <= trip_limit
+                )
+            )
+            .values(
+                status=SpaceStatus.on_hold,
+                held_by=user_id,
+                hold_expires_at=hold_expires_at
+            )
+            .returning(Space.id, Space.space_number)
+        )
+
+    async def _raise_hold_conflict(
+        self,
+        user_id: UUID,
+        trip_id: UUID,
+        space_ids: List[UUID],
+        now: datetime
+    ) -> None:
+        """
+        Work out why a hold claimed fewer spaces than requested and raise
+        the matching error. Only runs on the failure path.
         """
-        # Load trip to check max_spaces_per_client
         trip_stmt = select(Trip).where(Trip.id == trip_id)
         trip_result = await self.db.execute(trip_stmt)
         trip = trip_result.scalars().first()
-        
+
         if not trip:
             raise NotFoundException("Viaje no encontrado")
-        
-        # Check max_spaces_per_client limit
+
         if trip.max_spaces_per_client:
-            # Count spaces this client already has (on_hold or reserved)
-            existing_spaces_stmt = select(func.count(Space.id)).where(
-                and_(
-                    Space.trip_id == trip_id,
-                    or_(
-                        and_(Space.status == SpaceStatus.on_hold, Space.held_by == user_id),
-                        and_(
-                            Space.status == SpaceStatus.reserved,
-                            Space.id.in_(
-                                select(ReservationSpace.space_id).join(
-                                    Reservation,
-                                    ReservationSpace.reservation_id == Reservation.id
-                                ).where(
-                                    Reservation.client_id == user_id,
-                                    Reservation.status != ReservationStatus.cancelled
-                                )
-                            )
-                        )
-                    )
-                )
-            )
-            existing_count = await self.db.scalar(existing_spaces_stmt) or 0
-            
-            # Check if new selection would exceed limit
-            new_total = existing_count + len(space_ids)
-            if new_total > trip.max_spaces_per_client:
+            existing_count = await self.db.scalar(
+                select(self._owned_spaces_count(user_id, trip_id, space_ids))
+            ) or 0
+            if existing_count + len(space_ids) > trip.max_spaces_per_client:
                 raise ConflictException(
                     f"Límite de espacios por cliente: máximo {trip.max_spaces_per_client}. "
                     f"Ya tienes {existing_count} espacio(s) en este viaje."
                 )
-        
-        # Lock spaces for update to prevent race conditions
-        stmt = select(Space).where(Space.id.in_(space_ids)).with_for_update()
-        result = await self.db.execute(stmt)
-        spaces = list(result.scalars().all())
+
+        spaces_stmt = select(Space).where(
+            Space.trip_id == trip_id,
+            Space.id.in_(space_ids)
+        )
+        spaces_result = await self.db.execute(spaces_stmt)
+        spaces = list(spaces_result.scalars().all())
 
         if len(spaces) != len(space_ids):
             raise NotFoundException("Algunos espacios no existen")
 
-        hold_expires_at = datetime.now() + timedelta(minutes=settings.space_hold_minutes)
-
-        for space in spaces:
-            # Re-check availability under lock
-            if space.status != SpaceStatus.available:
-                # Allow re-holding if it's already held by SAME user and not expired
-                is_rehold = (
-                    space.status == SpaceStatus.on_hold and 
-                    space.held_by == user_id and 
-                    space.hold_expires_at and 
-                    space.hold_expires_at > datetime.now()
-                )
-                if not is_rehold:
-                    raise ConflictException(f"El espacio {space.space_number} ya no está disponible")
-
-            space.status = SpaceStatus.on_hold
-            space.held_by = user_id
-            space.hold_expires_at = hold_expires_at
-
-        await self.db.commit()
-
-        return {
-            "message": "Espacios reservados temporalmente",
-            "trip_id": str(trip_id),
-            "space_ids": [str(sid) for sid in space_ids],
-            "spaces_count": len(space_ids),
-            "hold_expires_at": hold_expires_at,
-            "expires_in_minutes": settings.space_hold_minutes
-        }
+        unavailable = sorted(
+            s.space_number for s in spaces
+            if s.status != SpaceStatus.available and not (
+                s.status == SpaceStatus.on_hold and
+                s.held_by == user_id and
+                s.hold_expires_at and
+                as_utc(s.hold_expires_at) > now
+            )
+        )
+        if not unavailable:
+            # Spaces changed state between the UPDATE and this check
+            raise ConflictException("Los espacios cambiaron de estado, intenta de nuevo")
+        if len(unavailable) == 1:
+            raise ConflictException(f"El espacio {unavailable[0]} ya no está disponible")
+        raise ConflictException(
+            f"Los siguientes espacios ya no están disponibles: {', '.join(map(str, unavailable))}"
+        )
 
     async def release_hold(self, space_ids: List[UUID]) -> None:
         """Release hold on spaces"""
@@ -189,6 +278,7 @@ class ReservationService:
                 space.hold_expires_at = None
 
         await self.db.commit()
+        space_cache.invalidate_many(space.trip_id for space in spaces)
 
     async def calculate_pricing(
         self,
@@ -268,17 +358,9 @@ class ReservationService:
         # Calculate base pricing
         pricing = await self.calculate_pricing(trip, len(space_ids_uuid), data.discount_amount)
         
-        # Load system config for extra costs
-        from app.models.system_config import SystemConfig
-        config_stmt = select(SystemConfig)
-        config_result = await self.db.execute(config_stmt)
-        config_result = await self.db.execute(config_stmt)
-        configs = {}
-        for c in config_result.scalars().all():
-            try:
-                configs[c.key] = Decimal(c.value)
-            except:
-                continue # Skip non-numeric config values for pricing
+        # Prices of extra services (cached, see services/system_config_service)
+        from app.services.system_config_service import system_config_service
+        config = await system_config_service.get(self.db)
         
         # Calculate extra costs
         extra_costs = Decimal(0)
@@ -287,18 +369,16 @@ class ReservationService:
         for item in data.items:
             if item.labeling_required and item.label_quantity:
                 # Determine price based on dimensions (simplified logic)
-                price_key = f"price_label_{item.label_dimensions}" if item.label_dimensions else "price_label_1x1"
-                price_per_label = configs.get(price_key, configs.get("price_label_1x1", Decimal(1)))
-                extra_costs += price_per_label * item.label_quantity
+                extra_costs += config.label_price(item.label_dimensions) * item.label_quantity
         
         # 2. Bond Service
         if data.is_international and not data.use_own_bond:
-             extra_costs += configs.get("price_bond_service", Decimal(500))
+             extra_costs += config.bond_service_price
              
         # 3. Pickup Service
         if data.request_pickup:
             # Use trip-specific cost if set, otherwise fallback to system config
-            pickup_cost = trip.pickup_cost if trip.pickup_cost is not None else configs.get("price_pickup_service", Decimal(300))
+            pickup_cost = trip.pickup_cost if trip.pickup_cost is not None else config.pickup_service_price
             extra_costs += pickup_cost
             
         # Update totals
@@ -383,23 +463,19 @@ class ReservationService:
              # For now, assuming frontend handles profile update separately or we just use what's in User
              pass
 
+        # Queue notifications in the same transaction as the reservation
+        from app.services.notification_service import notification_service
+        client_stmt = select(User).where(User.id == user_id)
+        client_result = await self.db.execute(client_stmt)
+        client = client_result.scalars().first()
+        if client:
+            with notification_service.outbox(self.db):
+                await notification_service.notify_reservation_created(reservation, client)
+
         await self.db.commit()
+        space_cache.invalidate(trip_id_uuid)
         await self.db.refresh(reservation)
 
-        # Send Notification
-        try:
-            from app.services.notification_service import notification_service
-            from app.models.user import User
-            client_stmt = select(User).where(User.id == user_id)
-            client_result = await self.db.execute(client_stmt)
-            client = client_result.scalars().first()
-            if client:
-                await notification_service.notify_reservation_created(reservation, client)
-        except Exception as e:
-            # Log error but don't fail the request
-            print(f"Failed to send notification: {e}")
-
-        return reservation
         return reservation
 
     async def create_admin_reservation(
@@ -495,6 +571,7 @@ class ReservationService:
             space.hold_expires_at = None
             
         await self.db.commit()
+        space_cache.invalidate(trip.id)
         await self.db.refresh(reservation)
 
         return reservation
@@ -676,24 +753,22 @@ class ReservationService:
             for space in spaces:
                 space.status = SpaceStatus.available
 
-        await self.db.commit()
+        # Queue notification, committed together with the cancellation
+        from app.services.notification_service import notification_service
+        # User passed to this method might be admin, so we need to fetch the client
+        if reservation.client_id != user.id:
+            client_stmt = select(User).where(User.id == reservation.client_id)
+            client_result = await self.db.execute(client_stmt)
+            client = client_result.scalars().first()
+        else:
+            client = user
 
-        # Send Notification
-        try:
-            from app.services.notification_service import notification_service
-            # User passed to this method might be admin, so we need to fetch the client
-            if reservation.client_id != user.id:
-                 from app.models.user import User
-                 client_stmt = select(User).where(User.id == reservation.client_id)
-                 client_result = await self.db.execute(client_stmt)
-                 client = client_result.scalars().first()
-            else:
-                 client = user
-            
-            if client:
+        if client:
+            with notification_service.outbox(self.db):
                 await notification_service.notify_reservation_cancelled(reservation, client)
-        except Exception as e:
-            print(f"Failed to send notification: {e}")
+
+        await self.db.commit()
+        space_cache.invalidate(reservation.trip_id)
 
     async def delete_reservation(
         self,
@@ -755,8 +830,10 @@ class ReservationService:
             except Exception:
                 pass  # Log but don't fail deletion
 
+        trip_id = reservation.trip_id
         await self.db.delete(reservation)
         await self.db.commit()
+        space_cache.invalidate(trip_id)
 
     async def upload_payment_proof(
         self,
@@ -822,24 +899,25 @@ class ReservationService:
 
             # Generate ticket PDF
             await self._generate_ticket(reservation)
-
-            # Send Notification
-            try:
-                from app.services.notification_service import notification_service
-                from app.models.user import User
-                client_stmt = select(User).where(User.id == reservation.client_id)
-                client_result = await self.db.execute(client_stmt)
-                client = client_result.scalars().first()
-                if client:
-                    await notification_service.notify_payment_approved(reservation, client)
-            except Exception as e:
-                print(f"Failed to send notification: {e}")
         else:
             # Reject payment
             reservation.payment_status = PaymentStatus.unpaid
             # Could store notes in a separate table or message system
 
+        # Queue the notice, committed together with the approval or rejection
+        from app.services.notification_service import notification_service
+        client_stmt = select(User).where(User.id == reservation.client_id)
+        client_result = await self.db.execute(client_stmt)
+        client = client_result.scalars().first()
+        if client:
+            with notification_service.outbox(self.db):
+                if approved:
+                    await notification_service.notify_payment_approved(reservation, client)
+                else:
+                    await notification_service.notify_payment_rejected(reservation, client, notes)
+
         await self.db.commit()
+        space_cache.invalidate(reservation.trip_id)
         await self.db.refresh(reservation)
 
         return reservation
@@ -879,11 +957,9 @@ class ReservationService:
             PaymentMethod.mercadopago: "MercadoPago"
         }
 
-        # Load system config for PDF Customization
-        from app.models.system_config import SystemConfig
-        config_stmt = select(SystemConfig)
-        config_result = await self.db.execute(config_stmt)
-        pdf_config = {c.key: c.value for c in config_result.scalars().all()}
+        # System config for PDF Customization
+        from app.services.system_config_service import system_config_service
+        pdf_config = (await system_config_service.get(self.db)).as_dict()
 
         # Load items
         from app.models.load_item import LoadItem
@@ -893,7 +969,8 @@ class ReservationService:
         
         cargo_description = ", ".join([f"{item.box_count}x {item.product_name}" for item in items])
 
-        ticket_path = generate_reservation_ticket(
+        ticket_path = await pdf_renderer.render(
+            generate_reservation_ticket,
             reservation_id=str(reservation.id),
             client_name=client.full_name if client else "Cliente",
             client_email=client.email if client else "",
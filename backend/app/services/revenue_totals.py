@@ -0,0 +1,212 @@
+"""
+Materialized revenue per currency and month.
+
+`revenue_totals` holds the sum of paid reservations for each (trip currency,
+month the reservation was created), so the admin dashboard reads a handful of
+rows instead of summing every paid reservation on each load.
+
+Whenever the ORM flushes a reservation that becomes paid, stops being paid,
+or is re-priced or deleted while paid (payment confirmation or rejection,
+auto-paid admin reservations, deletion), its bucket is marked and re-summed
+right before the transaction commits. A trip whose currency changes marks
+the buckets of its paid reservations under both currencies.
+Only that month's reservations are read, after locking the bucket row, so
+concurrent confirmations cannot lose each other's amounts. `rebuild`
+(scheduled) repairs drift left by writes that bypass the session.
+"""
+from datetime import date, datetime, timezone
+from typing import Iterable, Set, Tuple
+
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import AsyncSessionLocal
+from app.models.reservation import Reservation, PaymentStatus
+from app.models.revenue_total import RevenueTotal
+from app.models.trip import Trip
+
+_PENDING_IDS = "revenue_reservation_ids"
+_PENDING_KEYS = "revenue_trip_months"
+_PENDING_CURRENCIES = "revenue_trip_currencies"
+_CHANGED = "revenue_changed"
+
+# Changes to these Reservation attributes can move money between buckets
+_TRACKED = ("payment_status", "total_amount", "trip_id", "created_at")
+
+
+def month_of(value: datetime) -> date:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def _month_range(month: date) -> Tuple[datetime, datetime]:
+    start = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+    end = datetime(month.year + month.month // 12, month.month % 12 + 1, 1, tzinfo=timezone.utc)
+    return start, end
+
+
+class RevenueTotals:
+    def refresh(self, session: Session, keys: Iterable[Tuple[str, date]]) -> None:
+        """Re-sum the given (currency, month) buckets (synchronous: runs inside commit)."""
+        keys = sorted(set(keys))
+        if not keys:
+            return
+
+        insert = pg_insert if session.get_bind().dialect.name == "postgresql" else sqlite_insert
+        session.execute(
+            insert(RevenueTotal)
+            .values([{"currency": c, "month": m, "amount": 0, "reservations": 0} for c, m in keys])
+            .on_conflict_do_nothing(index_elements=["currency", "month"])
+        )
+        for currency, month in keys:
+            # Serializes refreshes of the same bucket across transactions
+            session.execute(
+                select(RevenueTotal.currency)
+                .where(RevenueTotal.currency == currency, RevenueTotal.month == month)
+                .with_for_update()
+            )
+            start, end = _month_range(month)
+            amount, count = session.execute(
+                select(func.coalesce(func.sum(Reservation.total_amount), 0), func.count(Reservation.id))
+                .join(Trip, Reservation.trip_id == Trip.id)
+                .where(
+                    Trip.currency == currency,
+                    Reservation.payment_status == PaymentStatus.paid,
+                    Reservation.created_at >= start,
+                    Reservation.created_at < end,
+                )
+            ).one()
+            session.execute(
+                update(RevenueTotal)
+                .where(RevenueTotal.currency == currency, RevenueTotal.month == month)
+                .values(amount=amount, reservations=count),
+                execution_options={"synchronize_session": False},
+            )
+
+    def buckets(self, session: Session, reservation_ids: Set, trip_months: Set) -> Set[Tuple[str, date]]:
+        """Map marked reservations and (trip_id, created_at) pairs to buckets."""
+        keys = set()
+        if reservation_ids:
+            rows = session.execute(
+                select(Trip.currency, Reservation.created_at)
+                .join(Trip, Reservation.trip_id == Trip.id)
+                .where(Reservation.id.in_(reservation_ids))
+            ).all()
+            keys.update((currency, month_of(created_at)) for currency, created_at in rows if created_at)
+        if trip_months:
+            currencies = dict(session.execute(
+                select(Trip.id, Trip.currency).where(Trip.id.in_({t for t, _ in trip_months}))
+            ).all())
+            keys.update((currencies[t], m) for t, m in trip_months if t in currencies)
+        return keys
+
+    def currency_buckets(self, session: Session, currencies: dict) -> Set[Tuple[str, date]]:
+        """Buckets of the paid reservations of trips that changed currency ({trip_id: currencies})."""
+        rows = session.execute(
+            select(Reservation.trip_id, Reservation.created_at).where(
+                Reservation.trip_id.in_(currencies),
+                Reservation.payment_status == PaymentStatus.paid,
+            )
+        ).all()
+        return {
+            (currency, month_of(created_at))
+            for trip_id, created_at in rows if created_at
+            for currency in currencies[trip_id]
+        }
+
+    async def rebuild(self, db) -> int:
+        """Recompute every bucket from scratch (backfill / repair). Returns how many."""
+        rows = await db.execute(
+            select(Trip.currency, Reservation.created_at)
+            .join(Trip, Reservation.trip_id == Trip.id)
+            .where(Reservation.payment_status == PaymentStatus.paid)
+        )
+        keys = {(currency, month_of(created_at)) for currency, created_at in rows.all() if created_at}
+        # Existing buckets too, so one left without paid reservations drops to zero
+        existing = await db.execute(select(RevenueTotal.currency, RevenueTotal.month))
+        keys.update((currency, month) for currency, month in existing.all())
+        await db.run_sync(self.refresh, keys)
+        return len(keys)
+
+    async def repair(self, session_factory: sessionmaker = AsyncSessionLocal) -> int:
+        """Scheduled drift repair: rebuild every bucket in one transaction."""
+        async with session_factory() as db:
+            count = await self.rebuild(db)
+            await db.commit()
+        return count
+
+
+revenue_totals = RevenueTotals()
+
+
+def _affects_revenue(obj: Reservation) -> bool:
+    attrs = inspect(obj).attrs
+    status = attrs.payment_status.history
+    if status.has_changes() and PaymentStatus.paid in (*status.added, *status.deleted):
+        return True
+    return obj.payment_status == PaymentStatus.paid and any(
+        getattr(attrs, name).history.has_changes() for name in _TRACKED
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _mark_changed_reservations(session, flush_context, instances) -> None:
+    new = [o for o in session.new if isinstance(o, Reservation) and o.payment_status == PaymentStatus.paid]
+    trip_months = set()
+    for obj in session.deleted:
+        if isinstance(obj, Reservation) and obj.payment_status == PaymentStatus.paid and obj.created_at:
+            trip_months.add((obj.trip_id, month_of(obj.created_at)))
+    for obj in session.dirty:
+        if not isinstance(obj, Reservation) or not _affects_revenue(obj):
+            continue
+        new.append(obj)
+        # The bucket it was in before a trip or date change
+        attrs = inspect(obj).attrs
+        old_trip = attrs.trip_id.history.deleted or [obj.trip_id]
+        old_created = attrs.created_at.history.deleted or [obj.created_at]
+        if old_trip[0] is not None and old_created[0] is not None:
+            trip_months.add((old_trip[0], month_of(old_created[0])))
+    if new:
+        # Ids of new rows are only assigned by the flush: resolved before commit
+        session.info.setdefault(_PENDING_IDS, []).extend(new)
+    if trip_months:
+        session.info.setdefault(_PENDING_KEYS, set()).update(trip_months)
+    for obj in session.dirty:
+        if isinstance(obj, Trip):
+            currency = inspect(obj).attrs.currency.history
+            if currency.has_changes():
+                # Old and new currency: its paid revenue moves between buckets
+                currencies = session.info.setdefault(_PENDING_CURRENCIES, {}).setdefault(obj.id, set())
+                currencies.update(c for c in currency.sum() if c is not None)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_before_commit(session) -> None:
+    session.flush()
+    changed = session.info.pop(_PENDING_IDS, None)
+    trip_months = session.info.pop(_PENDING_KEYS, None)
+    currencies = session.info.pop(_PENDING_CURRENCIES, None)
+    if not changed and not trip_months and not currencies:
+        return
+    ids = {obj.id for obj in changed or ()}
+    keys = revenue_totals.buckets(session, ids, trip_months or set())
+    if currencies:
+        keys |= revenue_totals.currency_buckets(session, currencies)
+    revenue_totals.refresh(session, keys)
+    session.info[_CHANGED] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_dashboard(session) -> None:
+    if session.info.pop(_CHANGED, False):
+        from app.services.dashboard_stats import dashboard_stats
+        dashboard_stats.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session) -> None:
+    for key in (_PENDING_IDS, _PENDING_KEYS, _PENDING_CURRENCIES, _CHANGED):
+        session.info.pop(key, None)
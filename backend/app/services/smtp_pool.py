@@ -0,0 +1,173 @@
+"""
+Pooled SMTP sender.
+
+Keeps up to `size` authenticated SMTP sessions open and reuses them, so a
+burst of notifications pays the connect / STARTTLS / AUTH handshake once per
+connection instead of once per email. Each connection is recycled after
+`max_messages_per_connection` messages or `idle_timeout` seconds unused.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import Deque, List, Optional
+
+import aiosmtplib
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledConnection:
+    def __init__(self, client: aiosmtplib.SMTP):
+        self.client = client
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPPool:
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = False,
+        start_tls: Optional[bool] = None,
+        validate_certs: bool = True,
+        size: int = 3,
+        max_messages_per_connection: int = 100,
+        idle_timeout: float = 60.0,
+        timeout: float = 30.0,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.start_tls = start_tls
+        self.validate_certs = validate_certs
+        self.size = size
+        self.max_messages_per_connection = max_messages_per_connection
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(size)
+        # LIFO: reuse the warmest connection, let the others go idle
+        self._idle: Deque[_PooledConnection] = deque()
+        self.sent = 0
+        self.failed = 0
+        self.connections_opened = 0
+        self._send_times: Deque[float] = deque(maxlen=256)
+
+    @classmethod
+    def from_settings(cls) -> "SMTPPool":
+        return cls(
+            hostname=settings.mail_server,
+            port=settings.mail_port,
+            username=settings.mail_username if settings.use_credentials else None,
+            password=settings.mail_password if settings.use_credentials else None,
+            use_tls=settings.mail_ssl_tls,
+            start_tls=settings.mail_starttls,
+            validate_certs=settings.validate_certs,
+            size=settings.smtp_pool_size,
+            max_messages_per_connection=settings.smtp_max_messages_per_connection,
+        )
+
+    def build_message(self, subject: str, recipients: List[str], body: str, subtype: str = "html") -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = formataddr((settings.mail_from_name, settings.mail_from))
+        message["To"] = ", ".join(recipients)
+        message["Subject"] = subject
+        message.set_content(body, subtype=subtype)
+        return message
+
+    async def send(self, message: EmailMessage) -> None:
+        """Send one message over a pooled connection (at most `size` at a time)."""
+        async with self._slots:
+            connection = await self._acquire()
+            try:
+                await connection.client.send_message(message)
+            except aiosmtplib.SMTPServerDisconnected:
+                # The server dropped an idle session: retry once on a fresh one
+                await self._discard(connection)
+                connection = await self._connect()
+                try:
+                    await connection.client.send_message(message)
+                except Exception:
+                    self.failed += 1
+                    await self._discard(connection)
+                    raise
+            except aiosmtplib.SMTPResponseException:
+                # Rejected message (bad recipient, ...): the session is still usable
+                self.failed += 1
+                await self._release(connection)
+                raise
+            except Exception:
+                self.failed += 1
+                await self._discard(connection)
+                raise
+            connection.sent += 1
+            self.sent += 1
+            self._send_times.append(time.monotonic())
+            await self._release(connection)
+
+    async def _acquire(self) -> _PooledConnection:
+        now = time.monotonic()
+        while self._idle:
+            connection = self._idle.pop()
+            if connection.client.is_connected and now - connection.last_used < self.idle_timeout:
+                return connection
+            await self._discard(connection)
+        return await self._connect()
+
+    async def _connect(self) -> _PooledConnection:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+            validate_certs=self.validate_certs,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        if self.username:
+            await client.login(self.username, self.password)
+        self.connections_opened += 1
+        return _PooledConnection(client)
+
+    async def _release(self, connection: _PooledConnection) -> None:
+        if connection.sent >= self.max_messages_per_connection:
+            await self._discard(connection)
+            return
+        connection.last_used = time.monotonic()
+        self._idle.append(connection)
+
+    async def _discard(self, connection: _PooledConnection) -> None:
+        try:
+            if connection.client.is_connected:
+                await connection.client.quit()
+        except Exception:
+            connection.client.close()
+
+    async def close(self) -> None:
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+    def emails_per_second(self) -> Optional[float]:
+        """Throughput over the most recent sends."""
+        if len(self._send_times) < 2:
+            return None
+        elapsed = self._send_times[-1] - self._send_times[0]
+        return round((len(self._send_times) - 1) / elapsed, 1) if elapsed > 0 else None
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "connections_opened": self.connections_opened,
+            "idle_connections": len(self._idle),
+            "emails_per_second": self.emails_per_second(),
+        }
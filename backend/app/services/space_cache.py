@@ -0,0 +1,281 @@
+"""
+In-process per-trip space snapshot cache.
+
+Seat-map reads (`GET /spaces/trip/{id}`, `GET /trips/{id}`,
+`GET /trips/{id}/spaces`) are served from a versioned snapshot held as
+parallel tuples (one entry per space) instead of re-reading every Space row.
+Every code path that changes a space or a reservation's spaces calls
+`space_cache.invalidate(trip_id)` after committing; the next read rebuilds
+the snapshot with a new version.
+
+Each worker has its own cache: invalidations are relayed to the other
+workers over the event bus (see `attach_bus`), and a short TTL bounds how
+stale a snapshot can get if a relay is lost.
+
+Snapshots also carry a per-trip `space_version`: the latest `updated_at`
+(in microseconds) of the trip, its spaces and its reservations, held back
+a few seconds (see DELTA_OVERLAP_US). It comes
+from the database, so it is monotonic and the same on every worker, and
+`GET /spaces/trip/{id}?since=<space_version>` returns only the spaces that
+changed after it. WebSocket batches and snapshots carry the same version.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.reservation import Reservation, ReservationStatus
+from app.models.reservation_space import ReservationSpace
+from app.models.space import Space, SpaceStatus
+from app.models.trip import Trip
+from app.schemas.space import SpaceBase, SpaceSummary
+from app.services.event_bus import EventBus
+
+SPACE_CACHE_CHANNEL = "space_cache_invalidations"
+
+
+# `updated_at` is the writing transaction's start time (now() in PostgreSQL),
+# so a change can commit with a timestamp older than a version already handed
+# out. A snapshot's `space_version` therefore never goes past its load time
+# minus this window (which also absorbs app/DB clock skew): changes from the
+# last few seconds are re-sent on the next poll instead of being missed.
+DELTA_OVERLAP_US = 5_000_000
+
+
+def _micros(value: Optional[datetime]) -> int:
+    if value is None:
+        return 0
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1_000_000)
+
+
+def _key(trip_id) -> str:
+    try:
+        return str(UUID(str(trip_id)))
+    except (ValueError, TypeError):
+        return str(trip_id)
+
+
+@dataclass(frozen=True)
+class TripSpaceSnapshot:
+    """Immutable seat map of one trip, one tuple slot per space (ordered by number)."""
+    trip_id: str
+    version: int
+    total_spaces: int
+    ids: Tuple[str, ...]
+    numbers: Tuple[int, ...]
+    statuses: Tuple[SpaceStatus, ...]
+    prices: Tuple[Optional[float], ...]
+    hold_expires_at: Tuple[Optional[datetime], ...]
+    held_by: Tuple[Optional[str], ...]
+    # client_id -> ids of spaces in that client's pending reservations
+    pending_by_client: Dict[str, FrozenSet[str]] = field(default_factory=dict)
+    # Last change of each space (its row or a reservation holding it), in microseconds
+    changed_at: Tuple[int, ...] = ()
+    # Last change of the trip itself (spaces may have been added or removed)
+    trip_changed_at: int = 0
+    space_version: int = 0
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def is_delta(self, since: Optional[int]) -> bool:
+        """
+        Whether `since` can be answered with only the changed spaces. Otherwise
+        (no version, one this snapshot has not reached yet, or the trip itself
+        changed after it) a full snapshot is needed.
+        """
+        return since is not None and self.trip_changed_at <= since <= self.space_version
+
+    def summary(self) -> SpaceSummary:
+        summary = SpaceSummary()
+        for status in self.statuses:
+            setattr(summary, status.value, getattr(summary, status.value) + 1)
+        return summary
+
+    def spaces(self, user_id: Optional[str] = None, since: Optional[int] = None) -> List[SpaceBase]:
+        """
+        Build the seat map. When `user_id` is given the per-user `is_mine`
+        and `has_pending_reservation` overlay is applied; with `since` only
+        the spaces changed after that `space_version` are included.
+        """
+        pending = self.pending_by_client.get(user_id, frozenset()) if user_id else frozenset()
+        out = []
+        for i, space_id in enumerate(self.ids):
+            if since is not None and self.changed_at[i] <= since:
+                continue
+            is_mine = None
+            has_pending = None
+            if user_id:
+                has_pending = space_id in pending
+                is_mine = has_pending or (
+                    self.statuses[i] == SpaceStatus.on_hold and self.held_by[i] == user_id
+                )
+            out.append(SpaceBase.model_construct(
+                id=UUID(space_id),
+                space_number=self.numbers[i],
+                status=self.statuses[i],
+                price=self.prices[i],
+                hold_expires_at=self.hold_expires_at[i],
+                held_by=UUID(self.held_by[i]) if self.held_by[i] else None,
+                is_mine=is_mine,
+                has_pending_reservation=has_pending,
+            ))
+        return out
+
+
+class SpaceStateCache:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._snapshots: Dict[str, TripSpaceSnapshot] = {}
+        self._versions: Dict[str, int] = {}
+        # trip -> monotonic time of its last invalidation (local or relayed)
+        self._invalidated_at: Dict[str, float] = {}
+        # Since when this worker hears every invalidation (relayed ones once attached to the bus)
+        self._listening_since = time.monotonic()
+        # Relays invalidations to the other uvicorn workers (set by attach_bus)
+        self.bus: Optional[EventBus] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def attach_bus(self, bus: EventBus) -> None:
+        self.bus = bus
+        await bus.subscribe(SPACE_CACHE_CHANNEL, self._on_remote_event)
+        self._listening_since = time.monotonic()
+
+    def version(self, trip_id) -> int:
+        return self._versions.get(_key(trip_id), 0)
+
+    def settled_for(self, trip_id, seconds: float) -> bool:
+        """
+        Whether the trip is known not to have changed in the last `seconds`
+        (so a replica lagging less than that has it): its last invalidation,
+        local or relayed, is older, or there was none since this worker
+        started hearing them at least `seconds` ago.
+        """
+        now = time.monotonic()
+        changed_at = self._invalidated_at.get(_key(trip_id))
+        if changed_at is not None:
+            return now - changed_at >= seconds
+        return now - self._listening_since >= seconds
+
+    def peek(self, trip_id) -> Optional[TripSpaceSnapshot]:
+        """Return the cached snapshot if it is current, without touching the DB."""
+        key = _key(trip_id)
+        snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            return None
+        if snapshot.version != self._versions.get(key, 0):
+            return None
+        if time.monotonic() - snapshot.loaded_at > self.ttl_seconds:
+            return None
+        return snapshot
+
+    async def get(self, db: AsyncSession, trip: Trip) -> TripSpaceSnapshot:
+        """Return the trip's snapshot, loading it from the database on a miss."""
+        snapshot = self.peek(trip.id)
+        if snapshot is not None:
+            return snapshot
+
+        key = _key(trip.id)
+        version = self._versions.get(key, 0)
+
+        spaces_result = await db.execute(
+            select(
+                Space.id, Space.space_number, Space.status,
+                Space.price, Space.hold_expires_at, Space.held_by, Space.updated_at,
+                select(Trip.updated_at).where(Trip.id == trip.id).scalar_subquery().label("trip_updated_at"),
+            )
+            .where(Space.trip_id == trip.id)
+            .order_by(Space.space_number)
+        )
+        rows = spaces_result.all()
+
+        # Every reservation on the trip: pending ones feed the per-user overlay,
+        # and a reservation change (e.g. confirmation) changes that overlay
+        reservations_result = await db.execute(
+            select(Reservation.client_id, Reservation.status, Reservation.updated_at, ReservationSpace.space_id)
+            .join(ReservationSpace, ReservationSpace.reservation_id == Reservation.id)
+            .where(Reservation.trip_id == trip.id)
+        )
+        pending: Dict[str, set] = {}
+        changed: Dict[str, int] = {str(r.id): _micros(r.updated_at) for r in rows}
+        for client_id, status, updated_at, space_id in reservations_result.all():
+            space_id = str(space_id)
+            if status == ReservationStatus.pending:
+                pending.setdefault(str(client_id), set()).add(space_id)
+            if space_id in changed:
+                changed[space_id] = max(changed[space_id], _micros(updated_at))
+
+        changed_at = tuple(changed[str(r.id)] for r in rows)
+        trip_changed_at = _micros(rows[0].trip_updated_at) if rows else 0
+        snapshot = TripSpaceSnapshot(
+            trip_id=key,
+            version=version,
+            total_spaces=trip.total_spaces,
+            ids=tuple(str(r.id) for r in rows),
+            numbers=tuple(r.space_number for r in rows),
+            statuses=tuple(r.status for r in rows),
+            prices=tuple(float(r.price) if r.price is not None else None for r in rows),
+            hold_expires_at=tuple(r.hold_expires_at for r in rows),
+            held_by=tuple(str(r.held_by) if r.held_by else None for r in rows),
+            pending_by_client={cid: frozenset(ids) for cid, ids in pending.items()},
+            changed_at=changed_at,
+            trip_changed_at=trip_changed_at,
+            space_version=min(
+                max((trip_changed_at, *changed_at)),
+                _micros(datetime.now(timezone.utc)) - DELTA_OVERLAP_US,
+            ),
+        )
+
+        # Only publish if no write invalidated the trip while we were reading
+        if self._versions.get(key, 0) == version:
+            self._snapshots[key] = snapshot
+        return snapshot
+
+    def invalidate(self, trip_id, publish: bool = True) -> int:
+        """Drop the trip's snapshot (on every worker) and bump its version. Returns the new version."""
+        key = _key(trip_id)
+        version = self._drop(key)
+        if publish:
+            self._publish([key])
+        return version
+
+    def invalidate_many(self, trip_ids: Iterable, publish: bool = True) -> None:
+        keys = sorted({_key(t) for t in trip_ids})
+        for key in keys:
+            self._drop(key)
+        if publish and keys:
+            self._publish(keys)
+
+    def _drop(self, key: str) -> int:
+        version = self._versions.get(key, 0) + 1
+        self._versions[key] = version
+        self._invalidated_at[key] = time.monotonic()
+        self._snapshots.pop(key, None)
+        return version
+
+    def _publish(self, keys: List[str]) -> None:
+        if self.bus is None:
+            return
+        try:
+            task = asyncio.get_running_loop().create_task(
+                self.bus.publish(SPACE_CACHE_CHANNEL, {"trip_ids": keys})
+            )
+        except RuntimeError:
+            return  # no event loop (sync scripts): other workers rely on the TTL
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _on_remote_event(self, payload: Dict[str, Any]) -> None:
+        self.invalidate_many(payload.get("trip_ids") or (), publish=False)
+
+    def clear(self) -> None:
+        self._snapshots.clear()
+
+
+space_cache = SpaceStateCache(ttl_seconds=settings.space_cache_ttl_seconds)
@@ -0,0 +1,151 @@
+"""
+Process-wide cache of the `system_config` table.
+
+Reservation pricing and every PDF read configuration values, so the whole
+table is loaded once per worker and served from memory. Numeric values
+(prices) are parsed to `Decimal` once, at load time.
+
+Any committed ORM change to a `SystemConfig` row (the `system_config`
+endpoints) drops the cache on this worker and, through the event bus, on
+the other workers. Entries also expire after MAX_AGE_SECONDS, which bounds
+staleness for writes that bypass the session (manual SQL, other services).
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, Optional, Set
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.system_config import SystemConfig
+from app.services.event_bus import EventBus
+
+logger = logging.getLogger(__name__)
+
+CONFIG_EVENTS_CHANNEL = "system_config_updates"
+
+MAX_AGE_SECONDS = 300.0
+
+_CHANGED_KEY = "system_config_changed"
+
+
+def _to_decimal(value: str) -> Optional[Decimal]:
+    try:
+        number = Decimal(value.strip())
+    except (InvalidOperation, AttributeError):
+        return None
+    return number if number.is_finite() else None
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """All configuration values as of one load."""
+    values: Dict[str, str] = field(default_factory=dict)
+    decimals: Dict[str, Decimal] = field(default_factory=dict)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[SystemConfig]) -> "ConfigSnapshot":
+        values = {row.key: row.value for row in rows}
+        decimals = {key: number for key, value in values.items() if (number := _to_decimal(value)) is not None}
+        return cls(values=values, decimals=decimals)
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return self.values.get(key, default)
+
+    def decimal(self, key: str, default: Decimal) -> Decimal:
+        """Numeric value of `key`, or `default` when it is missing or not a number."""
+        return self.decimals.get(key, default)
+
+    def subset(self, keys: Iterable[str]) -> Dict[str, str]:
+        return {key: self.values[key] for key in keys if key in self.values}
+
+    def as_dict(self) -> Dict[str, str]:
+        return dict(self.values)
+
+    # --- Pricing ---------------------------------------------------------
+
+    def label_price(self, dimensions: Optional[str]) -> Decimal:
+        default = self.decimal("price_label_1x1", Decimal(1))
+        return self.decimal(f"price_label_{dimensions}", default) if dimensions else default
+
+    @property
+    def bond_service_price(self) -> Decimal:
+        return self.decimal("price_bond_service", Decimal(500))
+
+    @property
+    def pickup_service_price(self) -> Decimal:
+        return self.decimal("price_pickup_service", Decimal(300))
+
+
+class SystemConfigService:
+    def __init__(self, max_age_seconds: float = MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self._snapshot: Optional[ConfigSnapshot] = None
+        self._loaded_at = 0.0
+        # Bumped by invalidate: a load that started before it is not kept
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        # Relays invalidations to the other uvicorn workers (set by attach_bus)
+        self.bus: Optional[EventBus] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def attach_bus(self, bus: EventBus) -> None:
+        self.bus = bus
+        await bus.subscribe(CONFIG_EVENTS_CHANNEL, self._on_remote_event)
+
+    def _fresh(self) -> Optional[ConfigSnapshot]:
+        if self._snapshot is not None and time.monotonic() - self._loaded_at < self.max_age_seconds:
+            return self._snapshot
+        return None
+
+    async def get(self, db: AsyncSession) -> ConfigSnapshot:
+        snapshot = self._fresh()
+        if snapshot is not None:
+            return snapshot
+        async with self._lock:
+            snapshot = self._fresh()
+            if snapshot is None:
+                generation = self._generation
+                result = await db.execute(select(SystemConfig))
+                snapshot = ConfigSnapshot.from_rows(result.scalars().all())
+                if generation == self._generation:
+                    self._snapshot, self._loaded_at = snapshot, time.monotonic()
+            return snapshot
+
+    def invalidate(self, publish: bool = True) -> None:
+        self._snapshot = None
+        self._generation += 1
+        if publish and self.bus is not None:
+            try:
+                task = asyncio.get_running_loop().create_task(self.bus.publish(CONFIG_EVENTS_CHANNEL, {}))
+            except RuntimeError:
+                return  # no event loop (sync scripts): other workers rely on MAX_AGE_SECONDS
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _on_remote_event(self, payload: Dict[str, Any]) -> None:
+        self.invalidate(publish=False)
+
+
+system_config_service = SystemConfigService()
+
+
+@event.listens_for(Session, "before_flush")
+def _mark_changed_config(session, flush_context, instances) -> None:
+    if any(isinstance(obj, SystemConfig) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_CHANGED_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session) -> None:
+    if session.info.pop(_CHANGED_KEY, False):
+        system_config_service.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session) -> None:
+    session.info.pop(_CHANGED_KEY, None)
@@ -0,0 +1,161 @@
+"""
+Materialized per-trip space counts.
+
+`trip_space_counts` holds one row per trip with its number of available,
+on_hold, reserved, blocked and internal spaces, so trip listings read one row
+per trip instead of grouping every Space on each request.
+
+Counts are refreshed inside the transaction that changes the spaces, right
+before it commits:
+- ORM changes to a Space (new, deleted, status changed) mark its trip
+  automatically (`before_flush`)
+- bulk `update(Space)` statements must call `trip_occupancy.mark(db, trip_ids)`
+
+The refresh locks the trips' count rows and recounts their spaces in a new
+statement, so under READ COMMITTED it sees every concurrent change that
+committed first. `reconcile` (scheduled) repairs any drift left by writes
+that bypass the session, e.g. manual SQL.
+"""
+import logging
+from typing import Iterable, List, Set, Union
+from uuid import UUID
+
+from sqlalchemy import and_, event, func, inspect, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import AsyncSessionLocal
+from app.models.space import Space, SpaceStatus
+from app.models.trip import Trip
+from app.models.trip_space_counts import TripSpaceCounts
+
+logger = logging.getLogger(__name__)
+
+COUNTED_STATUSES = [
+    SpaceStatus.available,
+    SpaceStatus.on_hold,
+    SpaceStatus.reserved,
+    SpaceStatus.blocked,
+    SpaceStatus.internal,
+]
+
+_PENDING_KEY = "trip_occupancy_trip_ids"
+
+
+def _space_count(status: SpaceStatus):
+    return (
+        select(func.count(Space.id))
+        .where(Space.trip_id == TripSpaceCounts.trip_id, Space.status == status)
+        .scalar_subquery()
+    )
+
+
+class TripOccupancy:
+    def mark(self, db: Union[AsyncSession, Session], trip_ids: Iterable) -> None:
+        """Refresh these trips' counts when `db` commits."""
+        session = db.sync_session if isinstance(db, AsyncSession) else db
+        session.info.setdefault(_PENDING_KEY, set()).update(trip_ids)
+
+    def refresh(self, session: Session, trip_ids: Iterable) -> None:
+        """Recount the spaces of `trip_ids` (synchronous: runs inside commit)."""
+        ids = sorted({UUID(str(t)) for t in trip_ids}, key=str)
+        if not ids:
+            return
+
+        # Make sure every existing trip has a row to lock
+        insert = pg_insert if session.get_bind().dialect.name == "postgresql" else sqlite_insert
+        session.execute(
+            insert(TripSpaceCounts)
+            .from_select(["trip_id"], select(Trip.id).where(Trip.id.in_(ids)))
+            .on_conflict_do_nothing(index_elements=["trip_id"])
+        )
+        # Serializes refreshes of the same trip across transactions
+        session.execute(
+            select(TripSpaceCounts.trip_id)
+            .where(TripSpaceCounts.trip_id.in_(ids))
+            .order_by(TripSpaceCounts.trip_id)
+            .with_for_update()
+        )
+        session.execute(
+            update(TripSpaceCounts)
+            .where(TripSpaceCounts.trip_id.in_(ids))
+            .values({status.value: _space_count(status) for status in COUNTED_STATUSES}),
+            execution_options={"synchronize_session": False},
+        )
+
+    async def drifted(self, db: AsyncSession) -> List:
+        """Trips whose stored counts differ from their spaces."""
+        actual = (
+            select(
+                Space.trip_id,
+                *(func.count(Space.id).filter(Space.status == s).label(s.value) for s in COUNTED_STATUSES),
+            )
+            .group_by(Space.trip_id)
+            .subquery()
+        )
+        stored = TripSpaceCounts
+        mismatch = or_(*(
+            func.coalesce(getattr(stored, s.value), 0) != func.coalesce(getattr(actual.c, s.value), 0)
+            for s in COUNTED_STATUSES
+        ))
+        # Trips with spaces but no (or wrong) counts, and counts left for trips without spaces
+        with_spaces = (
+            select(actual.c.trip_id)
+            .outerjoin(stored, stored.trip_id == actual.c.trip_id)
+            .where(or_(stored.trip_id.is_(None), mismatch))
+        )
+        without_spaces = (
+            select(stored.trip_id)
+            .outerjoin(actual, actual.c.trip_id == stored.trip_id)
+            .where(and_(actual.c.trip_id.is_(None), mismatch))
+        )
+        result = await db.execute(with_spaces.union(without_spaces))
+        return list(result.scalars().all())
+
+    async def reconcile(self, session_factory: sessionmaker = AsyncSessionLocal) -> int:
+        """Repair drifted counts. Returns the number of trips fixed."""
+        async with session_factory() as db:
+            trip_ids = await self.drifted(db)
+            if not trip_ids:
+                return 0
+            await db.run_sync(self.refresh, trip_ids)
+            await db.commit()
+        logger.warning(f"[Occupancy] Repaired space counts of {len(trip_ids)} trips")
+        return len(trip_ids)
+
+
+trip_occupancy = TripOccupancy()
+
+
+@event.listens_for(Session, "before_flush")
+def _mark_changed_spaces(session, flush_context, instances) -> None:
+    trip_ids: Set = set()
+    for obj in session.new:
+        if isinstance(obj, Space) and obj.trip_id is not None:
+            trip_ids.add(obj.trip_id)
+    for obj in session.deleted:
+        if isinstance(obj, Space):
+            trip_ids.add(obj.trip_id)
+    for obj in session.dirty:
+        if isinstance(obj, Space):
+            attrs = inspect(obj).attrs
+            if attrs.status.history.has_changes() or attrs.trip_id.history.has_changes():
+                trip_ids.update(t for t in attrs.trip_id.history.sum() if t is not None)
+    if trip_ids:
+        trip_occupancy.mark(session, trip_ids)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_before_commit(session) -> None:
+    # Flush pending ORM changes now (commit would anyway) so their spaces are marked
+    session.flush()
+    trip_ids = session.info.pop(_PENDING_KEY, None)
+    if trip_ids:
+        trip_occupancy.refresh(session, trip_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session) -> None:
+    session.info.pop(_PENDING_KEY, None)
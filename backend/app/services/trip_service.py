@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from datetime import timedelta
 from typing import List, Optional
 from sqlalchemy import select, func
@@ -8,7 +8,10 @@ from app.config import settings
 from app.core.exceptions import NotFoundException
 from app.models.space import Space, SpaceStatus
 from app.models.trip import Trip, TripStatus
+from app.models.trip_space_counts import TripSpaceCounts
 from app.schemas.trip import TripCreate, TripUpdate
+from app.services.hold_deadlines import hold_deadlines
+from app.services.space_cache import space_cache
 
 
 class TripService:
@@ -32,17 +35,16 @@ class TripService:
         Optimized query to fetch trips with space counts in a single round-trip.
         Returns a list of dicts suitable for creating TripOut models with extra fields.
         """
-        # Build the aggregation query
+        # Counts are materialized per trip (see trip_occupancy): one row per trip
         stmt = (
             select(
                 Trip,
-                func.count(Space.id).filter(Space.status == SpaceStatus.available).label("available_spaces"),
-                func.count(Space.id).filter(Space.status == SpaceStatus.reserved).label("reserved_spaces"),
-                func.count(Space.id).filter(Space.status == SpaceStatus.blocked).label("blocked_spaces"),
-                func.count(Space.id).filter(Space.status == SpaceStatus.on_hold).label("on_hold_spaces"),
+                func.coalesce(TripSpaceCounts.available, 0).label("available_spaces"),
+                func.coalesce(TripSpaceCounts.reserved, 0).label("reserved_spaces"),
+                func.coalesce(TripSpaceCounts.blocked, 0).label("blocked_spaces"),
+                func.coalesce(TripSpaceCounts.on_hold, 0).label("on_hold_spaces"),
             )
-            .outerjoin(Space, Space.trip_id == Trip.id)
-            .group_by(Trip.id)
+            .outerjoin(TripSpaceCounts, TripSpaceCounts.trip_id == Trip.id)
             .order_by(Trip.departure_date)
         )
 
@@ -135,6 +137,7 @@ class TripService:
             await self._update_space_prices(trip, trip.price_per_space)
             
         await self.db.commit()
+        space_cache.invalidate(trip.id)
         await self.db.refresh(trip)
         return trip
 
@@ -145,8 +148,10 @@ class TripService:
         return trip
 
     async def delete_trip(self, trip: Trip) -> None:
+        trip_id = trip.id
         await self.db.delete(trip)
         await self.db.commit()
+        space_cache.invalidate(trip_id)
 
     async def list_spaces(self, trip: Trip) -> List[Space]:
         result = await self.db.execute(select(Space).where(Space.trip_id == trip.id).order_by(Space.space_number))
@@ -155,8 +160,11 @@ class TripService:
     async def hold_space(self, space: Space, user_id: str) -> Space:
         space.status = SpaceStatus.on_hold
         space.held_by = user_id
-        space.hold_expires_at = datetime.utcnow() + timedelta(minutes=settings.space_hold_minutes)
+        # Same clock as create_hold and the expiry check (aware UTC)
+        space.hold_expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.space_hold_minutes)
         await self.db.commit()
+        space_cache.invalidate(space.trip_id)
+        hold_deadlines.publish(space.hold_expires_at)
         await self.db.refresh(space)
         return space
 
@@ -0,0 +1,133 @@
+"""
+Short-lived cache of authenticated users.
+
+`get_current_user` runs on almost every request. Instead of a `SELECT` per
+request, each worker keeps a detached copy of recently seen users for
+USER_CACHE_TTL_SECONDS and merges it into the request's session without
+loading (`merge(load=False)`), so endpoints still get a session-bound `User`.
+
+Any committed ORM change to a `User` (role, verification or active status
+changes by admins, `VerificationService`, password changes, deletion) drops
+its entry on this worker and, through the event bus, on the other workers.
+The TTL bounds staleness for writes that bypass the session.
+
+Token-only authentication (`get_token_principal`) reads the same entries
+without a request session (`get_detached`), so it sees role changes and
+deletions exactly when `get_current_user` does, on every worker and after a
+restart; the token's own claims are never trusted for them.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached, sessionmaker
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.user import User
+from app.services.event_bus import EventBus
+from app.services.user_service import UserService
+
+logger = logging.getLogger(__name__)
+
+USER_EVENTS_CHANNEL = "user_updates"
+
+_CHANGED_KEY = "user_cache_changed_ids"
+
+def _snapshot(user: User) -> User:
+    """Detached copy of `user`'s column values, safe to share across sessions."""
+    values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+    copy = User(**values)
+    make_transient_to_detached(copy)
+    return copy
+
+
+class UserPrincipalCache:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._users: Dict[str, Tuple[User, float]] = {}
+        # Sessions for lookups made outside a request session (get_detached)
+        self.session_factory: sessionmaker = AsyncSessionLocal
+        # Relays invalidations to the other uvicorn workers (set by attach_bus)
+        self.bus: Optional[EventBus] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def attach_bus(self, bus: EventBus) -> None:
+        self.bus = bus
+        await bus.subscribe(USER_EVENTS_CHANNEL, self._on_remote_event)
+
+    def _fresh(self, user_id: Any) -> Optional[User]:
+        entry = self._users.get(str(user_id))
+        if entry is not None and time.monotonic() - entry[1] < self.ttl_seconds:
+            return entry[0]
+        return None
+
+    async def get(self, db: AsyncSession, user_id: str) -> Optional[User]:
+        """The user with this id, bound to `db`. Only queries on a cache miss."""
+        cached = self._fresh(user_id)
+        if cached is not None:
+            return await db.merge(cached, load=False)
+
+        user = await UserService(db).get_user_by_id(user_id)
+        if user is not None and self.ttl_seconds > 0:
+            self._users[str(user_id)] = (_snapshot(user), time.monotonic())
+        return user
+
+    async def get_detached(self, user_id: Any) -> Optional[User]:
+        """
+        A read-only copy of the user, bound to no session. Only queries (in a
+        session of its own) on a cache miss.
+        """
+        cached = self._fresh(user_id)
+        if cached is not None:
+            return cached
+        async with self.session_factory() as db:
+            user = await self.get(db, user_id)
+            return _snapshot(user) if user is not None else None
+
+    def invalidate(self, user_id: Any, publish: bool = True) -> None:
+        self._users.pop(str(user_id), None)
+        if publish and self.bus is not None:
+            try:
+                task = asyncio.get_running_loop().create_task(
+                    self.bus.publish(USER_EVENTS_CHANNEL, {"user_id": str(user_id)})
+                )
+            except RuntimeError:
+                return  # no event loop (sync scripts): other workers rely on the TTL
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def clear(self) -> None:
+        self._users.clear()
+
+    async def _on_remote_event(self, payload: Dict[str, Any]) -> None:
+        user_id = payload.get("user_id")
+        if user_id:
+            self.invalidate(user_id, publish=False)
+
+
+user_cache = UserPrincipalCache(ttl_seconds=settings.user_cache_ttl_seconds)
+
+
+@event.listens_for(Session, "before_flush")
+def _mark_changed_users(session, flush_context, instances) -> None:
+    user_ids = {
+        obj.id for obj in (*session.dirty, *session.deleted)
+        if isinstance(obj, User) and obj.id is not None
+    }
+    if user_ids:
+        session.info.setdefault(_CHANGED_KEY, set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session) -> None:
+    for user_id in session.info.pop(_CHANGED_KEY, ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session) -> None:
+    session.info.pop(_CHANGED_KEY, None)
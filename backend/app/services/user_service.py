@@ -3,7 +3,7 @@ from typing import List, Optional
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_password_hash, verify_password
+from app.core.security import hash_password, verify_and_update_password
 from app.models.user import User, UserRole
 from app.core.exceptions import ConflictException, NotFoundException
 
@@ -46,7 +46,7 @@ class UserService:
         
         user = User(
             email=email,
-            hashed_password=get_password_hash(password),
+            hashed_password=await hash_password(password),
             full_name=full_name,
             phone=phone,
             role=role,
@@ -78,8 +78,13 @@ class UserService:
             
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        valid, new_hash = await verify_and_update_password(password, user.hashed_password)
+        if not valid:
             return None
+        if new_hash:
+            # Stored with a different BCRYPT_ROUNDS: upgrade it while we have the password
+            user.hashed_password = new_hash
+            await self.db.commit()
         return user
 
     async def list_users(self, role: UserRole | None = None) -> List[User]:
@@ -126,9 +131,10 @@ class UserService:
         return user
 
     async def change_password(self, user: User, old_password: str, new_password: str) -> User:
-        if not verify_password(old_password, user.hashed_password):
+        valid, _ = await verify_and_update_password(old_password, user.hashed_password)
+        if not valid:
             raise ConflictException("Invalid current password")
-        user.hashed_password = get_password_hash(new_password)
+        user.hashed_password = await hash_password(new_password)
         await self.db.commit()
         await self.db.refresh(user)
         return user
@@ -0,0 +1,160 @@
+"""
+Non-blocking WebSocket fan-out.
+
+Every connection gets a bounded outbound queue drained by its own writer
+task, so a broadcast only enqueues and never waits on a slow socket. A
+connection whose queue overflows, or whose send stalls past the timeout, is
+evicted and closed. `FanoutMetrics` tracks send latency (enqueue to
+delivered) and queue depth per room (a trip id, a user id, ...); a room's
+metrics go when its last connection leaves, evictions are also counted for
+the whole process.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+from fastapi import WebSocket
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# WebSocket close code 1013: "Try Again Later"
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class RoomMetrics:
+    def __init__(self, window: int = 256):
+        self.sent = 0
+        self.evicted = 0
+        self.max_latency_ms = 0.0
+        self.max_queue_depth = 0
+        self.latencies_ms: Deque[float] = deque(maxlen=window)
+
+    def record_send(self, latency_ms: float) -> None:
+        self.sent += 1
+        self.latencies_ms.append(latency_ms)
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+
+    def as_dict(self, queue_depth: int, connections: int) -> dict:
+        ordered = sorted(self.latencies_ms)
+
+        def pct(p: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 2)
+
+        return {
+            "connections": connections,
+            "messages_sent": self.sent,
+            "evicted": self.evicted,
+            "queue_depth": queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "latency_ms_p50": pct(0.50),
+            "latency_ms_p95": pct(0.95),
+            "latency_ms_max": round(self.max_latency_ms, 2),
+        }
+
+
+class FanoutMetrics:
+    def __init__(self):
+        self.rooms: Dict[str, RoomMetrics] = {}
+        # Since startup, including rooms already dropped
+        self.evicted = 0
+
+    def room(self, room: str) -> RoomMetrics:
+        if room not in self.rooms:
+            self.rooms[room] = RoomMetrics()
+        return self.rooms[room]
+
+    def drop(self, room: str) -> None:
+        """Forget a room once its last connection is gone."""
+        self.rooms.pop(room, None)
+
+
+class QueuedConnection:
+    """A WebSocket plus its bounded outbound queue and writer task."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        room: str,
+        metrics: FanoutMetrics,
+        on_evict: Callable[["QueuedConnection"], None],
+        max_queue: Optional[int] = None,
+        send_timeout: Optional[float] = None,
+    ):
+        self.websocket = websocket
+        self.room = room
+        self.metrics = metrics
+        self.on_evict = on_evict
+        self.send_timeout = send_timeout or settings.ws_send_timeout_seconds
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue or settings.ws_send_queue_size)
+        self.closed = False
+        self._writer: Optional[asyncio.Task] = None
+        self._closer: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def offer(self, text: str) -> bool:
+        """Enqueue without waiting. Evicts the connection if its queue is full."""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait((time.perf_counter(), text))
+        except asyncio.QueueFull:
+            logger.warning(f"[WS] Evicting slow consumer in {self.room}: queue full")
+            self.evict()
+            return False
+        room = self.metrics.room(self.room)
+        room.max_queue_depth = max(room.max_queue_depth, self.queue.qsize())
+        return True
+
+    async def _write_loop(self) -> None:
+        while True:
+            enqueued_at, text = await self.queue.get()
+            # task_done even when cancelled mid-send, so join() never hangs
+            try:
+                try:
+                    await asyncio.wait_for(self.websocket.send_text(text), self.send_timeout)
+                except Exception as e:
+                    logger.info(f"[WS] Dropping connection in {self.room}: {type(e).__name__}")
+                    self.evict()
+                    return
+                self.metrics.room(self.room).record_send((time.perf_counter() - enqueued_at) * 1000)
+            finally:
+                self.queue.task_done()
+
+    def evict(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.metrics.room(self.room).evicted += 1
+        self.metrics.evicted += 1
+        self._discard_queued()
+        self.on_evict(self)
+        self._closer = asyncio.create_task(self._close_socket())
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
+    def _discard_queued(self) -> None:
+        # Unblock anyone waiting on join()
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.queue.task_done()
+
+    async def _close_socket(self) -> None:
+        try:
+            await self.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            pass
+
+    def stop(self) -> None:
+        """Stop the writer after a normal disconnect."""
+        self.closed = True
+        self._discard_queued()
+        if self._writer is not None:
+            self._writer.cancel()
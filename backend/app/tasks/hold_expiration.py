@@ -1,75 +1,147 @@
-from datetime import datetime
-from sqlalchemy import select, and_
+import asyncio
+import heapq
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
 
 from app.database import AsyncSessionLocal
 from app.models.space import Space, SpaceStatus
+from app.services.hold_deadlines import as_utc, hold_deadlines
+from app.services.space_cache import space_cache
+from app.services.trip_occupancy import trip_occupancy
 
 
-async def release_expired_holds():
+async def release_expired_holds(session_factory: sessionmaker = AsyncSessionLocal) -> int:
     """
     Release holds that have expired
-   
-    This task runs every 5 minutes and:
-    - Finds all spaces with status=on_hold and hold_expires_at < now()
-    - Changes them back to available
+
+    Called by the hold expiry timer as soon as a hold deadline passes (and by
+    the periodic scheduler job as a safety net):
+    - Flips every space with status=on_hold and hold_expires_at < now() back
+      to available in a single UPDATE ... RETURNING
     - Clears held_by and hold_expires_at fields
-    - Broadcasts updates via WebSocket
+    - Broadcasts one coalesced WebSocket batch per trip
+
+    Only the rows this call actually updated are broadcast, so concurrent
+    runs on several workers never announce the same release twice.
+    Returns the number of released spaces.
     """
     from app.api.v1.spaces import space_ws_manager
-    
-    async with AsyncSessionLocal() as db:
+
+    async with session_factory() as db:
         try:
-            now = datetime.now()
-           
-            # Find expired holds
-            stmt = select(Space).where(
-                and_(
+            now = datetime.now(timezone.utc)
+            stmt = (
+                update(Space)
+                .where(
                     Space.status == SpaceStatus.on_hold,
                     Space.hold_expires_at < now
                 )
+                .values(status=SpaceStatus.available, held_by=None, hold_expires_at=None)
+                .returning(Space.id, Space.trip_id, Space.space_number)
             )
-           
-            result = await db.execute(stmt)
-            expired_spaces = list(result.scalars().all())
-           
-            if expired_spaces:
-                count = len(expired_spaces)
-                print(f"[Hold Expiration Task] Releasing {count} expired holds")
-               
-                # Group by trip for WebSocket broadcasts
-                trip_updates = {}
-                
-                for space in expired_spaces:
-                    trip_id = str(space.trip_id)
-                    space.status = SpaceStatus.available
-                    space.held_by = None
-                    space.hold_expires_at = None
-                    
-                    # Collect for WebSocket broadcast
-                    if trip_id not in trip_updates:
-                        trip_updates[trip_id] = []
-                    trip_updates[trip_id].append({
-                        "space_id": str(space.id),
-                        "space_number": space.space_number,
-                        "status": "available",
-                        "trip_id": trip_id
-                    })
-               
-                await db.commit()
-                print(f"[Hold Expiration Task] Successfully released {count} spaces")
-                
-                # Broadcast via WebSocket
-                for trip_id, updates in trip_updates.items():
-                    for update in updates:
-                        await space_ws_manager.broadcast_to_trip(trip_id, {
-                            "event": "space_update",
-                            "data": update
-                        })
-                print(f"[Hold Expiration Task] Broadcasted updates to {len(trip_updates)} trips")
-            else:
-                pass  # Silent when no expired holds
-               
+            result = await db.execute(stmt, execution_options={"synchronize_session": False})
+            released = result.all()
+
+            if not released:
+                await db.rollback()
+                return 0  # Silent when no expired holds
+
+            trip_ids = {str(row.trip_id) for row in released}
+            trip_occupancy.mark(db, trip_ids)
+            await db.commit()
+            space_cache.invalidate_many(trip_ids)
+            print(f"[Hold Expiration Task] Released {len(released)} expired holds")
+
+            # Broadcast via WebSocket, one coalesced batch per trip
+            for row in released:
+                space_ws_manager.queue_space_update(str(row.trip_id), {
+                    "space_id": str(row.id),
+                    "space_number": row.space_number,
+                    "status": "available",
+                    "trip_id": str(row.trip_id)
+                })
+            print(f"[Hold Expiration Task] Broadcasted updates to {len(trip_ids)} trips")
+            return len(released)
+
         except Exception as e:
             print(f"[Hold Expiration Task] Error: {str(e)}")
             await db.rollback()
+            return 0
+
+
+class HoldExpiryTimer:
+    """
+    Min-heap of hold deadlines for this worker.
+
+    `create_hold` and `TripService.hold_space` publish their deadline on
+    `hold_deadlines`, which the timer subscribes to while running; it sleeps until the earliest one and then releases everything that is due
+    with one bulk UPDATE. Deadlines of holds that were extended, released or
+    turned into reservations are left in the heap and simply find nothing to
+    release. The heap is rebuilt from the database at startup.
+    """
+
+    def __init__(self, session_factory: sessionmaker = AsyncSessionLocal, slack_seconds: float = 0.5):
+        self.session_factory = session_factory
+        # Release a little after the deadline so `hold_expires_at < now` holds
+        self.slack_seconds = slack_seconds
+        self._deadlines: List[datetime] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def schedule(self, expires_at: datetime) -> None:
+        """Register a hold deadline. Naive datetimes are taken as UTC."""
+        expires_at = as_utc(expires_at)
+        heapq.heappush(self._deadlines, expires_at)
+        if self._deadlines[0] == expires_at:
+            # New earliest deadline: re-arm the sleeping timer
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(Space.hold_expires_at)
+                .where(Space.status == SpaceStatus.on_hold, Space.hold_expires_at.is_not(None))
+                .distinct()
+            )
+            for expires_at in result.scalars().all():
+                heapq.heappush(self._deadlines, as_utc(expires_at))
+        print(f"[Hold Expiry] Loaded {len(self._deadlines)} pending hold deadlines")
+        hold_deadlines.subscribe(self.schedule)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        hold_deadlines.unsubscribe(self.schedule)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            if self._deadlines:
+                delay = (self._deadlines[0] - datetime.now(timezone.utc)).total_seconds() + self.slack_seconds
+            else:
+                delay = None
+
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                    continue  # Earlier deadline arrived, recompute the delay
+                except asyncio.TimeoutError:
+                    pass
+
+            now = datetime.now(timezone.utc)
+            while self._deadlines and self._deadlines[0] <= now:
+                heapq.heappop(self._deadlines)
+            await release_expired_holds(self.session_factory)
+
+
+hold_expiry_timer = HoldExpiryTimer()
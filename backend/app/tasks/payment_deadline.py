@@ -1,99 +1,134 @@
-from datetime import datetime, timedelta
-from sqlalchemy import select, and_
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import List
+
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import DateTime
 
 from app.database import AsyncSessionLocal
 from app.models.reservation import Reservation, ReservationStatus, PaymentStatus
 from app.models.space import Space, SpaceStatus
 from app.models.reservation_space import ReservationSpace
 from app.models.trip import Trip
+from app.models.user import User
+from app.services.space_cache import space_cache
+from app.services.trip_occupancy import trip_occupancy
+
+CANCELLATION_REASON = "Plazo de pago vencido"
+
+
+class hours_after(FunctionElement):
+    """`hours_after(ts, hours)`: timestamp `ts` plus an integer number of hours, in SQL."""
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+
+@compiles(hours_after)
+def _hours_after_default(element, compiler, **kw):
+    ts, hours = list(element.clauses)
+    return f"({compiler.process(ts, **kw)} + make_interval(hours => {compiler.process(hours, **kw)}))"
 
 
-async def cancel_unpaid_reservations():
+@compiles(hours_after, "sqlite")
+def _hours_after_sqlite(element, compiler, **kw):
+    ts, hours = list(element.clauses)
+    return f"datetime({compiler.process(ts, **kw)}, '+' || {compiler.process(hours, **kw)} || ' hours')"
+
+
+async def cancel_unpaid_reservations(session_factory: sessionmaker = AsyncSessionLocal) -> int:
     """
     Cancel reservations that haven't been paid by the deadline
-   
-    This task runs every hour and:
-    - Finds reservations with status=pending and payment_status=unpaid or pending_review
-    - Checks if created_at + trip.payment_deadline_hours < now()
-    - Cancels the reservation and releases spaces
-    - Could optionally send notification to client
+
+    This task runs every hour as one set-based pass:
+    - Cancels, in a single UPDATE ... FROM trips ... RETURNING, every
+      reservation with status=pending, payment_status=unpaid or
+      pending_review and created_at + trip.payment_deadline_hours < now()
+    - Releases the spaces of exactly those reservations in a second UPDATE
+      (they are tagged with this run's cancelled_at)
+    - Queues the client notifications in the same transaction (see the
+      notification outbox), so they exist if and only if the cancellation
+      committed (one query loads all of their users)
+
+    The number of round trips does not depend on how many reservations
+    are pending, apart from the outbox rows (multi-row INSERTs of up to
+    1,000 rows). Returns the number of cancelled reservations.
     """
-    async with AsyncSessionLocal() as db:
+    async with session_factory() as db:
         try:
-            now = datetime.now()
-           
-            # Find all pending reservations
-            stmt = select(Reservation).where(
-                and_(
+            run_at = datetime.now(timezone.utc)
+
+            cancel_stmt = (
+                update(Reservation)
+                .where(
+                    Reservation.trip_id == Trip.id,
                     Reservation.status == ReservationStatus.pending,
-                    Reservation.payment_status.in_([PaymentStatus.unpaid, PaymentStatus.pending_review])
+                    Reservation.payment_status.in_([PaymentStatus.unpaid, PaymentStatus.pending_review]),
+                    hours_after(Reservation.created_at, Trip.payment_deadline_hours) < run_at,
+                )
+                .values(
+                    status=ReservationStatus.cancelled,
+                    cancelled_at=run_at,
+                    cancellation_reason=CANCELLATION_REASON,
                 )
+                .returning(Reservation.id, Reservation.trip_id, Reservation.client_id)
             )
-           
-            result = await db.execute(stmt)
-            pending_reservations = list(result.scalars().all())
-           
-            cancelled_count = 0
-           
-            for reservation in pending_reservations:
-                # Get trip to check payment deadline
-                trip_stmt = select(Trip).where(Trip.id == reservation.trip_id)
-                trip_result = await db.execute(trip_stmt)
-                trip = trip_result.scalars().first()
-               
-                if not trip:
-                    continue
-               
-                # Calculate deadline
-                deadline = reservation.created_at + timedelta(hours=trip.payment_deadline_hours)
-               
-                if now > deadline:
-                    print(f"[Payment Deadline Task] Cancelling reservation {reservation.id} - payment deadline exceeded")
-                   
-                    # Cancel reservation
-                    reservation.status = ReservationStatus.cancelled
-                   
-                    # Release spaces
-                    res_spaces_stmt = select(ReservationSpace).where(
-                        ReservationSpace.reservation_id == reservation.id
-                    )
-                    res_spaces_result = await db.execute(res_spaces_stmt)
-                    res_spaces = list(res_spaces_result.scalars().all())
-                   
-                    space_ids = [rs.space_id for rs in res_spaces]
-                   
-                    if space_ids:
-                        spaces_stmt = select(Space).where(Space.id.in_(space_ids))
-                        spaces_result = await db.execute(spaces_stmt)
-                        spaces = list(spaces_result.scalars().all())
-                       
-                    for space in spaces:
-                            space.status = SpaceStatus.available
-                   
-                    cancelled_count += 1
-                   
-                    # Send notification to client
-                    from app.services.notification_service import notification_service
-                    from app.models.user import User
-                    
-                    # Fetch client info
-                    client_stmt = select(User).where(User.id == reservation.client_id)
-                    client_result = await db.execute(client_stmt)
-                    client = client_result.scalars().first()
-                    
-                    if client:
-                        try:
-                            await notification_service.notify_payment_deadline_expired(reservation, client)
-                        except Exception as ne:
-                            print.error(f"[Payment Deadline Task] Failed to notify client {client.id}: {ne}")
-           
-            if cancelled_count > 0:
-                await db.commit()
-                print(f"[Payment Deadline Task] Cancelled {cancelled_count} unpaid reservations")
-            else:
-                pass # Silent logs
-               
+            result = await db.execute(cancel_stmt, execution_options={"synchronize_session": False})
+            cancelled = result.all()
+
+            if not cancelled:
+                await db.rollback()
+                return 0  # Silent logs
+
+            # Release the spaces of the reservations cancelled by this run
+            cancelled_now = (
+                select(ReservationSpace.space_id)
+                .join(Reservation, ReservationSpace.reservation_id == Reservation.id)
+                .where(
+                    Reservation.status == ReservationStatus.cancelled,
+                    Reservation.cancelled_at == run_at,
+                    Reservation.cancellation_reason == CANCELLATION_REASON,
+                )
+            )
+            release_stmt = (
+                update(Space)
+                .where(Space.id.in_(cancelled_now))
+                .values(status=SpaceStatus.available)
+            )
+            await db.execute(release_stmt, execution_options={"synchronize_session": False})
+            trip_occupancy.mark(db, {row.trip_id for row in cancelled})
+
+            await _notify_clients(db, cancelled)
+            await db.commit()
+            space_cache.invalidate_many({row.trip_id for row in cancelled})
+            print(f"[Payment Deadline Task] Cancelled {len(cancelled)} unpaid reservations")
+            return len(cancelled)
+
         except Exception as e:
             print(f"[Payment Deadline Task] Error: {str(e)}")
             await db.rollback()
+            return 0
+
+
+async def _notify_clients(db: AsyncSession, cancelled: List) -> None:
+    """Queue the cancellation notices in `db`'s transaction."""
+    from app.services.notification_service import notification_service
+
+    # One query for every client involved
+    client_ids = {row.client_id for row in cancelled}
+    result = await db.execute(select(User).where(User.id.in_(client_ids)))
+    clients = {user.id: user for user in result.scalars().all()}
+
+    with notification_service.outbox(db):
+        for row in cancelled:
+            client = clients.get(row.client_id)
+            if client is None:
+                continue
+            reservation = SimpleNamespace(id=row.id, trip_id=row.trip_id)
+            try:
+                await notification_service.notify_payment_deadline_expired(reservation, client)
+            except Exception as ne:
+                print(f"[Payment Deadline Task] Failed to notify client {client.id}: {ne}")
@@ -0,0 +1,181 @@
+"""
+Scheduled jobs across uvicorn workers.
+
+Every worker builds the same APScheduler, but in "leader" mode only the
+worker holding a PostgreSQL session-level advisory lock runs it. The lock
+lives on a dedicated asyncpg connection, so when the leader process dies
+PostgreSQL drops the connection and releases the lock; another worker picks
+it up on its next attempt and resumes the jobs.
+
+Each job run is recorded in `job_runs` (duration, rows affected, error).
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+from typing import Awaitable, Callable, Optional
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.job_run import JobRun
+from app.services.event_bus import asyncpg_dsn
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for pg_try_advisory_lock
+SCHEDULER_LOCK_KEY = 7_180_245_001
+
+WORKER_NAME = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def recorded_job(
+    job_name: str,
+    func: Callable[[], Awaitable[Optional[int]]],
+    session_factory: sessionmaker = AsyncSessionLocal,
+) -> Callable[[], Awaitable[None]]:
+    """Wrap a job so each run's duration and returned row count are stored in job_runs."""
+
+    async def run() -> None:
+        started = time.perf_counter()
+        rows, error = None, None
+        try:
+            rows = await func()
+        except Exception as e:
+            error = str(e)[:500]
+            logger.exception(f"[Scheduler] Job {job_name} failed")
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        print(f"[Scheduler] {job_name}: {rows if rows is not None else '-'} rows in {duration_ms} ms")
+
+        try:
+            async with session_factory() as db:
+                db.add(JobRun(
+                    job_name=job_name,
+                    worker=WORKER_NAME,
+                    duration_ms=duration_ms,
+                    rows_affected=rows,
+                    succeeded=error is None,
+                    error=error,
+                ))
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"[Scheduler] Could not record run of {job_name}: {e}")
+
+    run.__name__ = job_name
+    return run
+
+
+class SchedulerLeader:
+    """
+    Starts `scheduler` on this worker only while it holds the advisory lock.
+
+    With `dsn=None` (SQLite, or SCHEDULER_MODE=all) the worker is always leader.
+    """
+
+    def __init__(self, scheduler: AsyncIOScheduler, dsn: Optional[str], retry_seconds: float = 10.0):
+        self.scheduler = scheduler
+        self.dsn = dsn
+        self.retry_seconds = retry_seconds
+        self.is_leader = False
+        self._conn = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self.dsn is None:
+            self._become_leader()
+            return
+        self._task = asyncio.create_task(self._campaign())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+        if self._conn is not None:
+            await self._close(self._conn)
+        self._conn = None
+        self.is_leader = False
+
+    async def _campaign(self) -> None:
+        import asyncpg
+
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                if await conn.fetchval("SELECT pg_try_advisory_lock($1)", SCHEDULER_LOCK_KEY):
+                    self._conn = conn
+                    self._become_leader()
+                    await self._hold(conn)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[Scheduler] Leader connection error: {e}")
+            finally:
+                if conn is not None:
+                    await self._close(conn)
+            self._step_down()
+            await asyncio.sleep(self.retry_seconds)
+
+    async def _hold(self, conn) -> None:
+        """Return once the lock connection is gone (pinging it to notice silent drops)."""
+        lost = asyncio.Event()
+        conn.add_termination_listener(lambda c: lost.set())
+        while not lost.is_set():
+            try:
+                await asyncio.wait_for(lost.wait(), timeout=self.retry_seconds)
+            except asyncio.TimeoutError:
+                try:
+                    await conn.fetchval("SELECT 1", timeout=self.retry_seconds)
+                except asyncio.TimeoutError:
+                    # A session we cannot reach may be gone: another worker can take the lock
+                    logger.warning("[Scheduler] Lock connection ping timed out")
+                    return
+
+    async def _close(self, conn) -> None:
+        """Close the lock session, which releases the advisory lock; drop it if it hangs."""
+        if conn.is_closed():
+            return
+        try:
+            await conn.close(timeout=self.retry_seconds)
+        except Exception:
+            conn.terminate()
+
+    def _become_leader(self) -> None:
+        self.is_leader = True
+        if not self.scheduler.running:
+            self.scheduler.start()
+        else:
+            self.scheduler.resume()
+        print(f"[Scheduler] {WORKER_NAME} is running scheduled jobs")
+
+    def _step_down(self) -> None:
+        if not self.is_leader:
+            return
+        self.is_leader = False
+        self._conn = None
+        if self.scheduler.running:
+            self.scheduler.pause()
+        print(f"[Scheduler] {WORKER_NAME} lost the scheduler lock, jobs paused")
+
+
+def create_scheduler_leader(scheduler: AsyncIOScheduler) -> Optional[SchedulerLeader]:
+    """Build the leader for SCHEDULER_MODE ("leader", "all" or "off")."""
+    mode = settings.scheduler_mode.lower()
+    if mode == "off":
+        return None
+    dsn = None
+    if mode == "leader":
+        if settings.database_url.startswith("postgresql"):
+            dsn = asyncpg_dsn(settings.database_url)
+        else:
+            logger.warning("[Scheduler] DATABASE_URL is not PostgreSQL, running jobs on every worker")
+    return SchedulerLeader(scheduler, dsn, retry_seconds=settings.scheduler_leader_retry_seconds)
@@ -2,19 +2,26 @@ from datetime import datetime
 from decimal import Decimal
 from io import BytesIO
 from pathlib import Path
+from functools import lru_cache
 from typing import Optional, Dict
 import qrcode
+from PIL import Image as PILImage
+from reportlab import rl_config
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
 from app.config import settings
 
+# Write binary streams instead of ASCII85 text: encoding the embedded images
+# dominated render time and made every PDF ~25% larger
+rl_config.useA85 = 0
+
 
 # ============================================================================
 # KEIKICHI PDF DESIGN SYSTEM - PRINT-FRIENDLY PREMIUM THEME
@@ -84,107 +91,88 @@ def get_pdf_config(db_configs: Optional[Dict[str, str]] = None) -> Dict[str, str
     return config
 
 
-def generate_qr_code(data: str, box_size: int = 10, dark_mode: bool = False) -> BytesIO:
-    """Generate QR code image with customizable size and colors."""
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_M,
-        box_size=box_size,
-        border=2,
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
-    
-    # QR code colors - always dark on white for scannability
-    img = qr.make_image(fill_color="#1a1a1a", back_color="white")
-    
-    buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
-    return buffer
-
-
-def generate_reservation_ticket(
-    reservation_id: str,
-    client_name: str,
-    client_email: str,
-    trip_origin: str,
-    trip_destination: str,
-    departure_date: str,
-    departure_time: Optional[str],
-    space_numbers: list[int],
-    subtotal: Decimal,
-    tax_amount: Decimal,
-    total_amount: Decimal,
-    payment_method: str,
-    cargo_description: Optional[str] = None,
-    requires_invoice: bool = False,
-    pdf_config: Optional[Dict[str, str]] = None,
-    currency: str = "USD",
-    exchange_rate: float = 1.0
-) -> str:
+class PDFAssets:
     """
-    Generate professional reservation ticket PDF.
-    Returns the path to the generated file relative to upload_dir.
+    Branding assets shared by every document, prepared once per process.
+
+    The logo is decoded once and kept as a JPEG sized for 300 dpi print
+    (the source file is ~4x larger than it is ever drawn), paragraph styles
+    are built once per distinct definition and QR codes are memoized by
+    payload, so a render only allocates its variable data.
     """
-    tickets_dir = Path(settings.upload_dir) / 'tickets'
-    tickets_dir.mkdir(parents=True, exist_ok=True)
-    
-    filename = f"ticket_{reservation_id}.pdf"
-    file_path = tickets_dir / filename
-    
-    # Setup document
-    doc = SimpleDocTemplate(
-        str(file_path), 
-        pagesize=letter,
-        leftMargin=0.5*inch,
-        rightMargin=0.5*inch,
-        topMargin=0.5*inch,
-        bottomMargin=0.5*inch
-    )
-    elements = []
-    config = get_pdf_config(pdf_config)
-    
-    # Currency setup
-    currency_symbol = "$" if currency in ["USD", "MXN"] else currency
-    
-    # Header with Logo
-    logo_path = Path(__file__).parent.parent / 'static' / 'keikichi_logo.jpg'
-    
-    # ... (skipping unchanged parts for brevity if possible, but replace_file_content needs contiguous block)
-    # Since I cannot skip, I'll focus on the target functions.
-    # The user asked to fix generate_pre_reservation_summary mostly.
-    # I will split this into two edits if needed, or replace a larger chunk.
-    # Given the distance, I should use multi_replace_file_content or just target the specific blocks.
-    # I'll use multi_replace_file_content as the functions are far apart (get_pdf_config is line 77, generate_pre_reservation_summary logic is line 500).
-    pass 
-    
-    # WAIT - I cannot put 'pass' here. I need to cancel this tool call and use multi_replace_file_content.
-    # The previous prompt structure led me to think I was in single replace.
-    # I will cancel this tool call by returning an empty string or just switching strategy.
-    # Actually, I'll just use the correct tool.
 
+    LOGO_PATH = Path(__file__).parent.parent / 'static' / 'keikichi_logo.jpg'
+    LOGO_MAX_WIDTH = 1.4 * inch
+    PRINT_DPI = 300
+
+    def __init__(self):
+        self._logo_jpeg: Optional[bytes] = None
+        self._logo_loaded = False
+        self._styles: Dict[tuple, ParagraphStyle] = {}
+
+    def load(self) -> None:
+        """Preload everything (PDF worker start-up); otherwise loaded on first use."""
+        self.logo_jpeg()
+        for font in ('Helvetica', 'Helvetica-Bold', 'Helvetica-Oblique'):
+            pdfmetrics.getFont(font)
+
+    def logo_jpeg(self) -> Optional[bytes]:
+        if not self._logo_loaded:
+            self._logo_loaded = True
+            if self.LOGO_PATH.exists():
+                with PILImage.open(self.LOGO_PATH) as img:
+                    img = img.convert('RGB')
+                    width = int(self.LOGO_MAX_WIDTH / inch * self.PRINT_DPI)
+                    if img.width > width:
+                        img = img.resize((width, round(img.height * width / img.width)), PILImage.LANCZOS)
+                    buffer = BytesIO()
+                    img.save(buffer, format='JPEG', quality=90)
+                self._logo_jpeg = buffer.getvalue()
+        return self._logo_jpeg
+
+    def logo(self, width: float, height: float, company_name: str, font_size: int = 14):
+        """Logo flowable, or the company name when the logo file is missing."""
+        data = self.logo_jpeg()
+        if data is None:
+            return Paragraph(f"<b>{company_name}</b>", self.style('Logo', fontSize=font_size, textColor=Colors.BRAND_SECONDARY))
+        return Image(BytesIO(data), width=width, height=height)
+
+    def style(self, name: str, **kwargs) -> ParagraphStyle:
+        key = (name, tuple(sorted(kwargs.items())))
+        style = self._styles.get(key)
+        if style is None:
+            style = self._styles[key] = ParagraphStyle(name, **kwargs)
+        return style
+
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def qr_png(data: str, box_size: int = 10) -> bytes:
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=qrcode.constants.ERROR_CORRECT_M,
+            box_size=box_size,
+            border=2,
+        )
+        qr.add_data(data)
+        qr.make(fit=True)
+
+        # QR code colors - always dark on white for scannability
+        img = qr.make_image(fill_color="#1a1a1a", back_color="white")
+
+        buffer = BytesIO()
+        img.save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    def qr(self, data: str, box_size: int, size: float) -> Image:
+        return Image(BytesIO(self.qr_png(data, box_size)), width=size, height=size)
+
+
+assets = PDFAssets()
 
 
 def generate_qr_code(data: str, box_size: int = 10, dark_mode: bool = False) -> BytesIO:
     """Generate QR code image with customizable size and colors."""
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_M,
-        box_size=box_size,
-        border=2,
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
-    
-    # QR code colors - always dark on white for scannability
-    img = qr.make_image(fill_color="#1a1a1a", back_color="white")
-    
-    buffer = BytesIO()
-    img.save(buffer, format='PNG')
-    buffer.seek(0)
-    
-    return buffer
+    return BytesIO(PDFAssets.qr_png(data, box_size))
 
 
 def generate_reservation_ticket(
@@ -231,16 +219,11 @@ def generate_reservation_ticket(
     currency_symbol = "$" if currency in ["USD", "MXN"] else currency
     
     # =========== HEADER ===========
-    logo_path = Path(__file__).parent.parent / 'static' / 'keikichi_logo.jpg'
-    
-    if logo_path.exists():
-        logo = Image(str(logo_path), width=1.4*inch, height=0.56*inch)
-    else:
-        logo = Paragraph(f"<b>{config['company_name']}</b>", ParagraphStyle('Logo', fontSize=14, textColor=Colors.BRAND_SECONDARY))
+    logo = assets.logo(1.4*inch, 0.56*inch, config['company_name'])
     
     title = Paragraph(
         "<b>TICKET DE CONFIRMACION</b>",
-        ParagraphStyle('Title', fontSize=16, textColor=Colors.BRAND_SECONDARY, alignment=TA_RIGHT)
+        assets.style('Title', fontSize=16, textColor=Colors.BRAND_SECONDARY, alignment=TA_RIGHT)
     )
     
     header = Table([[logo, title]], colWidths=[3.5*inch, 4*inch])
@@ -252,18 +235,17 @@ def generate_reservation_ticket(
     elements.append(Spacer(1, 6))
     
     # Status + QR row
-    qr_buffer = generate_qr_code(reservation_id, box_size=6)
-    qr_img = Image(qr_buffer, width=0.9*inch, height=0.9*inch)
+    qr_img = assets.qr(reservation_id, box_size=6, size=0.9*inch)
     
     status_text = Paragraph(
         f"<font color='#10b981'><b>CONFIRMADO</b></font><br/>"
         f"<font size='8' color='#6c757d'>{datetime.now().strftime('%d/%m/%Y %H:%M')}</font>",
-        ParagraphStyle('Status', fontSize=11, leading=14)
+        assets.style('Status', fontSize=11, leading=14)
     )
     
     contact_text = Paragraph(
         f"<font size='7' color='#6c757d'>{config['company_phone']} | {config['company_email']}</font>",
-        ParagraphStyle('Contact', fontSize=7)
+        assets.style('Contact', fontSize=7)
     )
     
     status_row = Table([[status_text, contact_text, qr_img]], colWidths=[2.5*inch, 3.5*inch, 1.5*inch])
@@ -281,7 +263,7 @@ def generate_reservation_ticket(
         f"<font size='16' color='#212529'><b>{trip_origin}</b></font> "
         f"<font size='12' color='#00a8cc'>→</font> "
         f"<font size='16' color='#212529'><b>{trip_destination}</b></font>",
-        ParagraphStyle('Route', fontSize=16, leading=20)
+        assets.style('Route', fontSize=16, leading=20)
     )
     
     route_box = Table([[route_text]], colWidths=[7.5*inch])
@@ -295,8 +277,8 @@ def generate_reservation_ticket(
     elements.append(Spacer(1, 8))
     
     # =========== INFO TABLE ===========
-    info_style = ParagraphStyle('Info', fontSize=9, leading=12)
-    label_style = ParagraphStyle('Label', fontSize=8, textColor=Colors.TEXT_MUTED)
+    info_style = assets.style('Info', fontSize=9, leading=12)
+    label_style = assets.style('Label', fontSize=8, textColor=Colors.TEXT_MUTED)
     
     info_data = [
         [Paragraph("Cliente", label_style), Paragraph(f"<b>{client_name}</b>", info_style),
@@ -346,7 +328,7 @@ def generate_reservation_ticket(
     total_para = Paragraph(
         f"<font size='14' color='#10b981'><b>TOTAL: {currency_symbol}{total_amount:,.2f} {currency}</b></font>{mxn_note}<br/>"
         f"<font size='9' color='#10b981'>PAGADO</font>",
-        ParagraphStyle('Total', fontSize=14, alignment=TA_CENTER, leading=18)
+        assets.style('Total', fontSize=14, alignment=TA_CENTER, leading=18)
     )
     
     total_box = Table([[total_para]], colWidths=[4*inch])
@@ -370,7 +352,7 @@ def generate_reservation_ticket(
     
     terms_para = Paragraph(
         f"<font size='6' color='#adb5bd'>{terms_compact}</font>",
-        ParagraphStyle('Terms', fontSize=6, leading=8)
+        assets.style('Terms', fontSize=6, leading=8)
     )
     elements.append(terms_para)
     elements.append(Spacer(1, 6))
@@ -379,7 +361,7 @@ def generate_reservation_ticket(
     footer = Paragraph(
         f"<font size='7' color='#0077b6'>{config['pdf_footer_text']}</font> | "
         f"<font size='6' color='#adb5bd'>{config['company_website']}</font>",
-        ParagraphStyle('Footer', fontSize=7, alignment=TA_CENTER)
+        assets.style('Footer', fontSize=7, alignment=TA_CENTER)
     )
     elements.append(footer)
     
@@ -430,17 +412,19 @@ def generate_pre_reservation_summary(
     requires_invoice: bool = False,
     pdf_config: Optional[Dict[str, str]] = None,
     currency: str = "USD",
-    exchange_rate: float = 1.0
+    exchange_rate: float = 1.0,
+    output_path: Optional[str] = None
 ) -> str:
     """
     Generate clean, compact pre-reservation summary PDF.
     Single page design matching ticket style.
+    With `output_path` the file is written (and its path returned) there instead.
     """
     summaries_dir = Path(settings.upload_dir) / 'summaries'
     summaries_dir.mkdir(parents=True, exist_ok=True)
     
     filename = f"summary_{reservation_id}.pdf"
-    file_path = summaries_dir / filename
+    file_path = Path(output_path) if output_path else summaries_dir / filename
     
     doc = SimpleDocTemplate(
         str(file_path), 
@@ -457,16 +441,11 @@ def generate_pre_reservation_summary(
     currency_symbol = "$" if currency in ["USD", "MXN"] else currency
     
     # =========== HEADER ===========
-    logo_path = Path(__file__).parent.parent / 'static' / 'keikichi_logo.jpg'
-    
-    if logo_path.exists():
-        logo = Image(str(logo_path), width=1.4*inch, height=0.56*inch)
-    else:
-        logo = Paragraph(f"<b>{config['company_name']}</b>", ParagraphStyle('Logo', fontSize=14, textColor=Colors.BRAND_SECONDARY))
+    logo = assets.logo(1.4*inch, 0.56*inch, config['company_name'])
     
     title = Paragraph(
         "<b>RESUMEN DE PRE-RESERVACION</b>",
-        ParagraphStyle('Title', fontSize=16, textColor=Colors.WARNING, alignment=TA_RIGHT)
+        assets.style('Title', fontSize=16, textColor=Colors.WARNING, alignment=TA_RIGHT)
     )
     
     header = Table([[logo, title]], colWidths=[3.5*inch, 4*inch])
@@ -478,18 +457,17 @@ def generate_pre_reservation_summary(
     elements.append(Spacer(1, 6))
     
     # Status + QR row
-    qr_buffer = generate_qr_code(reservation_id, box_size=6)
-    qr_img = Image(qr_buffer, width=0.9*inch, height=0.9*inch)
+    qr_img = assets.qr(reservation_id, box_size=6, size=0.9*inch)
     
+    # No render timestamp: the cached file is served again for identical inputs
     status_text = Paragraph(
-        f"<font color='#f59e0b'><b>PENDIENTE DE PAGO</b></font><br/>"
-        f"<font size='8' color='#6c757d'>{datetime.now().strftime('%d/%m/%Y %H:%M')}</font>",
-        ParagraphStyle('Status', fontSize=11, leading=14)
+        "<font color='#f59e0b'><b>PENDIENTE DE PAGO</b></font>",
+        assets.style('Status', fontSize=11, leading=14)
     )
     
     contact_text = Paragraph(
         f"<font size='7' color='#6c757d'>{config['company_phone']} | {config['company_email']}</font>",
-        ParagraphStyle('Contact', fontSize=7)
+        assets.style('Contact', fontSize=7)
     )
     
     status_row = Table([[status_text, contact_text, qr_img]], colWidths=[2.5*inch, 3.5*inch, 1.5*inch])
@@ -507,7 +485,7 @@ def generate_pre_reservation_summary(
         f"<font size='16' color='#212529'><b>{trip_origin}</b></font> "
         f"<font size='12' color='#00a8cc'>→</font> "
         f"<font size='16' color='#212529'><b>{trip_destination}</b></font>",
-        ParagraphStyle('Route', fontSize=16, leading=20)
+        assets.style('Route', fontSize=16, leading=20)
     )
     
     route_box = Table([[route_text]], colWidths=[7.5*inch])
@@ -521,8 +499,8 @@ def generate_pre_reservation_summary(
     elements.append(Spacer(1, 8))
     
     # =========== INFO ===========
-    info_style = ParagraphStyle('Info', fontSize=9, leading=12)
-    label_style = ParagraphStyle('Label', fontSize=8, textColor=Colors.TEXT_MUTED)
+    info_style = assets.style('Info', fontSize=9, leading=12)
+    label_style = assets.style('Label', fontSize=8, textColor=Colors.TEXT_MUTED)
     
     info_data = [
         [Paragraph("Cliente", label_style), Paragraph(f"<b>{client_name}</b>", info_style),
@@ -562,7 +540,7 @@ def generate_pre_reservation_summary(
     total_para = Paragraph(
         f"<font size='14' color='#f59e0b'><b>TOTAL: {currency_symbol}{total_amount:,.2f} {currency}</b></font>{mxn_note}<br/>"
         f"<font size='9' color='#f59e0b'>PENDIENTE</font>",
-        ParagraphStyle('TotalSummary', fontSize=14, alignment=TA_CENTER, leading=18)
+        assets.style('TotalSummary', fontSize=14, alignment=TA_CENTER, leading=18)
     )
     
     total_box = Table([[total_para]], colWidths=[4*inch])
@@ -605,7 +583,7 @@ def generate_pre_reservation_summary(
             instr_text = f"<b>TRANSFERENCIA</b><br/>{bank_compact}"
         bg_color = Colors.BG_SECTION
     
-    instr_para = Paragraph(f"<font size='8'>{instr_text}</font>", ParagraphStyle('Instr', fontSize=8, leading=10))
+    instr_para = Paragraph(f"<font size='8'>{instr_text}</font>", assets.style('Instr', fontSize=8, leading=10))
     instr_box = Table([[instr_para]], colWidths=[7.5*inch])
     instr_box.setStyle(TableStyle([
         ('BACKGROUND', (0, 0), (-1, -1), bg_color),
@@ -618,7 +596,7 @@ def generate_pre_reservation_summary(
     # Deadline warning
     deadline_text = Paragraph(
         f"<font size='9' color='#ef4444'><b> IMPORTANTE: Tienes {payment_deadline_hours} horas para realizar el pago.</b></font>",
-        ParagraphStyle('Deadline', fontSize=9, alignment=TA_CENTER)
+        assets.style('Deadline', fontSize=9, alignment=TA_CENTER)
     )
     elements.append(Spacer(1, 6))
     elements.append(deadline_text)
@@ -630,7 +608,7 @@ def generate_pre_reservation_summary(
     if terms_text:
         terms_para = Paragraph(
             f"<b>TERMINOS Y CONDICIONES</b><br/>{terms_text}",
-            ParagraphStyle('Terms', fontSize=7, leading=9, textColor=Colors.TEXT_MUTED)
+            assets.style('Terms', fontSize=7, leading=9, textColor=Colors.TEXT_MUTED)
         )
         elements.append(terms_para)
         elements.append(Spacer(1, 6))
@@ -639,12 +617,12 @@ def generate_pre_reservation_summary(
     footer = Paragraph(
         f"<font size='7' color='#0077b6'>{config['pdf_footer_text']}</font> | "
         f"<font size='6' color='#adb5bd'>{config['company_website']}</font>",
-        ParagraphStyle('Footer', fontSize=7, alignment=TA_CENTER)
+        assets.style('Footer', fontSize=7, alignment=TA_CENTER)
     )
     elements.append(footer)
     
     doc.build(elements)
-    return f"summaries/{filename}"
+    return str(output_path) if output_path else f"summaries/{filename}"
 
 
 def delete_summary(reservation_id: str) -> bool:
@@ -664,7 +642,7 @@ def delete_summary(reservation_id: str) -> bool:
     return False
 
 
-def generate_trip_manifest(
+def trip_manifest_elements(
     trip_id: str,
     origin: str,
     destination: str,
@@ -678,27 +656,11 @@ def generate_trip_manifest(
     reservations: list[dict],  # List of {client_name, client_phone, space_numbers, payment_status, total_amount}
     pdf_config: Optional[Dict[str, str]] = None,
     currency: str = "USD"
-) -> str:
+) -> list:
     """
-    Generate trip manifest PDF for drivers/warehouse.
+    Build the trip manifest for drivers/warehouse (flowables of one document).
     Shows all reservations with client contacts and space allocations.
-    
-    Returns the path to the generated file relative to upload_dir.
     """
-    manifests_dir = Path(settings.upload_dir) / 'manifests'
-    manifests_dir.mkdir(parents=True, exist_ok=True)
-    
-    filename = f"manifest_{trip_id}.pdf"
-    file_path = manifests_dir / filename
-    
-    doc = SimpleDocTemplate(
-        str(file_path), 
-        pagesize=letter,
-        leftMargin=0.4*inch,
-        rightMargin=0.4*inch,
-        topMargin=0.3*inch,
-        bottomMargin=0.3*inch
-    )
     elements = []
     config = get_pdf_config(pdf_config)
     
@@ -706,16 +668,11 @@ def generate_trip_manifest(
     currency_symbol = "$" if currency in ["USD", "MXN"] else currency
     
     # =========== HEADER ===========
-    logo_path = Path(__file__).parent.parent / 'static' / 'keikichi_logo.jpg'
-    
-    if logo_path.exists():
-        logo = Image(str(logo_path), width=1.4*inch, height=0.56*inch)
-    else:
-        logo = Paragraph(f"<b>{config['company_name']}</b>", ParagraphStyle('Logo', fontSize=14, textColor=Colors.BRAND_SECONDARY))
+    logo = assets.logo(1.4*inch, 0.56*inch, config['company_name'])
     
     title = Paragraph(
         "<b>MANIFIESTO DE VIAJE</b>",
-        ParagraphStyle('Title', fontSize=16, textColor=Colors.BRAND_SECONDARY, alignment=TA_RIGHT)
+        assets.style('Title', fontSize=16, textColor=Colors.BRAND_SECONDARY, alignment=TA_RIGHT)
     )
     
     header = Table([[logo, title]], colWidths=[3.5*inch, 4*inch])
@@ -736,7 +693,7 @@ def generate_trip_manifest(
         f"<font size='18' color='#212529'><b>{origin}</b></font> "
         f"<font size='14' color='#00a8cc'>→</font> "
         f"<font size='18' color='#212529'><b>{destination}</b></font>",
-        ParagraphStyle('Route', fontSize=18, leading=22)
+        assets.style('Route', fontSize=18, leading=22)
     )
     
     route_box = Table([[route_text]], colWidths=[7.5*inch])
@@ -750,8 +707,8 @@ def generate_trip_manifest(
     elements.append(Spacer(1, 8))
     
     # Vehicle and driver info
-    info_style = ParagraphStyle('Info', fontSize=9, leading=12)
-    label_style = ParagraphStyle('Label', fontSize=8, textColor=Colors.TEXT_MUTED)
+    info_style = assets.style('Info', fontSize=9, leading=12)
+    label_style = assets.style('Label', fontSize=8, textColor=Colors.TEXT_MUTED)
     
     vehicle_data = [
         [Paragraph("Fecha Salida", label_style), Paragraph(f"<b>{departure_str}</b>", info_style),
@@ -773,13 +730,13 @@ def generate_trip_manifest(
     elements.append(Spacer(1, 12))
     
     # =========== RESERVATIONS TABLE ===========
-    elements.append(Paragraph("<b>RESERVACIONES</b>", ParagraphStyle('SectionTitle', fontSize=11, textColor=Colors.BRAND_SECONDARY)))
+    elements.append(Paragraph("<b>RESERVACIONES</b>", assets.style('SectionTitle', fontSize=11, textColor=Colors.BRAND_SECONDARY)))
     elements.append(Spacer(1, 6))
     
     # Table header
-    header_style = ParagraphStyle('TH', fontSize=8, textColor=Colors.WHITE, alignment=TA_CENTER)
-    cell_style = ParagraphStyle('TD', fontSize=8, leading=10)
-    cell_center = ParagraphStyle('TDC', fontSize=8, alignment=TA_CENTER)
+    header_style = assets.style('TH', fontSize=8, textColor=Colors.WHITE, alignment=TA_CENTER)
+    cell_style = assets.style('TD', fontSize=8, leading=10)
+    cell_center = assets.style('TDC', fontSize=8, alignment=TA_CENTER)
     
     table_data = [[
         Paragraph("<b>#</b>", header_style),
@@ -815,7 +772,7 @@ def generate_trip_manifest(
         table_data.append([
             Paragraph(str(idx), cell_center),
             Paragraph(res.get('client_name', 'Desconocido')[:25], cell_style),
-            Paragraph(res.get('client_phone', '-'), cell_center),
+            Paragraph(res.get('client_phone') or '-', cell_center),
             Paragraph(f"{spaces_str} ({spaces_count})", cell_center),
             Paragraph(f"{currency_symbol}{float(amount):,.0f}", cell_center),
             Paragraph(status_text, cell_center),
@@ -849,7 +806,7 @@ def generate_trip_manifest(
         f"<font color='#f59e0b'>{pending_count} pendientes</font> | "
         f"<font color='#6c757d'>{available_spaces} disponibles</font> de {total_spaces} espacios</font><br/>"
         f"<font size='9' color='#6c757d'>Ingreso estimado: {currency_symbol}{total_revenue:,.2f} {currency}</font>",
-        ParagraphStyle('Summary', fontSize=10, leading=14)
+        assets.style('Summary', fontSize=10, leading=14)
     )
     
     summary_box = Table([[summary_text]], colWidths=[7.5*inch])
@@ -863,21 +820,19 @@ def generate_trip_manifest(
     elements.append(Spacer(1, 10))
     
     # =========== QR + FOOTER ===========
-    qr_buffer = generate_qr_code(f"trip:{trip_id}", box_size=6)
-    qr_img = Image(qr_buffer, width=0.8*inch, height=0.8*inch)
+    qr_img = assets.qr(f"trip:{trip_id}", box_size=6, size=0.8*inch)
     
+    # No "Generado" timestamp: the cached file is served again for identical inputs
     footer_text = Paragraph(
-        f"<font size='7' color='#6c757d'>Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')}</font><br/>"
         f"<font size='7' color='#0077b6'>{config['pdf_footer_text']}</font>",
-        ParagraphStyle('FooterText', fontSize=7, leading=10)
+        assets.style('FooterText', fontSize=7, leading=10)
     )
     
     footer_row = Table([[footer_text, qr_img]], colWidths=[6.5*inch, 1*inch])
     footer_row.setStyle(TableStyle([('VALIGN', (0, 0), (-1, -1), 'MIDDLE')]))
     elements.append(footer_row)
     
-    doc.build(elements)
-    return f"manifests/{filename}"
+    return elements
 
 
 def delete_manifest(trip_id: str) -> bool:
@@ -897,7 +852,7 @@ def delete_manifest(trip_id: str) -> bool:
     return False
 
 
-def generate_driver_manifest(
+def driver_manifest_elements(
     trip_id: str,
     origin: str,
     destination: str,
@@ -911,43 +866,22 @@ def generate_driver_manifest(
     reservations: list[dict],  # Extended: {client_name, client_phone, client_email, space_numbers, payment_status, total_amount, items, pickup_address, notes}
     pdf_config: Optional[Dict[str, str]] = None,
     currency: str = "USD"
-) -> str:
+) -> list:
     """
-    Generate detailed driver manifest PDF with cargo details, addresses, and signature lines.
+    Build the detailed driver manifest with cargo details, addresses, and signature lines.
     For driver/warehouse delivery operations.
-    
-    Returns the path to the generated file relative to upload_dir.
     """
-    manifests_dir = Path(settings.upload_dir) / 'manifests'
-    manifests_dir.mkdir(parents=True, exist_ok=True)
-    
-    filename = f"manifest_driver_{trip_id}.pdf"
-    file_path = manifests_dir / filename
-    
-    doc = SimpleDocTemplate(
-        str(file_path), 
-        pagesize=letter,
-        leftMargin=0.4*inch,
-        rightMargin=0.4*inch,
-        topMargin=0.3*inch,
-        bottomMargin=0.3*inch
-    )
     elements = []
     config = get_pdf_config(pdf_config)
     
     currency_symbol = "$" if currency in ["USD", "MXN"] else currency
     
     # =========== HEADER ===========
-    logo_path = Path(__file__).parent.parent / 'static' / 'keikichi_logo.jpg'
-    
-    if logo_path.exists():
-        logo = Image(str(logo_path), width=1.2*inch, height=0.48*inch)
-    else:
-        logo = Paragraph(f"<b>{config['company_name']}</b>", ParagraphStyle('Logo', fontSize=12, textColor=Colors.BRAND_SECONDARY))
+    logo = assets.logo(1.2*inch, 0.48*inch, config['company_name'], font_size=12)
     
     title = Paragraph(
         "<b>MANIFIESTO DE CHOFER</b><br/><font size='9' color='#6c757d'>Documento de entrega</font>",
-        ParagraphStyle('Title', fontSize=14, textColor=Colors.BRAND_SECONDARY, alignment=TA_RIGHT, leading=16)
+        assets.style('Title', fontSize=14, textColor=Colors.BRAND_SECONDARY, alignment=TA_RIGHT, leading=16)
     )
     
     header = Table([[logo, title]], colWidths=[3*inch, 4.5*inch])
@@ -963,9 +897,9 @@ def generate_driver_manifest(
     if departure_time:
         departure_str += f" - {departure_time}"
     
-    info_style = ParagraphStyle('Info', fontSize=9, leading=11)
-    label_style = ParagraphStyle('Label', fontSize=7, textColor=Colors.TEXT_MUTED)
-    big_style = ParagraphStyle('Big', fontSize=11, leading=13)
+    info_style = assets.style('Info', fontSize=9, leading=11)
+    label_style = assets.style('Label', fontSize=7, textColor=Colors.TEXT_MUTED)
+    big_style = assets.style('Big', fontSize=11, leading=13)
     
     trip_box_data = [
         [
@@ -990,14 +924,14 @@ def generate_driver_manifest(
     elements.append(Spacer(1, 10))
     
     # =========== DELIVERIES (One per client) ===========
-    elements.append(Paragraph("<b>ENTREGAS</b>", ParagraphStyle('SectionTitle', fontSize=11, textColor=Colors.BRAND_SECONDARY)))
+    elements.append(Paragraph("<b>ENTREGAS</b>", assets.style('SectionTitle', fontSize=11, textColor=Colors.BRAND_SECONDARY)))
     elements.append(Spacer(1, 4))
     
-    phone_style = ParagraphStyle('Phone', fontSize=12, textColor=Colors.BRAND_SECONDARY, alignment=TA_CENTER)
-    client_style = ParagraphStyle('Client', fontSize=9, leading=11)
-    cargo_style = ParagraphStyle('Cargo', fontSize=8, leading=10, textColor=Colors.TEXT_DARK)
-    notes_style = ParagraphStyle('Notes', fontSize=7, leading=9, textColor=Colors.TEXT_MUTED)
-    check_style = ParagraphStyle('Check', fontSize=9, alignment=TA_CENTER)
+    phone_style = assets.style('Phone', fontSize=12, textColor=Colors.BRAND_SECONDARY, alignment=TA_CENTER)
+    client_style = assets.style('Client', fontSize=9, leading=11)
+    cargo_style = assets.style('Cargo', fontSize=8, leading=10, textColor=Colors.TEXT_DARK)
+    notes_style = assets.style('Notes', fontSize=7, leading=9, textColor=Colors.TEXT_MUTED)
+    check_style = assets.style('Check', fontSize=9, alignment=TA_CENTER)
     
     for idx, res in enumerate(reservations, 1):
         client_name = res.get('client_name', 'Cliente')
@@ -1040,7 +974,7 @@ def generate_driver_manifest(
                 # Column 3: Phone (BIG)
                 Paragraph(f"<b>📞 {client_phone}</b>", phone_style),
                 # Column 4: Spaces
-                Paragraph(f"<font size='7'>Espacios</font><br/><b>{spaces_str}</b>", ParagraphStyle('Sp', fontSize=9, alignment=TA_CENTER)),
+                Paragraph(f"<font size='7'>Espacios</font><br/><b>{spaces_str}</b>", assets.style('Sp', fontSize=9, alignment=TA_CENTER)),
             ],
             [
                 Paragraph("", check_style),
@@ -1088,13 +1022,13 @@ def generate_driver_manifest(
         f"<b>Total entregas:</b> {len(reservations)} | "
         f"<b>Espacios ocupados:</b> {reserved_spaces}/{total_spaces} | "
         f"<b>Disponibles:</b> {available_spaces}",
-        ParagraphStyle('SummaryLine', fontSize=9)
+        assets.style('SummaryLine', fontSize=9)
     )
     elements.append(summary)
     elements.append(Spacer(1, 15))
     
     # =========== SIGNATURES ===========
-    elements.append(Paragraph("<b>FIRMAS</b>", ParagraphStyle('SectionTitle', fontSize=10, textColor=Colors.BRAND_SECONDARY)))
+    elements.append(Paragraph("<b>FIRMAS</b>", assets.style('SectionTitle', fontSize=10, textColor=Colors.BRAND_SECONDARY)))
     elements.append(Spacer(1, 8))
     
     sig_data = [
@@ -1135,17 +1069,81 @@ def generate_driver_manifest(
     elements.append(Spacer(1, 8))
     
     # =========== FOOTER ===========
-    qr_buffer = generate_qr_code(f"trip:{trip_id}", box_size=5)
-    qr_img = Image(qr_buffer, width=0.6*inch, height=0.6*inch)
+    qr_img = assets.qr(f"trip:{trip_id}", box_size=5, size=0.6*inch)
     
     footer_text = Paragraph(
-        f"<font size='6' color='#6c757d'>ID: {trip_id[:16]} | Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')}</font>",
-        ParagraphStyle('FooterText', fontSize=6)
+        f"<font size='6' color='#6c757d'>ID: {trip_id[:16]}</font>",
+        assets.style('FooterText', fontSize=6)
     )
     
     footer_row = Table([[footer_text, qr_img]], colWidths=[6.9*inch, 0.6*inch])
     footer_row.setStyle(TableStyle([('VALIGN', (0, 0), (-1, -1), 'MIDDLE')]))
     elements.append(footer_row)
     
-    doc.build(elements)
+    return elements
+
+
+MANIFEST_BUILDERS = {
+    "office": trip_manifest_elements,
+    "driver": driver_manifest_elements,
+}
+
+
+def _manifest_document(target) -> SimpleDocTemplate:
+    return SimpleDocTemplate(
+        target,
+        pagesize=letter,
+        leftMargin=0.4*inch,
+        rightMargin=0.4*inch,
+        topMargin=0.3*inch,
+        bottomMargin=0.3*inch
+    )
+
+
+def generate_trip_manifest(trip_id: str, output_path: Optional[str] = None, **manifest) -> str:
+    """
+    Generate trip manifest PDF (arguments as in `trip_manifest_elements`).
+    Returns the path to the generated file relative to upload_dir, or
+    `output_path` when given.
+    """
+    if output_path:
+        _manifest_document(output_path).build(trip_manifest_elements(trip_id=trip_id, **manifest))
+        return output_path
+    manifests_dir = Path(settings.upload_dir) / 'manifests'
+    manifests_dir.mkdir(parents=True, exist_ok=True)
+
+    filename = f"manifest_{trip_id}.pdf"
+    _manifest_document(str(manifests_dir / filename)).build(trip_manifest_elements(trip_id=trip_id, **manifest))
     return f"manifests/{filename}"
+
+
+def generate_driver_manifest(trip_id: str, output_path: Optional[str] = None, **manifest) -> str:
+    """
+    Generate driver manifest PDF (arguments as in `driver_manifest_elements`).
+    Returns the path to the generated file relative to upload_dir, or
+    `output_path` when given.
+    """
+    if output_path:
+        _manifest_document(output_path).build(driver_manifest_elements(trip_id=trip_id, **manifest))
+        return output_path
+    manifests_dir = Path(settings.upload_dir) / 'manifests'
+    manifests_dir.mkdir(parents=True, exist_ok=True)
+
+    filename = f"manifest_driver_{trip_id}.pdf"
+    _manifest_document(str(manifests_dir / filename)).build(driver_manifest_elements(trip_id=trip_id, **manifest))
+    return f"manifests/{filename}"
+
+
+def render_manifests(manifests: list[tuple[str, dict]]) -> bytes:
+    """
+    Render manifests in memory as one PDF, each starting on a new page.
+    `manifests` is a list of (kind, arguments) with kind "office" or "driver".
+    """
+    elements = []
+    for kind, manifest in manifests:
+        if elements:
+            elements.append(PageBreak())
+        elements.extend(MANIFEST_BUILDERS[kind](**manifest))
+    buffer = BytesIO()
+    _manifest_document(buffer).build(elements)
+    return buffer.getvalue()
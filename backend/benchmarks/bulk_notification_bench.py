@@ -0,0 +1,97 @@
+"""
+Benchmark: in-app notification fan-out, per recipient vs. bulk.
+
+Seeds N active clients and notifies all of them twice, both times through
+the notification outbox and the real delivery code:
+- per recipient: one `send_in_app` per client (one outbox row, one
+  Notification INSERT and commit each), as the notify_* loops used to do
+- bulk: one `send_in_app_bulk` (one outbox row, one multi-row INSERT)
+
+Usage (from backend/):
+    python -m benchmarks.bulk_notification_bench
+    python -m benchmarks.bulk_notification_bench --recipients 5000 --url postgresql+asyncpg://...
+
+The default database is a throwaway SQLite file.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.database
+from app.models.base import Base
+from app.models.notification import Notification
+from app.models.notification_outbox import NotificationOutbox
+from app.models.user import User, UserRole
+from app.services.notification_outbox import notification_outbox
+from app.services.notification_service import NotificationService
+
+
+async def _drain_outbox() -> None:
+    while await notification_outbox.process_batch():
+        pass
+
+
+async def main(recipients: int, url: str) -> None:
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            # Other tables use PostgreSQL-only column types
+            tables = [m.__table__ for m in (User, Notification, NotificationOutbox)]
+            await conn.run_sync(lambda c: Base.metadata.create_all(c, tables=tables))
+        else:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    app.database.AsyncSessionLocal = Session
+    notification_outbox.session_factory = Session
+    notification_outbox.batch_size = 100
+
+    service = NotificationService()
+    notification_outbox.deliver = service.deliver
+
+    user_ids = [uuid.uuid4() for _ in range(recipients)]
+    async with Session() as db:
+        await db.execute(insert(User), [
+            {"id": user_id, "email": f"bench{n}@example.com", "hashed_password": "x",
+             "full_name": f"Cliente {n}", "role": UserRole.client, "is_active": True}
+            for n, user_id in enumerate(user_ids)
+        ])
+        await db.commit()
+
+    counts = {"statements": 0, "commits": 0}
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: counts.__setitem__("statements", counts["statements"] + 1))
+    event.listen(engine.sync_engine, "commit", lambda *args: counts.__setitem__("commits", counts["commits"] + 1))
+
+    async def per_recipient():
+        for user_id in user_ids:
+            await service.send_in_app(str(user_id), "Espacios Disponibles", "Nuevos espacios", "/trips", "success")
+
+    async def bulk():
+        await service.send_in_app_bulk(user_ids, "Espacios Disponibles", "Nuevos espacios", "/trips", "success")
+
+    print(f"{'fan-out':>14} {'recipients':>11} {'statements':>11} {'commits':>8} {'seconds':>8}")
+    for name, enqueue in (("per-recipient", per_recipient), ("bulk", bulk)):
+        counts.update(statements=0, commits=0)
+        started = time.perf_counter()
+        await enqueue()
+        await _drain_outbox()
+        elapsed = time.perf_counter() - started
+        print(f"{name:>14} {recipients:>11} {counts['statements']:>11} {counts['commits']:>8} {elapsed:>8.2f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipients", type=int, default=5000)
+    parser.add_argument("--url", help="Async SQLAlchemy URL of a scratch database (it is wiped)")
+    args = parser.parse_args()
+    url = args.url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    asyncio.run(main(args.recipients, url))
@@ -0,0 +1,120 @@
+"""
+Benchmark: latency of unrelated requests during a login storm.
+
+Fires N concurrent `POST /api/v1/auth/login` against the app (in-process,
+over httpx's ASGI transport) while a probe keeps calling `GET /health`, and
+reports the probe's p50/p99 latency (from when each probe was due). Runs twice: verifying bcrypt inline on
+the event loop (the old behaviour) and on the password thread pool.
+
+Usage (from backend/):
+    python -m benchmarks.login_storm_bench
+    python -m benchmarks.login_storm_bench --logins 100 --rounds 12
+
+The database is a throwaway SQLite file.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+import httpx
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.deps import get_db_session
+from app.core import security
+from app.main import app
+from app.models.base import Base
+from app.models.user import User, UserRole
+from app.services import user_service
+
+PASSWORD = "password123"
+
+
+async def _inline_verify(plain_password, hashed_password):
+    return security.pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+async def _seed(Session, count: int, hashed: str):
+    emails = [f"storm_{n}_{uuid.uuid4().hex[:6]}@example.com" for n in range(count)]
+    async with Session() as db:
+        await db.execute(insert(User).values([
+            dict(id=uuid.uuid4(), email=email, hashed_password=hashed, full_name="Storm", role=UserRole.client)
+            for email in emails
+        ]))
+        await db.commit()
+    return emails
+
+
+async def _storm(emails, probe_interval: float):
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        done = asyncio.Event()
+
+        async def probe():
+            while not done.is_set():
+                # Measured from when the request was due, so time spent waiting
+                # for a blocked event loop counts, as it would for a real client
+                due = time.perf_counter() + probe_interval
+                await asyncio.sleep(probe_interval)
+                await client.get("/health")
+                latencies.append(time.perf_counter() - due)
+
+        async def logins():
+            responses = await asyncio.gather(*(
+                client.post("/api/v1/auth/login", json={"email": e, "password": PASSWORD}) for e in emails
+            ))
+            done.set()
+            assert all(r.status_code == 200 for r in responses), "login failed"
+
+        started = time.perf_counter()
+        await asyncio.gather(probe(), logins())
+        return time.perf_counter() - started, latencies
+
+
+async def main(logins: int, rounds: int, probe_ms: float) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "storm.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        # Other tables use PostgreSQL-only column types
+        await conn.run_sync(lambda c: Base.metadata.create_all(c, tables=[User.__table__]))
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def session():
+        async with Session() as db:
+            yield db
+
+    app.dependency_overrides[get_db_session] = session
+    # Hash with the configured cost so no login triggers a rehash
+    security.pwd_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds, bcrypt__max_rounds=rounds)
+    hashed = security.pwd_context.hash(PASSWORD)
+
+    pooled_verify = user_service.verify_and_update_password
+    print(f"{'bcrypt':>8} {'logins':>7} {'seconds':>8} {'probes':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, verify in (("inline", _inline_verify), ("pool", pooled_verify)):
+        user_service.verify_and_update_password = verify
+        emails = await _seed(Session, logins, hashed)
+        elapsed, latencies = await _storm(emails, probe_ms / 1000)
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(
+            f"{name:>8} {logins:>7} {elapsed:>8.2f} {len(latencies):>7} "
+            f"{statistics.median(latencies) * 1000:>8.1f} {p99 * 1000:>8.1f}"
+        )
+    user_service.verify_and_update_password = pooled_verify
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--probe-ms", type=float, default=10.0, help="Pause between /health probes")
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.rounds, args.probe_ms))
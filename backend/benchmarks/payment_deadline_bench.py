@@ -0,0 +1,109 @@
+"""
+Benchmark: set-based payment-deadline cancellation.
+
+Seeds N overdue pending reservations (one space each) and runs
+`cancel_unpaid_reservations`, counting the SQL statements it sends,
+including the two outbox rows (in-app and e-mail) queued per cancelled
+reservation in the same transaction. The cancellation itself is a fixed
+number of statements whether N is 10 or 10,000; the outbox rows are sent
+as multi-row INSERTs of up to 1,000 rows, so they add one statement per
+500 cancelled reservations.
+
+Usage (from backend/):
+    python -m benchmarks.payment_deadline_bench
+    python -m benchmarks.payment_deadline_bench --sizes 100 10000 --url postgresql+asyncpg://...
+
+The default database is a throwaway SQLite file. Notifications are only
+queued in the outbox; no outbox worker runs, so nothing is delivered.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+from app.models.notification_outbox import NotificationOutbox
+from app.models.reservation import Reservation, PaymentMethod, PaymentStatus, ReservationStatus
+from app.models.reservation_space import ReservationSpace
+from app.models.space import Space, SpaceStatus
+from app.models.trip import Trip
+from app.models.trip_space_counts import TripSpaceCounts
+from app.models.user import User, UserRole
+from app.tasks import payment_deadline
+
+
+async def _seed(Session, count: int) -> None:
+    async with Session() as db:
+        user_id, trip_id = uuid.uuid4(), uuid.uuid4()
+        await db.execute(insert(User).values(
+            id=user_id, email=f"bench_{user_id.hex[:8]}@example.com", hashed_password="x",
+            full_name="Bench Client", role=UserRole.client,
+        ))
+        await db.execute(insert(Trip).values(
+            id=trip_id, origin="A", destination="B", departure_date=date.today() + timedelta(days=3),
+            total_spaces=count, price_per_space=100, payment_deadline_hours=24,
+        ))
+        created_at = datetime.now(timezone.utc) - timedelta(hours=48)
+        spaces, reservations, links = [], [], []
+        for n in range(1, count + 1):
+            space_id, reservation_id = uuid.uuid4(), uuid.uuid4()
+            spaces.append(dict(id=space_id, trip_id=trip_id, space_number=n, status=SpaceStatus.reserved, price=100))
+            reservations.append(dict(
+                id=reservation_id, client_id=user_id, trip_id=trip_id, status=ReservationStatus.pending,
+                payment_method=PaymentMethod.bank_transfer, payment_status=PaymentStatus.unpaid,
+                subtotal=100, tax_amount=0, total_amount=100, discount_amount=0, created_at=created_at,
+            ))
+            links.append(dict(id=uuid.uuid4(), reservation_id=reservation_id, space_id=space_id))
+        await db.execute(insert(Space), spaces)
+        await db.execute(insert(Reservation), reservations)
+        await db.execute(insert(ReservationSpace), links)
+        await db.commit()
+
+
+async def main(sizes, url):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            # Other tables use PostgreSQL-only column types
+            models = (User, Trip, TripSpaceCounts, Space, Reservation, ReservationSpace, NotificationOutbox)
+            tables = [m.__table__ for m in models]
+            await conn.run_sync(lambda c: Base.metadata.create_all(c, tables=tables))
+        else:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    print(f"{'pending':>8} {'cancelled':>10} {'queued':>8} {'statements':>11} {'seconds':>9}")
+    for size in sizes:
+        await _seed(Session, size)
+        statements.clear()
+        started = time.perf_counter()
+        cancelled = await payment_deadline.cancel_unpaid_reservations(Session)
+        elapsed = time.perf_counter() - started
+        job_statements = len(statements)
+        async with Session() as db:
+            queued = await db.scalar(select(func.count()).select_from(NotificationOutbox))
+            await db.execute(NotificationOutbox.__table__.delete())
+            await db.commit()
+        print(f"{size:>8} {cancelled:>10} {queued:>8} {job_statements:>11} {elapsed:>9.3f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--url", help="Async SQLAlchemy URL of a scratch database (it is wiped)")
+    args = parser.parse_args()
+    url = args.url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    asyncio.run(main(args.sizes, url))
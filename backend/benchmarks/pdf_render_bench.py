@@ -0,0 +1,92 @@
+"""
+Benchmark: event-loop latency while manifests render.
+
+Fires N concurrent office-manifest "downloads" and, meanwhile, measures how
+late a 10 ms heartbeat on the same event loop wakes up. Rendering inline
+(what the handlers used to do) is compared against `PDFRenderer`.
+
+Usage (from backend/):
+    python -m benchmarks.pdf_render_bench
+    python -m benchmarks.pdf_render_bench --downloads 16 --reservations 60 --workers 4
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+from app.config import settings
+from app.services.pdf_renderer import PDFRenderer
+from app.utils.pdf_generator import generate_trip_manifest
+
+
+def _manifest(n: int, reservations: int) -> dict:
+    return dict(
+        trip_id=f"00000000-0000-4000-8000-{n:012d}",
+        origin="Monterrey",
+        destination="Laredo",
+        departure_date="01/12/2026",
+        departure_time="08:00",
+        truck_plate="ABC-123",
+        trailer_plate="XYZ-789",
+        driver_name="Chofer",
+        driver_phone="8110000000",
+        total_spaces=28,
+        reservations=[
+            {"client_name": f"Cliente {r}", "client_phone": "8111111111", "space_numbers": [r],
+             "payment_status": "paid", "total_amount": 100.0}
+            for r in range(1, reservations + 1)
+        ],
+    )
+
+
+async def _measure(downloads, render) -> tuple:
+    lags = []
+    done = asyncio.Event()
+
+    async def heartbeat():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append((time.perf_counter() - started - 0.01) * 1000)
+
+    probe = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    await asyncio.gather(*(render(kwargs) for kwargs in downloads))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe
+    lags.sort()
+    return elapsed, lags[int(0.95 * (len(lags) - 1))], lags[-1], statistics.mean(lags)
+
+
+async def main(count: int, reservations: int, workers: int) -> None:
+    settings.upload_dir = tempfile.mkdtemp()
+    downloads = [_manifest(n, reservations) for n in range(count)]
+
+    async def inline(kwargs):
+        await asyncio.sleep(0)  # request arrives, then the handler renders synchronously
+        generate_trip_manifest(**kwargs)
+
+    renderer = PDFRenderer(workers=workers, timeout=120)
+    renderer.start()
+    await renderer.render(generate_trip_manifest, **downloads[0])  # warm up the worker processes
+
+    async def pooled(kwargs):
+        await renderer.render(generate_trip_manifest, **kwargs)
+
+    print(f"{'renderer':>10} {'downloads':>10} {'seconds':>8} {'lag p95 ms':>11} {'lag max ms':>11} {'lag avg ms':>11}")
+    for name, render in (("inline", inline), (f"pool x{workers}", pooled)):
+        elapsed, p95, worst, mean = await _measure(downloads, render)
+        print(f"{name:>10} {count:>10} {elapsed:>8.2f} {p95:>11.1f} {worst:>11.1f} {mean:>11.1f}")
+    renderer.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--downloads", type=int, default=8)
+    parser.add_argument("--reservations", type=int, default=28)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    asyncio.run(main(args.downloads, args.reservations, args.workers))
@@ -0,0 +1,76 @@
+"""
+Microbenchmark: PDF renders per second on one core.
+
+Renders each document type repeatedly in this process (no pool, no cache)
+with realistic inputs and prints renders/sec. Every render gets a distinct
+reservation/trip id, as in production.
+
+Usage (from backend/):
+    python -m benchmarks.pdf_throughput_bench
+    python -m benchmarks.pdf_throughput_bench --seconds 5 --reservations 28
+"""
+import argparse
+import tempfile
+import time
+import uuid
+from decimal import Decimal
+
+from app.config import settings
+from app.utils import pdf_generator
+
+
+def _ticket(n: int) -> dict:
+    return dict(
+        reservation_id=str(uuid.UUID(int=n)), client_name="Cliente Ejemplo", client_email="cliente@example.com",
+        trip_origin="Monterrey", trip_destination="Laredo", departure_date="2026-12-01", departure_time="08:00",
+        space_numbers=[3, 4, 5], subtotal=Decimal("300"), tax_amount=Decimal("48"), total_amount=Decimal("348"),
+        payment_method="Transferencia Bancaria", cargo_description="10x Aguacate", pdf_config={},
+    )
+
+
+def _summary(n: int) -> dict:
+    kwargs = _ticket(n)
+    kwargs.pop("cargo_description")
+    return dict(kwargs, bank_details_invoice="BBVA 0123", bank_details_no_invoice="Banorte 4567")
+
+
+def _manifest(n: int, reservations: int) -> dict:
+    return dict(
+        trip_id=str(uuid.UUID(int=n)), origin="Monterrey", destination="Laredo", departure_date="01/12/2026",
+        departure_time="08:00", truck_plate="ABC-123", trailer_plate="XYZ-789", driver_name="Chofer",
+        driver_phone="8110000000", total_spaces=28, pdf_config={},
+        reservations=[
+            {"client_name": f"Cliente {r}", "client_phone": "8111111111", "client_email": f"c{r}@example.com",
+             "space_numbers": [r], "payment_status": "paid", "total_amount": 100.0,
+             "items": [{"product_name": "Aguacate", "box_count": 10, "total_weight": 200.0}],
+             "pickup_address": "Calle 1", "notes": ""}
+            for r in range(1, reservations + 1)
+        ],
+    )
+
+
+def main(seconds: float, reservations: int) -> None:
+    settings.upload_dir = tempfile.mkdtemp()
+    documents = {
+        "ticket": (pdf_generator.generate_reservation_ticket, _ticket),
+        "summary": (pdf_generator.generate_pre_reservation_summary, _summary),
+        "manifest": (pdf_generator.generate_trip_manifest, lambda n: _manifest(n, reservations)),
+        "driver": (pdf_generator.generate_driver_manifest, lambda n: _manifest(n, reservations)),
+    }
+    print(f"{'document':>10} {'renders':>8} {'renders/s/core':>15} {'ms/render':>10}")
+    for name, (generate, make_kwargs) in documents.items():
+        generate(**make_kwargs(0))  # warm up imports and font metrics
+        count, started = 0, time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            count += 1
+            generate(**make_kwargs(count))
+        elapsed = time.perf_counter() - started
+        print(f"{name:>10} {count:>8} {count / elapsed:>15.1f} {1000 * elapsed / count:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=3.0, help="Time spent on each document type")
+    parser.add_argument("--reservations", type=int, default=28, help="Reservations per manifest")
+    args = parser.parse_args()
+    main(args.seconds, args.reservations)
@@ -0,0 +1,59 @@
+"""
+Benchmark: pooled SMTP sending vs. one connection per email.
+
+Starts the in-process SMTP stub from the test suite with a simulated
+handshake delay and sends the same burst twice: through `SMTPPool`, and
+opening a fresh aiosmtplib connection for every message (what the old
+FastAPI-Mail sender did). Prints emails/sec and connections opened.
+
+Usage (from backend/):
+    python -m benchmarks.smtp_pool_bench
+    python -m benchmarks.smtp_pool_bench --emails 500 --handshake-ms 50 --pool-size 5
+"""
+import argparse
+import asyncio
+import time
+
+import aiosmtplib
+
+from app.services.smtp_pool import SMTPPool
+from tests.smtp_stub import SMTPStub
+
+
+async def _per_message(server: SMTPStub, messages, concurrency: int) -> None:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def send(message):
+        async with slots:
+            await aiosmtplib.send(message, hostname="127.0.0.1", port=server.port, start_tls=False)
+
+    await asyncio.gather(*(send(m) for m in messages))
+
+
+async def _pooled(server: SMTPStub, messages, size: int) -> None:
+    pool = SMTPPool(hostname="127.0.0.1", port=server.port, start_tls=False, size=size)
+    await asyncio.gather(*(pool.send(m) for m in messages))
+    await pool.close()
+
+
+async def main(emails: int, handshake_ms: float, pool_size: int) -> None:
+    builder = SMTPPool(hostname="127.0.0.1", port=0)
+    messages = [builder.build_message(f"Aviso {n}", [f"cliente{n}@example.com"], "<p>Hola</p>") for n in range(emails)]
+
+    print(f"{'sender':>12} {'emails':>7} {'connections':>12} {'seconds':>8} {'emails/s':>9}")
+    for name, run in (("per-message", _per_message), ("pooled", _pooled)):
+        server = await SMTPStub(connect_delay=handshake_ms / 1000).start()
+        started = time.perf_counter()
+        await run(server, messages, pool_size)
+        elapsed = time.perf_counter() - started
+        await server.stop()
+        print(f"{name:>12} {len(server.messages):>7} {server.connections:>12} {elapsed:>8.3f} {emails / elapsed:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--emails", type=int, default=300)
+    parser.add_argument("--handshake-ms", type=float, default=30.0, help="Simulated connect/TLS/AUTH cost")
+    parser.add_argument("--pool-size", type=int, default=3, help="Pool size, and concurrency of the per-message sender")
+    args = parser.parse_args()
+    asyncio.run(main(args.emails, args.handshake_ms, args.pool_size))
@@ -34,7 +34,7 @@ from sqlalchemy.orm import sessionmaker
 from app.main import app
 from app.config import settings
 from app.database import get_db
-from app.api.deps import get_db_session
+from app.api.deps import get_db_session, get_read_db_session
 
 # Import models to register them with Base.metadata
 from app.models.base import Base
@@ -96,6 +96,19 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:
         # Rollback is handled by session context usually, but explicitly:
         await session.rollback()
 
+@pytest_asyncio.fixture
+async def session_factory(tmp_path) -> AsyncGenerator[sessionmaker, None]:
+    """
+    Session factory on a fresh file-backed SQLite database, for code that
+    opens its own sessions (services, jobs, workers): unlike the in-memory
+    engine, every session gets its own connection.
+    """
+    file_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with file_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(bind=file_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+    await file_engine.dispose()
+
 @pytest_asyncio.fixture(scope="function")
 async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
     """
@@ -106,6 +119,7 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
 
     app.dependency_overrides[get_db] = override_get_db
     app.dependency_overrides[get_db_session] = override_get_db
+    app.dependency_overrides[get_read_db_session] = override_get_db
     
     async with AsyncClient(app=app, base_url="http://test", follow_redirects=True) as ac:
         yield ac
@@ -218,9 +232,11 @@ def mock_notification_service(monkeypatch):
     monkeypatch.setattr(notification_service, "notify_payment_pending", AsyncMock())
     monkeypatch.setattr(notification_service, "notify_payment_rejected", AsyncMock())
     monkeypatch.setattr(notification_service, "notify_reservation_cancelled", AsyncMock())
+    monkeypatch.setattr(notification_service, "notify_payment_deadline_expired", AsyncMock())
     monkeypatch.setattr(notification_service, "notify_trip_cancelled", AsyncMock())
     monkeypatch.setattr(notification_service, "notify_space_available", AsyncMock())
     monkeypatch.setattr(notification_service, "notify_new_user", AsyncMock())
     monkeypatch.setattr(notification_service, "send_email", AsyncMock())
     monkeypatch.setattr(notification_service, "send_in_app", AsyncMock())
+    monkeypatch.setattr(notification_service, "send_in_app_bulk", AsyncMock())
     monkeypatch.setattr(notification_service, "send_data_update", AsyncMock())
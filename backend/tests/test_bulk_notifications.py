@@ -0,0 +1,81 @@
+import json
+import uuid
+from datetime import date, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, func, insert, select
+
+import app.database
+from app.api.v1.endpoints.notifications import manager
+from app.models.notification import Notification
+from app.models.notification_outbox import NotificationOutbox, OutboxStatus
+from app.models.trip import Trip
+from app.models.user import User, UserRole
+from app.services.notification_outbox import notification_outbox
+from app.services.notification_service import NotificationService
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+@pytest_asyncio.fixture
+async def session_factory(session_factory, monkeypatch):
+    monkeypatch.setattr(app.database, "AsyncSessionLocal", session_factory)
+    monkeypatch.setattr(notification_outbox, "session_factory", session_factory)
+    return session_factory
+
+
+@pytest.mark.asyncio
+async def test_space_available_fans_out_in_one_insert(session_factory):
+    service = NotificationService()
+    clients = [uuid.uuid4() for _ in range(50)]
+    async with session_factory() as db:
+        await db.execute(insert(User), [
+            {"id": user_id, "email": f"bulk{n}@example.com", "hashed_password": "x",
+             "full_name": f"Cliente {n}", "role": UserRole.client, "is_active": True}
+            for n, user_id in enumerate(clients)
+        ])
+        trip = Trip(id=uuid.uuid4(), origin="A", destination="B",
+                    departure_date=date.today() + timedelta(days=2), total_spaces=1, price_per_space=100)
+        db.add(trip)
+        await db.commit()
+
+    socket = FakeSocket()
+    await manager.connect(socket, str(clients[0]))
+    try:
+        await service.notify_space_available(trip)
+
+        statements = []
+        sync_engine = session_factory.kw["bind"].sync_engine
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(sync_engine, "before_cursor_execute", listener)
+        try:
+            notification_outbox.deliver = service.deliver
+            assert await notification_outbox.process_batch() == 1
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", listener)
+        await manager.drain()
+    finally:
+        manager.disconnect(socket, str(clients[0]))
+
+    async with session_factory() as db:
+        saved = await db.scalar(select(func.count()).select_from(Notification))
+        outbox = (await db.execute(select(NotificationOutbox))).scalars().all()
+
+    assert saved == 50
+    assert [row.status for row in outbox] == [OutboxStatus.sent]
+    # claim + one INSERT for all recipients + status update
+    assert sum(s.lstrip().upper().startswith("INSERT INTO NOTIFICATIONS") for s in statements) == 1
+    assert socket.sent[0]["payload"]["title"] == "Espacios Disponibles"
@@ -0,0 +1,122 @@
+import uuid
+from datetime import date, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, update
+
+from app.models.reservation import Reservation, PaymentMethod, PaymentStatus
+from app.models.revenue_total import RevenueTotal
+from app.models.trip import Trip
+from app.models.user import User, UserRole
+from app.services.dashboard_stats import dashboard_stats
+from app.services.revenue_totals import revenue_totals
+
+
+@pytest_asyncio.fixture
+async def session_factory(session_factory):
+    dashboard_stats.invalidate()
+    yield session_factory
+    dashboard_stats.invalidate()
+
+
+async def _seed(db, amounts, currency="MXN"):
+    user = User(
+        id=uuid.uuid4(),
+        email=f"dash_{uuid.uuid4().hex[:8]}@example.com",
+        hashed_password="x",
+        full_name="Dashboard Client",
+        role=UserRole.client,
+    )
+    trip = Trip(
+        id=uuid.uuid4(),
+        origin="A",
+        destination="B",
+        departure_date=date.today() + timedelta(days=2),
+        total_spaces=10,
+        price_per_space=100,
+        currency=currency,
+    )
+    db.add_all([user, trip])
+    await db.flush()
+    reservations = [
+        Reservation(
+            id=uuid.uuid4(),
+            client_id=user.id,
+            trip_id=trip.id,
+            payment_method=PaymentMethod.bank_transfer,
+            payment_status=PaymentStatus.pending_review,
+            subtotal=amount,
+            total_amount=amount,
+        )
+        for amount in amounts
+    ]
+    db.add_all(reservations)
+    await db.commit()
+    return reservations
+
+
+async def _revenue(db):
+    rows = await db.execute(select(RevenueTotal.currency, RevenueTotal.amount))
+    return {currency: float(amount) for currency, amount in rows.all()}
+
+
+@pytest.mark.asyncio
+async def test_revenue_follows_payment_events(session_factory):
+    async with session_factory() as db:
+        mxn = await _seed(db, [100, 250])
+        usd = await _seed(db, [40], currency="USD")
+        assert await _revenue(db) == {}
+
+        # Payment confirmations
+        for reservation in (*mxn, *usd):
+            reservation.payment_status = PaymentStatus.paid
+        await db.commit()
+        assert await _revenue(db) == {"MXN": 350.0, "USD": 40.0}
+
+        # Rejection after approval and deletion of a paid reservation
+        mxn[0].payment_status = PaymentStatus.unpaid
+        await db.delete(usd[0])
+        await db.commit()
+        assert await _revenue(db) == {"MXN": 250.0, "USD": 0.0}
+
+
+@pytest.mark.asyncio
+async def test_currency_change_moves_revenue_and_repair_fixes_drift(session_factory):
+    async with session_factory() as db:
+        [reservation] = await _seed(db, [120])
+        reservation.payment_status = PaymentStatus.paid
+        await db.commit()
+        assert await _revenue(db) == {"MXN": 120.0}
+
+        trip = await db.get(Trip, reservation.trip_id)
+        trip.currency = "USD"
+        await db.commit()
+        assert await _revenue(db) == {"MXN": 0.0, "USD": 120.0}
+
+        # Drift from a write that bypassed the session
+        await db.execute(update(RevenueTotal).values(amount=999))
+        await db.commit()
+
+    assert await revenue_totals.repair(session_factory) == 2
+    async with session_factory() as db:
+        assert await _revenue(db) == {"MXN": 0.0, "USD": 120.0}
+
+
+@pytest.mark.asyncio
+async def test_stats_are_cached_until_revenue_changes(session_factory):
+    async with session_factory() as db:
+        [reservation] = await _seed(db, [500])
+
+        first = await dashboard_stats.get(db)
+        assert first["pending_payments"] == 1
+        assert first["total_revenue"] == 0
+        assert await dashboard_stats.get(db) is first
+
+        reservation.payment_status = PaymentStatus.paid
+        await db.commit()
+
+        second = await dashboard_stats.get(db)
+        assert second is not first
+        assert second["revenue_by_currency"] == {"total": {"MXN": 500.0}, "monthly": {"MXN": 500.0}}
+        assert second["pending_payments"] == 0
@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import settings
+from app.core.db_pool import InstrumentedPool, engine_options, pool_metrics
+
+
+def test_postgres_engines_get_configured_pool():
+    options = engine_options("postgresql+asyncpg://u:p@db:5432/app")
+    assert options["poolclass"] is InstrumentedPool
+    assert options["pool_size"] == settings.db_pool_size
+    assert options["max_overflow"] == settings.db_max_overflow
+    assert options["pool_pre_ping"] is settings.db_pool_pre_ping
+    assert options["connect_args"]["statement_cache_size"] == settings.db_statement_cache_size
+    assert options["echo"] is settings.sql_echo
+
+    assert "poolclass" not in engine_options("sqlite+aiosqlite:///:memory:")
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics_track_checkouts_and_timeouts(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedPool, pool_size=1, max_overflow=0, pool_timeout=0.1,
+    )
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            busy = pool_metrics(engine)
+            with pytest.raises(PoolTimeoutError):
+                async with engine.connect():
+                    pass
+
+        metrics = pool_metrics(engine)
+        assert busy["checked_out"] == 1
+        assert busy["saturation"] == 1.0
+        assert metrics["checked_out"] == 0
+        assert metrics["checkouts"] == 1
+        assert metrics["timeouts"] == 1
+        assert metrics["wait_ms_max"] >= 0
+    finally:
+        await engine.dispose()
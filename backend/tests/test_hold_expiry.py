@@ -0,0 +1,110 @@
+import asyncio
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.spaces import space_ws_manager
+from app.models.space import Space, SpaceStatus
+from app.models.trip import Trip
+from app.models.user import User, UserRole
+from app.services.hold_deadlines import hold_deadlines
+from app.tasks.hold_expiration import HoldExpiryTimer, release_expired_holds
+
+
+@pytest.fixture
+def session_factory(db_session):
+    return sessionmaker(bind=db_session.bind, class_=AsyncSession, expire_on_commit=False)
+
+
+async def _seed_holds(db_session, expires_at: datetime, held: int = 3, spaces: int = 5):
+    user = User(
+        id=uuid.uuid4(),
+        email=f"expiry_{uuid.uuid4().hex[:8]}@example.com",
+        hashed_password="x",
+        full_name="Expiry Client",
+        role=UserRole.client,
+    )
+    trip = Trip(
+        id=uuid.uuid4(),
+        origin="A",
+        destination="B",
+        departure_date=date.today() + timedelta(days=1),
+        total_spaces=spaces,
+        price_per_space=100,
+    )
+    db_session.add_all([user, trip])
+    await db_session.flush()
+    db_session.add_all([
+        Space(
+            id=uuid.uuid4(),
+            trip_id=trip.id,
+            space_number=n,
+            status=SpaceStatus.on_hold if n <= held else SpaceStatus.available,
+            held_by=user.id if n <= held else None,
+            hold_expires_at=expires_at if n <= held else None,
+            price=100,
+        )
+        for n in range(1, spaces + 1)
+    ])
+    await db_session.commit()
+    return trip
+
+
+async def _statuses(session_factory, trip_id):
+    async with session_factory() as db:
+        result = await db.execute(select(Space.status).where(Space.trip_id == trip_id))
+        return sorted(s.value for s in result.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_bulk_release_batches_one_update_per_trip(db_session, session_factory):
+    trip = await _seed_holds(db_session, datetime.now(timezone.utc) - timedelta(seconds=1))
+
+    assert await release_expired_holds(session_factory) == 3
+    assert await _statuses(session_factory, trip.id) == ["available"] * 5
+    assert len(space_ws_manager.pending_updates[str(trip.id)]) == 3
+
+    # Nothing left to release: a second run is a no-op
+    assert await release_expired_holds(session_factory) == 0
+    await space_ws_manager.flush()
+
+
+@pytest.mark.asyncio
+async def test_timer_releases_holds_shortly_after_deadline(db_session, session_factory):
+    trip = await _seed_holds(db_session, datetime.now(timezone.utc) + timedelta(seconds=0.3))
+    timer = HoldExpiryTimer(session_factory, slack_seconds=0.05)
+    await timer.start()
+    try:
+        # Loaded from the database at startup
+        assert len(timer._deadlines) >= 1
+        await asyncio.sleep(0.1)
+        assert await _statuses(session_factory, trip.id) == ["available"] * 2 + ["on_hold"] * 3
+
+        await asyncio.sleep(0.5)
+        assert await _statuses(session_factory, trip.id) == ["available"] * 5
+    finally:
+        await timer.stop()
+        await space_ws_manager.flush()
+
+
+@pytest.mark.asyncio
+async def test_timer_takes_published_deadlines_in_any_timezone(db_session, session_factory):
+    timer = HoldExpiryTimer(session_factory, slack_seconds=0.05)
+    await timer.start()
+    try:
+        trip = await _seed_holds(db_session, datetime.now(timezone.utc) + timedelta(seconds=0.2))
+        # The same instant as an aware non-UTC time and as naive UTC: no mixed-type comparisons
+        deadline = datetime.now(timezone.utc) + timedelta(seconds=0.2)
+        hold_deadlines.publish(deadline.astimezone(timezone(timedelta(hours=-6))))
+        timer.schedule(deadline.replace(tzinfo=None))
+        assert all(d.tzinfo is timezone.utc for d in timer._deadlines)
+
+        await asyncio.sleep(0.5)
+        assert await _statuses(session_factory, trip.id) == ["available"] * 5
+    finally:
+        await timer.stop()
+        await space_ws_manager.flush()
@@ -0,0 +1,97 @@
+import io
+import uuid
+import zipfile
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from app.models.load_item import LoadItem
+from app.models.reservation import Reservation, PaymentMethod, PaymentStatus
+from app.models.reservation_space import ReservationSpace
+from app.models.space import Space, SpaceStatus
+from app.models.trip import Trip, TripStatus
+from app.models.user import User, UserRole
+from app.services import manifest_service
+from app.services.pdf_renderer import PDFRenderer
+
+
+@pytest.fixture(autouse=True)
+def inline_renderer(monkeypatch):
+    monkeypatch.setattr(manifest_service, "pdf_renderer", PDFRenderer(workers=0))
+
+
+async def _seed(db_session):
+    client = User(id=uuid.uuid4(), email=f"export_{uuid.uuid4().hex[:8]}@example.com", hashed_password="x",
+                  full_name="Cliente Export", role=UserRole.client)
+    db_session.add(client)
+    await db_session.flush()
+    trips = []
+    for day, status in ((2, TripStatus.scheduled), (3, TripStatus.scheduled), (3, TripStatus.cancelled)):
+        trip = Trip(id=uuid.uuid4(), origin="Export A", destination="Export B", departure_date=date(2031, 3, day),
+                    total_spaces=4, price_per_space=100, status=status)
+        db_session.add(trip)
+        await db_session.flush()
+        space = Space(id=uuid.uuid4(), trip_id=trip.id, space_number=1, status=SpaceStatus.reserved, price=100)
+        reservation = Reservation(id=uuid.uuid4(), client_id=client.id, trip_id=trip.id,
+                                  payment_method=PaymentMethod.cash, payment_status=PaymentStatus.paid,
+                                  subtotal=100, total_amount=100)
+        db_session.add_all([space, reservation])
+        await db_session.flush()
+        db_session.add_all([
+            ReservationSpace(reservation_id=reservation.id, space_id=space.id),
+            LoadItem(reservation_id=reservation.id, product_name="Aguacate", box_count=10, total_weight=200),
+        ])
+        trips.append(trip)
+    await db_session.commit()
+    return trips
+
+
+@pytest.mark.asyncio
+async def test_export_streams_a_zip_of_every_departing_trip(client, admin_token, db_session):
+    trips = await _seed(db_session)
+    statements = []
+    sync_engine = db_session.bind.sync_engine
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", listener)
+    try:
+        response = await client.get(
+            "/api/v1/trips/manifests/export",
+            params={"date_from": "2031-03-01", "date_to": "2031-03-05"},
+            headers={"Authorization": f"Bearer {admin_token}"},
+        )
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", listener)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    names = archive.namelist()
+    assert len(names) == 4  # office + driver for the two scheduled trips
+    assert {name.split("_")[1] for name in names} == {"oficina", "chofer"}
+    assert not any(str(trips[2].id)[:8] in name for name in names)
+    assert all(archive.read(name).startswith(b"%PDF") for name in names)
+    # auth + trips, reservations, clients, items, spaces, config: not one query set per trip
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) <= 8
+
+
+@pytest.mark.asyncio
+async def test_export_merged_pdf_and_validation(client, admin_token, db_session):
+    await _seed(db_session)
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    merged = await client.get("/api/v1/trips/manifests/export", headers=headers, params={
+        "date_from": "2031-03-01", "date_to": "2031-03-05", "format": "pdf", "manifest_type": "office"})
+    backwards = await client.get("/api/v1/trips/manifests/export", headers=headers, params={
+        "date_from": "2031-03-05", "date_to": "2031-03-01"})
+    empty = await client.get("/api/v1/trips/manifests/export", headers=headers, params={
+        "date_from": "2031-06-01", "date_to": "2031-06-02"})
+    # A month fits the ZIP but is too much for one merged render
+    month_pdf = await client.get("/api/v1/trips/manifests/export", headers=headers, params={
+        "date_from": "2031-03-01", "date_to": "2031-03-31", "format": "pdf"})
+
+    assert merged.status_code == 200 and merged.content.startswith(b"%PDF")
+    assert backwards.status_code == 400
+    assert month_pdf.status_code == 400
+    assert empty.status_code == 404
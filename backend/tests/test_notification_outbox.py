@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.models.notification_outbox import NotificationOutbox, OutboxStatus
+from app.services.notification_outbox import NotificationOutboxWorkers
+
+
+@pytest.fixture
+def outbox(db_session):
+    session_factory = sessionmaker(bind=db_session.bind, class_=AsyncSession, expire_on_commit=False)
+    return NotificationOutboxWorkers(session_factory, workers=1, max_attempts=3, retry_base_seconds=0.01)
+
+
+async def _messages(outbox, subject):
+    async with outbox.session_factory() as db:
+        result = await db.execute(select(NotificationOutbox))
+        return [m for m in result.scalars().all() if m.payload.get("subject") == subject]
+
+
+@pytest.mark.asyncio
+async def test_outbox_rows_follow_the_business_transaction(outbox):
+    async with outbox.session_factory() as db:
+        with outbox.transaction(db):
+            await outbox.enqueue("email", {"subject": "rolled back"})
+        await db.rollback()
+
+    async with outbox.session_factory() as db:
+        with outbox.transaction(db):
+            await outbox.enqueue("email", {"subject": "committed"})
+        await db.commit()
+
+    assert await _messages(outbox, "rolled back") == []
+    assert len(await _messages(outbox, "committed")) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_deliveries_back_off_then_dead_letter(outbox):
+    calls = []
+
+    async def deliver(channel, payload):
+        calls.append(payload["subject"])
+        if payload["subject"] == "smtp down":
+            raise ConnectionError("smtp unreachable")
+
+    outbox.deliver = deliver
+    await outbox.enqueue("email", {"subject": "smtp down"})
+    await outbox.enqueue("email", {"subject": "fine"})
+
+    for _ in range(3):
+        await outbox.process_batch()
+        await asyncio.sleep(0.05)  # let the backoff elapse
+
+    [failed] = await _messages(outbox, "smtp down")
+    [sent] = await _messages(outbox, "fine")
+    assert sent.status == OutboxStatus.sent and sent.attempts == 1
+    assert failed.status == OutboxStatus.dead
+    assert failed.attempts == 3
+    assert "smtp unreachable" in failed.last_error
+    assert calls.count("smtp down") == 3
+
+
+@pytest.mark.asyncio
+async def test_prune_deletes_only_old_finished_messages(outbox):
+    old = datetime.now(timezone.utc) - timedelta(days=outbox.retention_days + 1)
+    async with outbox.session_factory() as db:
+        for subject, status, created_at in [
+            ("old sent", OutboxStatus.sent, old),
+            ("old dead", OutboxStatus.dead, old),
+            ("old pending", OutboxStatus.pending, old),
+            ("new sent", OutboxStatus.sent, datetime.now(timezone.utc)),
+        ]:
+            db.add(NotificationOutbox(channel="email", payload={"subject": subject}, status=status, created_at=created_at))
+        await db.commit()
+
+    assert await outbox.prune() == 2
+    for subject, kept in [("old sent", 0), ("old dead", 0), ("old pending", 1), ("new sent", 1)]:
+        assert len(await _messages(outbox, subject)) == kept
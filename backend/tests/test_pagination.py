@@ -0,0 +1,77 @@
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.core.exceptions import BadRequestException
+from app.core.pagination import count_rows, decode_cursor, keyset_page
+from app.models.reservation import Reservation, PaymentMethod
+from app.models.trip import Trip
+from app.models.user import User, UserRole
+
+
+async def _seed(db_session, count: int):
+    user = User(
+        id=uuid.uuid4(),
+        email=f"page_{uuid.uuid4().hex[:8]}@example.com",
+        hashed_password="x",
+        full_name="Page Client",
+        role=UserRole.client,
+    )
+    trip = Trip(
+        id=uuid.uuid4(),
+        origin="A",
+        destination="B",
+        departure_date=date.today() + timedelta(days=1),
+        total_spaces=count,
+        price_per_space=100,
+    )
+    db_session.add_all([user, trip])
+    await db_session.flush()
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for n in range(count):
+        db_session.add(Reservation(
+            id=uuid.uuid4(),
+            client_id=user.id,
+            trip_id=trip.id,
+            payment_method=PaymentMethod.bank_transfer,
+            subtotal=100,
+            total_amount=100,
+            # Pairs share a timestamp so the id breaks the tie
+            created_at=base + timedelta(minutes=n // 2),
+        ))
+    await db_session.commit()
+    return user
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cover_every_row_once(db_session):
+    user = await _seed(db_session, 7)
+    stmt = select(Reservation).where(Reservation.client_id == user.id)
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = await keyset_page(
+            db_session, stmt,
+            created_at=Reservation.created_at,
+            id=Reservation.id,
+            key=lambda row: (row[0].created_at, row[0].id),
+            page_size=3,
+            cursor=cursor,
+        )
+        seen.extend(row[0] for row in rows)
+        if cursor is None:
+            break
+
+    expected = sorted(seen, key=lambda r: (r.created_at, r.id), reverse=True)
+    assert [r.id for r in seen] == [r.id for r in expected]
+    assert len({r.id for r in seen}) == 7
+
+    total, is_estimate = await count_rows(db_session, select(Reservation.id).where(Reservation.client_id == user.id))
+    assert (total, is_estimate) == (7, False)
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(BadRequestException):
+        decode_cursor("not-a-cursor")
@@ -0,0 +1,44 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+
+from app.core.security import hash_password, pwd_context, verify_and_update_password
+from app.models.user import User, UserRole
+from app.services.user_service import UserService
+
+
+@pytest.mark.asyncio
+async def test_hashing_does_not_block_the_event_loop():
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.005)
+
+    task = asyncio.create_task(ticker())
+    hashed = await hash_password("secreto123")
+    task.cancel()
+
+    assert await verify_and_update_password("secreto123", hashed) == (True, None)
+    assert (await verify_and_update_password("otro", hashed))[0] is False
+    # The loop kept running while bcrypt worked in a thread
+    assert len(ticks) > 1
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_cost(db_session):
+    password = "password123"
+    email = f"rehash_{uuid.uuid4().hex[:8]}@example.com"
+    old_hash = pwd_context.copy(bcrypt__default_rounds=4, bcrypt__min_rounds=4).hash(password)
+    db_session.add(User(email=email, hashed_password=old_hash, full_name="Rehash", role=UserRole.client))
+    await db_session.commit()
+
+    user = await UserService(db_session).authenticate(email, password)
+
+    assert user is not None
+    assert user.hashed_password != old_hash
+    assert not pwd_context.needs_update(user.hashed_password)
+    assert await UserService(db_session).authenticate(email, "incorrecta") is None
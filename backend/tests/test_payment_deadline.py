@@ -0,0 +1,97 @@
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, select
+
+from app.models.reservation import Reservation, ReservationStatus, PaymentMethod, PaymentStatus
+from app.models.reservation_space import ReservationSpace
+from app.models.space import Space, SpaceStatus
+from app.models.trip import Trip
+from app.models.user import User, UserRole
+from app.services.notification_service import notification_service
+from app.tasks.payment_deadline import cancel_unpaid_reservations
+
+
+async def _seed(Session, reservations: int, age_hours: float, deadline_hours: int = 24):
+    async with Session() as db_session:
+        user = User(
+            id=uuid.uuid4(),
+            email=f"deadline_{uuid.uuid4().hex[:8]}@example.com",
+            hashed_password="x",
+            full_name="Deadline Client",
+            role=UserRole.client,
+        )
+        trip = Trip(
+            id=uuid.uuid4(),
+            origin="A",
+            destination="B",
+            departure_date=date.today() + timedelta(days=3),
+            total_spaces=reservations,
+            price_per_space=100,
+            payment_deadline_hours=deadline_hours,
+        )
+        db_session.add_all([user, trip])
+        await db_session.flush()
+        created_at = datetime.now(timezone.utc) - timedelta(hours=age_hours)
+        for n in range(1, reservations + 1):
+            space = Space(id=uuid.uuid4(), trip_id=trip.id, space_number=n, status=SpaceStatus.reserved, price=100)
+            reservation = Reservation(
+                id=uuid.uuid4(),
+                client_id=user.id,
+                trip_id=trip.id,
+                payment_method=PaymentMethod.bank_transfer,
+                payment_status=PaymentStatus.unpaid,
+                subtotal=100,
+                total_amount=100,
+                created_at=created_at,
+            )
+            db_session.add_all([space, reservation])
+            await db_session.flush()
+            db_session.add(ReservationSpace(reservation_id=reservation.id, space_id=space.id))
+        await db_session.commit()
+        return trip
+
+
+async def _state(session_factory, trip_id):
+    async with session_factory() as db:
+        reservations = await db.execute(select(Reservation.status).where(Reservation.trip_id == trip_id))
+        spaces = await db.execute(select(Space.status).where(Space.trip_id == trip_id))
+        return (
+            {s.value for s in reservations.scalars().all()},
+            {s.value for s in spaces.scalars().all()},
+        )
+
+
+@pytest.mark.asyncio
+async def test_only_overdue_reservations_are_cancelled(session_factory):
+    overdue = await _seed(session_factory, reservations=3, age_hours=30)
+    on_time = await _seed(session_factory, reservations=2, age_hours=2)
+
+    assert await cancel_unpaid_reservations(session_factory) == 3
+
+    assert await _state(session_factory, overdue.id) == ({"cancelled"}, {"available"})
+    assert await _state(session_factory, on_time.id) == ({"pending"}, {"reserved"})
+    assert notification_service.notify_payment_deadline_expired.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_round_trips_do_not_grow_with_pending_reservations(session_factory):
+    statements = []
+    sync_engine = session_factory.kw["bind"].sync_engine
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", count)
+    try:
+        counts = []
+        for n in (2, 20):
+            await _seed(session_factory, reservations=n, age_hours=48)
+            statements.clear()
+            assert await cancel_unpaid_reservations(session_factory) == n
+            counts.append(len(statements))
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", count)
+
+    assert counts[0] == counts[1]
@@ -0,0 +1,102 @@
+import os
+import threading
+from pathlib import Path
+
+import pytest
+from starlette.requests import Request
+
+from app.config import settings
+from app.services import pdf_cache as pdf_cache_module
+from app.services.pdf_cache import PDFCache
+from app.services.pdf_renderer import PDFRenderer
+
+renders = []
+
+
+def fake_summary(reservation_id: str, space_numbers: list, pdf_config: dict, output_path: str = None) -> str:
+    renders.append(reservation_id)
+    out = Path(output_path or Path(settings.upload_dir) / "summaries" / f"summary_{reservation_id}.pdf")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_bytes(b"%PDF-" + repr((space_numbers, pdf_config)).encode() * 50)
+    return str(out)
+
+
+def _request(if_none_match: str = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    monkeypatch.setattr(pdf_cache_module, "pdf_renderer", PDFRenderer(workers=0))
+    renders.clear()
+    return PDFCache(max_bytes=10_000_000)
+
+
+@pytest.mark.asyncio
+async def test_renders_only_when_inputs_change(cache):
+    args = dict(reservation_id="r1", space_numbers=[1, 2], pdf_config={"company_name": "Keikichi"})
+
+    first = await cache.get_or_render(fake_summary, **args)
+    again = await cache.get_or_render(fake_summary, **args)
+    renamed = await cache.get_or_render(fake_summary, **{**args, "pdf_config": {"company_name": "Otra"}})
+
+    assert renders == ["r1", "r1"]
+    assert first == again and first.etag != renamed.etag
+    assert cache.stats() == {"hits": 1, "misses": 2}
+
+
+@pytest.mark.asyncio
+async def test_matching_etag_gets_304(cache):
+    cached = await cache.get_or_render(fake_summary, reservation_id="r1", space_numbers=[1], pdf_config={})
+
+    fresh = cache.response(_request(), cached, "resumen.pdf")
+    revalidated = cache.response(_request(f'W/{cached.etag}, "other"'), cached, "resumen.pdf")
+
+    assert fresh.status_code == 200 and fresh.headers["etag"] == cached.etag
+    assert revalidated.status_code == 304 and revalidated.headers["etag"] == cached.etag
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_files_are_evicted(cache):
+    old = await cache.get_or_render(fake_summary, reservation_id="old", space_numbers=[1], pdf_config={})
+    used = await cache.get_or_render(fake_summary, reservation_id="used", space_numbers=[2], pdf_config={})
+    os.utime(old.path, (1, 1))
+    os.utime(used.path, (2, 2))
+    await cache.get_or_render(fake_summary, reservation_id="used", space_numbers=[2], pdf_config={})  # hit
+
+    cache.max_bytes = old.path.stat().st_size * 2
+    newest = await cache.get_or_render(fake_summary, reservation_id="new", space_numbers=[3], pdf_config={})
+
+    assert not old.path.exists()
+    assert used.path.exists() and newest.path.exists()
+
+
+@pytest.mark.asyncio
+async def test_evicted_file_is_still_served_or_rerendered(cache):
+    args = dict(reservation_id="r1", space_numbers=[1], pdf_config={})
+    cached = await cache.get_or_render(fake_summary, **args)
+
+    # Another worker evicts the file between the lookup and the response
+    cached.path.unlink()
+    response = cache.response(_request(), cached, "resumen.pdf")
+    assert response.status_code == 200 and response.body == cached.content
+
+    again = await cache.get_or_render(fake_summary, **args)
+    assert renders == ["r1", "r1"] and again.content == cached.content
+    assert list(cache.directory.glob("*.tmp")) == []
+
+
+@pytest.mark.asyncio
+async def test_hits_are_read_off_the_event_loop(cache, monkeypatch):
+    args = dict(reservation_id="r1", space_numbers=[1], pdf_config={})
+    await cache.get_or_render(fake_summary, **args)
+
+    threads = []
+    read = pdf_cache_module._read_and_touch
+    monkeypatch.setattr(pdf_cache_module, "_read_and_touch", lambda path: threads.append(threading.current_thread()) or read(path))
+    hit = await cache.get_or_render(fake_summary, **args)
+
+    assert hit.content.startswith(b"%PDF")
+    assert threads and threads[0] is not threading.main_thread()
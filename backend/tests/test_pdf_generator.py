@@ -0,0 +1,44 @@
+from decimal import Decimal
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image as PILImage
+
+from app.config import settings
+from app.utils import pdf_generator
+from app.utils.pdf_generator import PDFAssets, assets
+
+
+def test_logo_is_prepared_once_at_print_resolution():
+    first = assets.logo_jpeg()
+    assert first is assets.logo_jpeg()
+    with PILImage.open(BytesIO(first)) as img:
+        assert img.width <= int(PDFAssets.LOGO_MAX_WIDTH / 72 * PDFAssets.PRINT_DPI)
+
+
+def test_qr_codes_and_styles_are_reused():
+    PDFAssets.qr_png.cache_clear()
+    assets.qr("trip:abc", box_size=6, size=40)
+    assets.qr("trip:abc", box_size=6, size=60)
+    assert PDFAssets.qr_png.cache_info().hits == 1
+    assert assets.style("Info", fontSize=9, leading=12) is assets.style("Info", leading=12, fontSize=9)
+
+
+def test_ticket_still_renders_to_the_same_relative_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    path = pdf_generator.generate_reservation_ticket(
+        reservation_id="5b0e7f2a-0000-4000-8000-000000000001",
+        client_name="Cliente",
+        client_email="cliente@example.com",
+        trip_origin="Monterrey",
+        trip_destination="Laredo",
+        departure_date="2026-12-01",
+        departure_time=None,
+        space_numbers=[2, 1],
+        subtotal=Decimal("200"),
+        tax_amount=Decimal("32"),
+        total_amount=Decimal("232"),
+        payment_method="Efectivo",
+    )
+    assert path == "tickets/ticket_5b0e7f2a-0000-4000-8000-000000000001.pdf"
+    assert (Path(tmp_path) / path).read_bytes().startswith(b"%PDF")
@@ -0,0 +1,69 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from app.config import settings
+from app.core.exceptions import ServiceUnavailableException
+from app.services.pdf_renderer import PDFRenderer
+from app.utils.pdf_generator import generate_trip_manifest
+
+
+def _manifest_kwargs(reservations: int) -> dict:
+    return dict(
+        trip_id="3f1c0a52-0000-4000-8000-000000000001",
+        origin="Monterrey",
+        destination="Laredo",
+        departure_date="01/12/2026",
+        departure_time="08:00",
+        truck_plate="ABC-123",
+        trailer_plate=None,
+        driver_name="Chofer",
+        driver_phone=None,
+        total_spaces=28,
+        reservations=[
+            {"client_name": f"Cliente {n}", "client_phone": None, "space_numbers": [n],
+             "payment_status": "paid", "total_amount": 100.0}
+            for n in range(1, reservations + 1)
+        ],
+    )
+
+
+def _slow_render(seconds: float) -> str:
+    time.sleep(seconds)
+    return "never"
+
+
+@pytest.mark.asyncio
+async def test_process_pool_returns_the_relative_path_without_blocking_the_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    renderer = PDFRenderer(workers=1, timeout=60)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.005)
+            ticks += 1
+
+    ticking = asyncio.create_task(ticker())
+    try:
+        path = await renderer.render(generate_trip_manifest, **_manifest_kwargs(28))
+    finally:
+        ticking.cancel()
+        renderer.shutdown()
+
+    assert path == "manifests/manifest_3f1c0a52-0000-4000-8000-000000000001.pdf"
+    assert (Path(tmp_path) / path).read_bytes().startswith(b"%PDF")
+    assert ticks > 0
+
+
+@pytest.mark.asyncio
+async def test_render_timeout_is_a_503():
+    renderer = PDFRenderer(workers=0, timeout=0.05)
+    try:
+        with pytest.raises(ServiceUnavailableException):
+            await renderer.render(_slow_render, seconds=0.3)
+    finally:
+        renderer.shutdown()
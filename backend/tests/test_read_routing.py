@@ -0,0 +1,72 @@
+import asyncio
+import uuid
+
+import pytest
+import pytest_asyncio
+
+from app.database import AsyncSessionLocal, ReadSessionLocal
+from app.models.user import User, UserRole
+from app.services.event_bus import InMemoryBroker, InMemoryEventBus
+from app.services.read_routing import ReadRouting, read_routing
+
+
+@pytest_asyncio.fixture
+async def session_factory(session_factory, monkeypatch):
+    monkeypatch.setattr(read_routing, "replica", True)
+    monkeypatch.setattr(read_routing, "_writes", {})
+    return session_factory
+
+
+async def _as_user(user_id, work):
+    """Run `work` in its own task, as a request authenticated as `user_id`."""
+    async def request():
+        read_routing.set_request_user(user_id)
+        await work()
+    await asyncio.create_task(request())
+
+
+def _new_user() -> User:
+    return User(
+        id=uuid.uuid4(),
+        email=f"routing_{uuid.uuid4().hex[:8]}@example.com",
+        hashed_password="x",
+        full_name="Routing",
+        role=UserRole.client,
+    )
+
+
+@pytest.mark.asyncio
+async def test_reads_follow_the_callers_recent_writes(session_factory):
+    writer, reader = str(uuid.uuid4()), str(uuid.uuid4())
+    assert read_routing.session_factory(writer) is ReadSessionLocal
+
+    async def write():
+        async with session_factory() as db:
+            db.add(_new_user())
+            await db.commit()
+
+    async def rolled_back_write():
+        async with session_factory() as db:
+            db.add(_new_user())
+            await db.flush()
+            await db.rollback()
+
+    await _as_user(reader, rolled_back_write)
+    await _as_user(writer, write)
+
+    assert read_routing.session_factory(writer) is AsyncSessionLocal
+    assert read_routing.session_factory(reader) is ReadSessionLocal
+    assert read_routing.session_factory(None) is ReadSessionLocal
+
+
+@pytest.mark.asyncio
+async def test_write_marks_reach_other_workers():
+    broker = InMemoryBroker()
+    here, there = ReadRouting(window_seconds=10, replica=True), ReadRouting(window_seconds=10, replica=True)
+    await here.attach_bus(InMemoryEventBus(broker))
+    await there.attach_bus(InMemoryEventBus(broker))
+
+    here.note_write("user-1")
+    await asyncio.sleep(0.05)
+
+    assert there.session_factory("user-1") is AsyncSessionLocal
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.models.job_run import JobRun
+from app.tasks.scheduling import SchedulerLeader, recorded_job
+
+
+@pytest.fixture
+def session_factory(db_session):
+    return sessionmaker(bind=db_session.bind, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_recorded_job_stores_duration_and_rows(session_factory):
+    async def release():
+        return 7
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    await recorded_job("test_release", release, session_factory)()
+    await recorded_job("test_broken", broken, session_factory)()
+
+    async with session_factory() as db:
+        runs = {
+            run.job_name: run
+            for run in (await db.execute(select(JobRun).where(JobRun.job_name.like("test_%")))).scalars()
+        }
+    assert runs["test_release"].rows_affected == 7
+    assert runs["test_release"].succeeded is True
+    assert runs["test_release"].duration_ms >= 0
+    assert runs["test_broken"].succeeded is False
+    assert runs["test_broken"].error == "boom"
+
+
+@pytest.mark.asyncio
+async def test_leader_without_lock_backend_runs_jobs_locally():
+    scheduler = AsyncIOScheduler()
+    leader = SchedulerLeader(scheduler, dsn=None)
+
+    await leader.start()
+    assert leader.is_leader and scheduler.running
+
+    await leader.stop()
+    await asyncio.sleep(0)  # AsyncIOScheduler.shutdown runs on the next loop iteration
+    assert not leader.is_leader and not scheduler.running
+
+
+class HungLockConnection:
+    """Grants the lock, then stops answering pings."""
+
+    def __init__(self):
+        self.closed = False
+        self.pings = 0
+
+    def add_termination_listener(self, callback):
+        pass
+
+    async def fetchval(self, query, *args, timeout=None):
+        if "pg_try_advisory_lock" in query:
+            return True
+        self.pings += 1
+        # asyncpg raises TimeoutError once `timeout` passes without a reply
+        await asyncio.wait_for(asyncio.Event().wait(), timeout)
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self, timeout=None):
+        self.closed = True
+
+    def terminate(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_leader_steps_down_and_closes_when_ping_hangs(monkeypatch):
+    import asyncpg
+
+    connections = []
+
+    async def connect(dsn):
+        connections.append(HungLockConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(asyncpg, "connect", connect)
+    scheduler = AsyncIOScheduler()
+    leader = SchedulerLeader(scheduler, dsn="postgresql://db", retry_seconds=0.05)
+
+    await leader.start()
+    await asyncio.sleep(0.02)
+    assert leader.is_leader
+
+    # The ping times out: the worker gives up the lock and closes that session
+    await asyncio.sleep(0.15)
+    assert connections[0].pings >= 1
+    assert connections[0].closed
+    await leader.stop()
+    await asyncio.sleep(0)
+    assert all(c.closed for c in connections)
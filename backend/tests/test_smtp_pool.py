@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from app.services.smtp_pool import SMTPPool
+from tests.smtp_stub import SMTPStub
+
+
+@pytest_asyncio.fixture
+async def smtp_server():
+    server = await SMTPStub().start()
+    yield server
+    await server.stop()
+
+
+def _pool(server: SMTPStub, **kwargs) -> SMTPPool:
+    return SMTPPool(hostname="127.0.0.1", port=server.port, start_tls=False, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_burst_reuses_a_few_connections(smtp_server):
+    pool = _pool(smtp_server, size=3)
+    messages = [pool.build_message(f"Aviso {n}", [f"c{n}@example.com"], "<p>Hola</p>") for n in range(30)]
+
+    await asyncio.gather(*(pool.send(m) for m in messages))
+    await pool.close()
+
+    assert len(smtp_server.messages) == 30
+    assert smtp_server.connections <= 3
+    stats = pool.stats()
+    assert stats["sent"] == 30
+    assert stats["failed"] == 0
+    assert stats["connections_opened"] <= 3
+    assert stats["emails_per_second"] > 0
+
+
+@pytest.mark.asyncio
+async def test_connection_is_recycled_after_max_messages(smtp_server):
+    pool = _pool(smtp_server, size=1, max_messages_per_connection=4)
+
+    for n in range(10):
+        await pool.send(pool.build_message("Aviso", ["c@example.com"], f"mensaje {n}", "plain"))
+    await pool.close()
+
+    assert len(smtp_server.messages) == 10
+    assert smtp_server.connections == 3
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics_endpoint(client, admin_token):
+    response = await client.get(
+        "/api/v1/admin/dashboard/smtp-pool",
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert response.status_code == 200
+    assert {"sent", "failed", "connections_opened", "emails_per_second"} <= response.json().keys()
@@ -0,0 +1,179 @@
+import asyncio
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.models.space import Space, SpaceStatus
+from app.models.trip import Trip
+from app.models.user import User, UserRole
+from app.services.reservation_service import ReservationService
+from app.services.event_bus import InMemoryBroker, InMemoryEventBus
+from app.services.space_cache import DELTA_OVERLAP_US, SpaceStateCache, space_cache
+
+
+async def _seed(db_session, spaces: int = 4):
+    user = User(
+        id=uuid.uuid4(),
+        email=f"cache_{uuid.uuid4().hex[:8]}@example.com",
+        hashed_password="x",
+        full_name="Cache Client",
+        role=UserRole.client,
+    )
+    trip = Trip(
+        id=uuid.uuid4(),
+        origin="A",
+        destination="B",
+        departure_date=date.today() + timedelta(days=1),
+        total_spaces=spaces,
+        price_per_space=100,
+    )
+    db_session.add_all([user, trip])
+    await db_session.flush()
+    space_rows = [
+        Space(id=uuid.uuid4(), trip_id=trip.id, space_number=n, status=SpaceStatus.available, price=100)
+        for n in range(1, spaces + 1)
+    ]
+    db_session.add_all(space_rows)
+    await db_session.commit()
+    return user, trip, space_rows
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_reused_until_invalidated(db_session):
+    user, trip, _ = await _seed(db_session)
+
+    first = await space_cache.get(db_session, trip)
+    assert space_cache.peek(trip.id) is first
+    assert first.summary().available == 4
+
+    version = space_cache.invalidate(trip.id)
+    assert space_cache.peek(trip.id) is None
+
+    second = await space_cache.get(db_session, trip)
+    assert second.version == version > first.version
+
+
+@pytest.mark.asyncio
+async def test_hold_refreshes_snapshot_and_overlay(db_session):
+    user, trip, spaces = await _seed(db_session)
+    before = await space_cache.get(db_session, trip)
+
+    await ReservationService(db_session).create_hold(user.id, trip.id, [spaces[0].id])
+
+    assert space_cache.peek(trip.id) is None
+    after = await space_cache.get(db_session, trip)
+    assert after.version > before.version
+    assert after.summary().on_hold == 1
+
+    mine = {s.space_number: s.is_mine for s in after.spaces(str(user.id))}
+    assert mine == {1: True, 2: False, 3: False, 4: False}
+    assert all(s.is_mine is None for s in after.spaces())
+
+
+async def _age(db_session, trip, spaces, hours: float = 1):
+    """Backdate the trip and its spaces so later writes get a newer updated_at"""
+    past = datetime.now(timezone.utc) - timedelta(hours=hours)
+    trip.updated_at = past - timedelta(hours=1)
+    for space in spaces:
+        space.updated_at = past
+    await db_session.commit()
+    space_cache.invalidate(trip.id)
+
+
+@pytest.mark.asyncio
+async def test_since_returns_only_changed_spaces(db_session):
+    user, trip, spaces = await _seed(db_session)
+    await _age(db_session, trip, spaces)
+
+    before = await space_cache.get(db_session, trip)
+    since = before.space_version
+    assert before.is_delta(since)
+    assert before.spaces(str(user.id), since=since) == []
+
+    spaces[2].status = SpaceStatus.blocked
+    await db_session.commit()
+    space_cache.invalidate(trip.id)
+
+    after = await space_cache.get(db_session, trip)
+    assert after.space_version > since
+    assert after.is_delta(since)
+    assert [s.space_number for s in after.spaces(str(user.id), since=since)] == [3]
+    assert len(after.spaces(str(user.id))) == 4
+    # A change this recent is re-sent until it is older than the overlap window
+    assert [s.space_number for s in after.spaces(str(user.id), since=after.space_version)] == [3]
+
+
+@pytest.mark.asyncio
+async def test_full_snapshot_when_version_is_unusable(db_session):
+    user, trip, spaces = await _seed(db_session)
+    await _age(db_session, trip, spaces)
+    snapshot = await space_cache.get(db_session, trip)
+
+    assert not snapshot.is_delta(None)
+    # A version this snapshot has not reached (e.g. read from another worker)
+    assert not snapshot.is_delta(snapshot.space_version + 1)
+    # From before the trip itself changed: spaces may have been removed
+    assert not snapshot.is_delta(snapshot.trip_changed_at - 1)
+
+
+@pytest.mark.asyncio
+async def test_invalidation_reaches_other_workers(db_session):
+    _, trip, _ = await _seed(db_session)
+    broker = InMemoryBroker()
+    here, there = SpaceStateCache(ttl_seconds=60), SpaceStateCache(ttl_seconds=60)
+    await here.attach_bus(InMemoryEventBus(broker))
+    await there.attach_bus(InMemoryEventBus(broker))
+    await there.get(db_session, trip)
+
+    here.invalidate(trip.id)
+    await asyncio.sleep(0.05)
+
+    assert there.peek(trip.id) is None
+    assert not there.settled_for(trip.id, 10)
+
+
+@pytest.mark.asyncio
+async def test_deleting_a_holder_refreshes_the_seat_map(db_session, monkeypatch):
+    from app.api.v1.endpoints.admin_users import delete_user
+    from app.api.v1.spaces import space_ws_manager
+
+    user, trip, spaces = await _seed(db_session)
+    await ReservationService(db_session).create_hold(user.id, trip.id, [spaces[0].id])
+    assert (await space_cache.get(db_session, trip)).summary().on_hold == 1
+
+    queued = []
+    monkeypatch.setattr(space_ws_manager, "queue_space_update", lambda trip_id, update: queued.append(update))
+    admin = User(id=uuid.uuid4(), email="admin@example.com", hashed_password="x", full_name="Admin", role=UserRole.superadmin)
+    await delete_user(user.id, db_session, admin)
+
+    assert space_cache.peek(trip.id) is None
+    assert [(u["space_number"], u["status"]) for u in queued] == [(1, "available")]
+
+
+@pytest.mark.asyncio
+async def test_cached_seat_map_opens_no_session(db_session, monkeypatch):
+    from app.api.deps import TokenPrincipal
+    from app.api.v1 import spaces
+
+    user, trip, _ = await _seed(db_session)
+    await space_cache.get(db_session, trip)
+
+    def no_session():
+        raise AssertionError("session opened on a cache hit")
+
+    monkeypatch.setattr(spaces, "AsyncSessionLocal", no_session)
+    monkeypatch.setattr(spaces.read_routing, "session_factory", lambda user_id=None: no_session)
+    response = await spaces.get_trip_spaces(str(trip.id), None, TokenPrincipal(id=user.id, role=user.role))
+    assert response.summary.available == 4
+
+
+def test_unknown_trips_are_settled_only_after_a_full_window():
+    cache = SpaceStateCache(ttl_seconds=60)
+    # Just started: a change relayed before we listened could be missed
+    assert not cache.settled_for("trip-1", 10)
+    assert cache.settled_for("trip-1", 0)
+
+    cache.invalidate("trip-1", publish=False)
+    assert not cache.settled_for("trip-1", 0.5)
+    assert cache.settled_for("trip-2", 0)
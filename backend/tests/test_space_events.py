@@ -0,0 +1,217 @@
+import asyncio
+import json
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+from app.api.v1.spaces import SpaceConnectionManager
+from app.config import settings
+from app.models.space import Space, SpaceStatus
+from app.models.trip import Trip
+from app.services.event_bus import InMemoryBroker, InMemoryEventBus
+from app.services.space_cache import space_cache
+from app.services.websocket_fanout import SLOW_CONSUMER_CLOSE_CODE
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+class StalledSocket(FakeSocket):
+    async def send_text(self, text: str):
+        await asyncio.Event().wait()
+
+
+async def _worker(broker: InMemoryBroker) -> SpaceConnectionManager:
+    manager = SpaceConnectionManager()
+    await manager.attach_bus(InMemoryEventBus(broker))
+    return manager
+
+
+async def _close(*managers: SpaceConnectionManager):
+    """Stop the writer tasks before the test's event loop goes away"""
+    for manager in managers:
+        for connections in list(manager.trip_connections.values()):
+            for connection in list(connections):
+                manager.disconnect(connection.websocket, connection.room)
+    await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_reaches_sockets_on_every_worker():
+    broker = InMemoryBroker()
+    worker_a, worker_b = await _worker(broker), await _worker(broker)
+    socket_a, socket_b, other_trip = FakeSocket(), FakeSocket(), FakeSocket()
+    await worker_a.connect(socket_a, "trip-1")
+    await worker_b.connect(socket_b, "trip-1")
+    await worker_b.connect(other_trip, "trip-2")
+
+    message = {"event": "space_update", "data": {"space_number": 3, "status": "on_hold"}}
+    await worker_a.broadcast_to_trip("trip-1", message)
+    await asyncio.sleep(0)
+    await worker_a.drain()
+    await worker_b.drain()
+
+    # Each socket gets the event exactly once, no matter which worker published it
+    assert socket_a.sent == [message]
+    assert socket_b.sent == [message]
+    assert other_trip.sent == []
+    await _close(worker_a, worker_b)
+
+
+@pytest.mark.asyncio
+async def test_remote_event_invalidates_local_snapshot():
+    broker = InMemoryBroker()
+    worker_a, _ = await _worker(broker), await _worker(broker)
+    trip_id = "8b0a4f3e-8c53-4d1f-9a55-6a1f3b0a2c11"
+    before = space_cache.version(trip_id)
+
+    await worker_a.broadcast_to_trip(trip_id, {"event": "space_update", "data": {}})
+    await asyncio.sleep(0)
+
+    assert space_cache.version(trip_id) == before + 1
+
+
+@pytest.mark.asyncio
+async def test_oversize_event_is_relayed_as_a_resync(monkeypatch):
+    broker = InMemoryBroker()
+    worker_a, worker_b = await _worker(broker), await _worker(broker)
+    monkeypatch.setattr(worker_a.bus, "max_payload_bytes", 200)
+    socket_b = FakeSocket()
+    await worker_b.connect(socket_b, "trip-1")
+    before = space_cache.version("trip-1")
+
+    spaces = [{"space_id": f"s{n}", "space_number": n, "status": "on_hold"} for n in range(50)]
+    await worker_a.broadcast_to_trip("trip-1", {"event": "spaces_batch_update", "data": {"spaces": spaces}})
+    await asyncio.sleep(0)
+    await worker_b.drain()
+
+    assert space_cache.version("trip-1") == before + 1
+    assert socket_b.sent == [{"event": "spaces_resync", "data": {"trip_id": "trip-1"}}]
+    await _close(worker_a, worker_b)
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_is_evicted_without_delaying_others(monkeypatch):
+    monkeypatch.setattr(settings, "ws_send_queue_size", 2)
+    manager = SpaceConnectionManager()
+    fast, stalled = FakeSocket(), StalledSocket()
+    await manager.connect(fast, "trip-1")
+    await manager.connect(stalled, "trip-1")
+    fast_connection = manager.trip_connections["trip-1"][0]
+
+    for n in range(4):
+        await manager.broadcast_to_trip("trip-1", {"event": "space_update", "data": {"space_number": n}})
+        await fast_connection.queue.join()
+
+    # The stalled socket filled its queue and was dropped; the fast one got everything
+    await manager.drain()
+    assert [m["data"]["space_number"] for m in fast.sent] == [0, 1, 2, 3]
+    assert stalled.closed_with == SLOW_CONSUMER_CLOSE_CODE
+    assert len(manager.trip_connections["trip-1"]) == 1
+
+    metrics = manager.metrics_snapshot()["trip-1"]
+    assert metrics["evicted"] == 1
+    assert metrics["connections"] == 1
+    await _close(manager)
+
+
+@pytest.mark.asyncio
+async def test_eviction_is_counted_after_its_room_is_gone(monkeypatch):
+    monkeypatch.setattr(settings, "ws_send_queue_size", 1)
+    manager = SpaceConnectionManager()
+    await manager.connect(StalledSocket(), "trip-1")
+    for n in range(3):
+        await manager.broadcast_to_trip("trip-1", {"event": "space_update", "data": {}})
+        await asyncio.sleep(0)
+
+    assert "trip-1" not in manager.metrics.rooms
+    assert manager.metrics.evicted == 1
+
+
+async def _seed_trip(session_factory) -> str:
+    trip = Trip(
+        id=uuid.uuid4(), origin="A", destination="B",
+        departure_date=date.today() + timedelta(days=1), total_spaces=2, price_per_space=100,
+    )
+    async with session_factory() as db:
+        db.add(trip)
+        await db.flush()
+        db.add_all([
+            Space(id=uuid.uuid4(), trip_id=trip.id, space_number=n, status=SpaceStatus.available, price=100)
+            for n in (1, 2)
+        ])
+        await db.commit()
+    return str(trip.id)
+
+
+@pytest.mark.asyncio
+async def test_space_updates_are_coalesced_into_one_versioned_batch(monkeypatch, session_factory):
+    monkeypatch.setattr(settings, "space_update_coalesce_ms", 10)
+    trip_id = await _seed_trip(session_factory)
+    broker = InMemoryBroker()
+    worker_a, worker_b = await _worker(broker), await _worker(broker)
+    worker_a.session_factory = worker_b.session_factory = session_factory
+    socket_a, socket_b = FakeSocket(), FakeSocket()
+    await worker_a.connect(socket_a, trip_id)
+    await worker_b.connect(socket_b, trip_id)
+
+    for n in range(1, 29):
+        worker_a.queue_space_update(trip_id, {"space_id": f"s{n}", "space_number": n, "status": "on_hold"})
+    # A later change to the same space replaces the earlier one
+    worker_a.queue_space_update(trip_id, {"space_id": "s1", "space_number": 1, "status": "available"})
+    await asyncio.sleep(0.05)
+    await worker_a.drain()
+    await worker_b.drain()
+
+    # Stamped with the trip's DB-derived space_version, the same on every worker
+    version = socket_a.sent[0]["version"]
+    assert version > 0
+    for socket in (socket_a, socket_b):
+        assert len(socket.sent) == 1
+        batch = socket.sent[0]
+        assert batch["event"] == "spaces_batch_update"
+        assert batch["version"] == version
+        assert len(batch["data"]["spaces"]) == 28
+        assert batch["data"]["spaces"][0]["status"] == "available"
+
+    # A client that is up to date gets no snapshot on sync; a stale one does
+    space_version = (await worker_b._snapshot(trip_id)).space_version
+    assert space_version >= version
+    await worker_b.send_snapshot(socket_b, trip_id, "user-1", space_version)
+    await worker_b.send_snapshot(socket_b, trip_id, "user-1", space_version - 1)
+    await worker_b.drain()
+    assert [m["event"] for m in socket_b.sent] == ["spaces_batch_update", "spaces_snapshot"]
+    assert socket_b.sent[-1]["version"] == space_version
+    await _close(worker_a, worker_b)
+
+
+@pytest.mark.asyncio
+async def test_disconnect_releases_room_and_pending_sends():
+    manager = SpaceConnectionManager()
+    socket = StalledSocket()
+    await manager.connect(socket, "trip-1")
+    connection = manager.trip_connections["trip-1"][0]
+    await manager.broadcast_to_trip("trip-1", {"event": "space_update", "data": {}})
+    await manager.broadcast_to_trip("trip-1", {"event": "space_update", "data": {}})
+    await asyncio.sleep(0)
+    assert "trip-1" in manager.metrics.rooms
+
+    manager.disconnect(socket, "trip-1")
+
+    # Nothing left to wait for, and no metrics kept for an empty room
+    await asyncio.wait_for(connection.queue.join(), timeout=1)
+    assert "trip-1" not in manager.metrics.rooms
+    assert manager.metrics_snapshot() == {}
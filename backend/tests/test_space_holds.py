@@ -0,0 +1,106 @@
+import asyncio
+import random
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.core.exceptions import ConflictException
+from app.models.space import Space, SpaceStatus
+from app.models.trip import Trip
+from app.models.user import User, UserRole
+from app.services.reservation_service import ReservationService
+
+
+async def _seed_trip(Session, clients: int, spaces: int = 28, max_per_client=None):
+    async with Session() as db:
+        users = [
+            User(
+                id=uuid.uuid4(),
+                email=f"hold_{i}@example.com",
+                hashed_password="x",
+                full_name=f"Client {i}",
+                role=UserRole.client,
+            )
+            for i in range(clients)
+        ]
+        trip = Trip(
+            id=uuid.uuid4(),
+            origin="A",
+            destination="B",
+            departure_date=date.today() + timedelta(days=1),
+            total_spaces=spaces,
+            price_per_space=100,
+            max_spaces_per_client=max_per_client,
+        )
+        db.add_all(users + [trip])
+        await db.flush()
+        space_rows = [
+            Space(id=uuid.uuid4(), trip_id=trip.id, space_number=n, status=SpaceStatus.available)
+            for n in range(1, spaces + 1)
+        ]
+        db.add_all(space_rows)
+        await db.commit()
+        return trip.id, [u.id for u in users], [s.id for s in space_rows]
+
+
+@pytest.mark.asyncio
+async def test_interleaved_holds_never_double_book(session_factory):
+    """
+    Overlapping hold requests from 20 clients, each all-or-nothing. SQLite
+    serializes writers, so this is not a concurrency check of the
+    conditional UPDATE ... RETURNING; that needs PostgreSQL.
+    """
+    trip_id, user_ids, space_ids = await _seed_trip(session_factory, clients=20)
+    rng = random.Random(42)
+    requests = {uid: rng.sample(space_ids, rng.randint(1, 4)) for uid in user_ids}
+
+    async def client(uid):
+        async with session_factory() as db:
+            try:
+                await ReservationService(db).create_hold(uid, trip_id, requests[uid])
+                return uid, True
+            except ConflictException:
+                return uid, False
+
+    outcomes = dict(await asyncio.gather(*(client(uid) for uid in user_ids)))
+
+    async with session_factory() as db:
+        result = await db.execute(select(Space).where(Space.trip_id == trip_id))
+        held = {s.id: s.held_by for s in result.scalars().all() if s.status == SpaceStatus.on_hold}
+
+    assert any(outcomes.values())
+    for uid, won in outcomes.items():
+        owned = {sid for sid, holder in held.items() if holder == uid}
+        # All-or-nothing: winners hold exactly what they asked for, losers hold nothing
+        assert owned == (set(requests[uid]) if won else set())
+
+
+@pytest.mark.asyncio
+async def test_hold_enforces_max_spaces_per_client(session_factory):
+    trip_id, (uid,), space_ids = await _seed_trip(session_factory, clients=1, max_per_client=2)
+
+    async with session_factory() as db:
+        service = ReservationService(db)
+        await service.create_hold(uid, trip_id, space_ids[:2])
+        # Re-holding the same spaces does not count against the limit
+        await service.create_hold(uid, trip_id, space_ids[:2])
+        with pytest.raises(ConflictException, match="Límite"):
+            await service.create_hold(uid, trip_id, space_ids[2:3])
+
+
+@pytest.mark.asyncio
+async def test_hold_reports_every_conflicting_space(session_factory):
+    trip_id, (first, second), space_ids = await _seed_trip(session_factory, clients=2)
+
+    async with session_factory() as db:
+        await ReservationService(db).create_hold(first, trip_id, space_ids[:2])
+
+    async with session_factory() as db:
+        with pytest.raises(ConflictException) as exc:
+            await ReservationService(db).create_hold(second, trip_id, space_ids[:3])
+        assert "1, 2" in exc.value.detail
+
+        result = await db.execute(select(Space).where(Space.id == space_ids[2]))
+        assert result.scalars().first().status == SpaceStatus.available
@@ -0,0 +1,69 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, select
+
+from app.models.system_config import SystemConfig
+from app.services.event_bus import InMemoryBroker, InMemoryEventBus
+from app.services.system_config_service import SystemConfigService, system_config_service
+
+
+@pytest_asyncio.fixture
+async def session_factory(session_factory):
+    async with session_factory() as db:
+        db.add_all([
+            SystemConfig(key="price_bond_service", value="650.50", value_type="number"),
+            SystemConfig(key="price_label_2x2", value="3"),
+            SystemConfig(key="company_name", value="Keikichi"),
+        ])
+        await db.commit()
+    system_config_service.invalidate()
+    yield session_factory
+    system_config_service.invalidate()
+
+
+@pytest.mark.asyncio
+async def test_values_are_typed_and_loaded_once(session_factory):
+    selects = []
+    event.listen(
+        session_factory.kw["bind"].sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: selects.append(statement) if statement.startswith("SELECT") else None,
+    )
+    for _ in range(3):
+        async with session_factory() as db:
+            config = await system_config_service.get(db)
+
+    assert len(selects) == 1
+    assert config.bond_service_price == Decimal("650.50")
+    assert config.label_price("2x2") == Decimal(3)
+    assert config.label_price("9x9") == Decimal(1)  # falls back to the 1x1 price
+    assert config.pickup_service_price == Decimal(300)
+    assert config.decimal("company_name", Decimal(0)) == Decimal(0)
+    assert config.subset(["company_name", "missing"]) == {"company_name": "Keikichi"}
+
+
+@pytest.mark.asyncio
+async def test_committed_change_invalidates_every_worker(session_factory):
+    broker = InMemoryBroker()
+    other_worker = SystemConfigService()
+    await system_config_service.attach_bus(InMemoryEventBus(broker))
+    await other_worker.attach_bus(InMemoryEventBus(broker))
+    try:
+        async with session_factory() as db:
+            await system_config_service.get(db)
+            await other_worker.get(db)
+
+        async with session_factory() as db:
+            row = (await db.execute(select(SystemConfig).where(SystemConfig.key == "price_bond_service"))).scalar_one()
+            row.value = "700"
+            await db.commit()
+        await asyncio.sleep(0.05)  # let the bus deliver the invalidation
+
+        async with session_factory() as db:
+            assert (await system_config_service.get(db)).bond_service_price == Decimal(700)
+            assert (await other_worker.get(db)).bond_service_price == Decimal(700)
+    finally:
+        system_config_service.bus = None
+
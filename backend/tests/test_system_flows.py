@@ -213,6 +213,8 @@ class TestSystemFlows:
         response = await client.get("/api/v1/reservations", headers={"Authorization": f"Bearer {admin_token}"})
         assert response.status_code == 200
         assert "items" in response.json() or isinstance(response.json(), list)
+        # Earlier flows reserved spaces; counts come from reservation_spaces
+        assert any(item["spaces_count"] > 0 for item in response.json()["items"])
 
     async def test_14_delete_reservation(self, client: AsyncClient, admin_token, user_token):
          # Create
@@ -265,7 +267,9 @@ class TestSystemFlows:
 
     # --- DOCUMENTS (5 Tests) ---
 
-    async def test_17_upload_document(self, client: AsyncClient, user_token):
+    async def test_17_upload_document(self, client: AsyncClient, user_token, tmp_path, monkeypatch):
+        from app.api.v1 import client_documents
+        monkeypatch.setattr(client_documents, "UPLOAD_DIR", str(tmp_path))
         # We need to simulate a file upload.
         # This is complex in httpx without actual file IO, but we can pass bytes.
         files = {'file': ('test.txt', b'test content', 'text/plain')}
@@ -0,0 +1,82 @@
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.models.space import Space, SpaceStatus
+from app.models.trip import Trip
+from app.models.trip_space_counts import TripSpaceCounts
+from app.models.user import User, UserRole
+from app.services.reservation_service import ReservationService
+from app.services.trip_occupancy import trip_occupancy
+from app.services.trip_service import TripService
+
+
+async def _seed(db, spaces: int = 4):
+    user = User(
+        id=uuid.uuid4(),
+        email=f"occupancy_{uuid.uuid4().hex[:8]}@example.com",
+        hashed_password="x",
+        full_name="Occupancy Client",
+        role=UserRole.client,
+    )
+    trip = Trip(
+        id=uuid.uuid4(),
+        origin="A",
+        destination="B",
+        departure_date=date.today() + timedelta(days=1),
+        total_spaces=spaces,
+        price_per_space=100,
+    )
+    db.add_all([user, trip])
+    await db.flush()
+    space_rows = [
+        Space(id=uuid.uuid4(), trip_id=trip.id, space_number=n, status=SpaceStatus.available, price=100)
+        for n in range(1, spaces + 1)
+    ]
+    db.add_all(space_rows)
+    await db.commit()
+    return user, trip, space_rows
+
+
+async def _counts(db, trip_id):
+    counts = await db.get(TripSpaceCounts, trip_id, populate_existing=True)
+    return {s.value: getattr(counts, s.value) for s in SpaceStatus}
+
+
+@pytest.mark.asyncio
+async def test_counts_follow_orm_and_bulk_changes(session_factory):
+    async with session_factory() as db:
+        user, trip, spaces = await _seed(db)
+        assert await _counts(db, trip.id) == {"available": 4, "reserved": 0, "blocked": 0, "on_hold": 0, "internal": 0}
+
+        # Bulk UPDATE path (marks the trip explicitly)
+        await ReservationService(db).create_hold(user.id, trip.id, [spaces[0].id, spaces[1].id])
+        # ORM path (marked on flush)
+        space = await db.get(Space, spaces[3].id)
+        space.status = SpaceStatus.blocked
+        await db.commit()
+
+        assert await _counts(db, trip.id) == {"available": 1, "reserved": 0, "blocked": 1, "on_hold": 2, "internal": 0}
+
+        listed = {row["trip"].id: row for row in await TripService(db).list_trips_with_stats()}
+        assert listed[trip.id]["on_hold_spaces"] == 2
+        assert listed[trip.id]["available_spaces"] == 1
+
+
+@pytest.mark.asyncio
+async def test_reconcile_repairs_drift(session_factory):
+    async with session_factory() as db:
+        _, trip, _ = await _seed(db)
+        _, untouched, _ = await _seed(db)
+        # A write that bypasses the ORM and is not marked
+        await db.execute(update(Space).where(Space.trip_id == trip.id).values(status=SpaceStatus.internal))
+        await db.commit()
+
+    assert await trip_occupancy.reconcile(session_factory) == 1
+    assert await trip_occupancy.reconcile(session_factory) == 0
+
+    async with session_factory() as db:
+        assert (await _counts(db, trip.id))["internal"] == 4
+        assert (await _counts(db, untouched.id))["available"] == 4
@@ -0,0 +1,153 @@
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+
+from app.api.deps import get_token_principal
+from app.api.v1.auth import refresh
+from app.core.exceptions import UnauthorizedException
+from app.core.security import create_access_token, create_refresh_token
+from app.schemas.auth import RefreshRequest
+from app.models.user import User, UserRole, VerificationStatus
+from app.services.user_cache import user_cache
+
+
+@pytest_asyncio.fixture
+async def session_factory(session_factory, monkeypatch):
+    monkeypatch.setattr(user_cache, "session_factory", session_factory)
+    user_cache.clear()
+    yield session_factory
+    user_cache.clear()
+
+
+async def _seed_user(session_factory) -> uuid.UUID:
+    user_id = uuid.uuid4()
+    async with session_factory() as db:
+        db.add(User(
+            id=user_id,
+            email=f"cache_{user_id.hex[:8]}@example.com",
+            hashed_password="x",
+            full_name="Cached User",
+            role=UserRole.client,
+        ))
+        await db.commit()
+    return user_id
+
+
+def _count_selects(session_factory):
+    statements = []
+    engine = session_factory.kw["bind"].sync_engine
+    event.listen(
+        engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement) if statement.startswith("SELECT") else None,
+    )
+    return statements
+
+
+@pytest.mark.asyncio
+async def test_cached_user_is_bound_without_a_query(session_factory):
+    user_id = await _seed_user(session_factory)
+    async with session_factory() as db:
+        await user_cache.get(db, str(user_id))
+
+    selects = _count_selects(session_factory)
+    async with session_factory() as db:
+        user = await user_cache.get(db, str(user_id))
+        assert user in db
+        assert user.role == UserRole.client
+        # Still usable like a loaded user
+        user.full_name = "Renamed"
+        await db.commit()
+    assert selects == []
+
+
+@pytest.mark.asyncio
+async def test_committed_user_change_invalidates(session_factory):
+    user_id = await _seed_user(session_factory)
+    async with session_factory() as db:
+        await user_cache.get(db, str(user_id))
+
+    async with session_factory() as db:
+        user = await db.get(User, user_id)
+        user.verification_status = VerificationStatus.verified
+        user.role = UserRole.manager
+        await db.commit()
+
+    async with session_factory() as db:
+        user = await user_cache.get(db, str(user_id))
+        assert user.role == UserRole.manager
+        assert user.verification_status == VerificationStatus.verified
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_change_keeps_entry(session_factory):
+    user_id = await _seed_user(session_factory)
+    async with session_factory() as db:
+        await user_cache.get(db, str(user_id))
+
+    async with session_factory() as db:
+        user = await db.get(User, user_id)
+        user.role = UserRole.superadmin
+        await db.flush()
+        await db.rollback()
+
+    selects = _count_selects(session_factory)
+    async with session_factory() as db:
+        user = await user_cache.get(db, str(user_id))
+        assert user.role == UserRole.client
+    assert selects == []
+
+
+@pytest.mark.asyncio
+async def test_token_principal_is_served_from_the_cache(session_factory):
+    user_id = await _seed_user(session_factory)
+    token = create_access_token(str(user_id), extra_claims={"role": UserRole.manager.value})
+    await get_token_principal(f"Bearer {token}")
+
+    selects = _count_selects(session_factory)
+    principal = await get_token_principal(f"Bearer {token}")
+    assert principal.id == user_id
+    # The stored role, not the token's claim
+    assert principal.role == UserRole.client
+    assert selects == []
+
+    with pytest.raises(UnauthorizedException):
+        await get_token_principal("Bearer not-a-token")
+
+
+@pytest.mark.asyncio
+async def test_token_principal_sees_changes_made_elsewhere(session_factory):
+    user_id = await _seed_user(session_factory)
+    token = create_access_token(str(user_id), extra_claims={"role": UserRole.client.value})
+
+    # Promoted by another worker, or before this one started: nothing cached here
+    async with session_factory() as db:
+        user = await db.get(User, user_id)
+        user.role = UserRole.manager
+        await db.commit()
+    user_cache.clear()
+    principal = await get_token_principal(f"Bearer {token}")
+    assert principal.role == UserRole.manager
+
+    # Deleted: the still-valid token no longer authenticates
+    async with session_factory() as db:
+        await db.delete(await db.get(User, user_id))
+        await db.commit()
+    with pytest.raises(UnauthorizedException):
+        await get_token_principal(f"Bearer {token}")
+
+
+@pytest.mark.asyncio
+async def test_refresh_reads_the_current_role(session_factory):
+    user_id = await _seed_user(session_factory)
+    refresh_token = create_refresh_token(str(user_id), extra_claims={"role": UserRole.client.value})
+    async with session_factory() as db:
+        user = await db.get(User, user_id)
+        user.role = UserRole.manager
+        await db.commit()
+
+    async with session_factory() as db:
+        renewed = await refresh(RefreshRequest(refresh_token=refresh_token), db)
+    principal = await get_token_principal(f"Bearer {renewed.access_token}")
+    assert principal.role == UserRole.manager
@@ -17,20 +17,29 @@ const TripDetail = () => {
 
   const [selectedSpaces, setSelectedSpaces] = useState<string[]>([]);
 
-  // Real-time space updates via WebSocket
-  const handleSpaceUpdate = useCallback((data: { space_id: string; status: string }) => {
+  // Real-time space updates via WebSocket (one batch per change burst)
+  const handleSpacesUpdate = useCallback((updates: { space_id: string; status: string }[]) => {
     // Refetch spaces to get the latest state
     refetchSpaces();
 
-    // If the updated space was selected and is no longer available, deselect it
-    if (data.status !== 'available' && data.status !== 'on_hold') {
-      setSelectedSpaces(prev => prev.filter(id => id !== data.space_id));
+    // If an updated space was selected and is no longer available, deselect it
+    const gone = updates
+      .filter(data => data.status !== 'available' && data.status !== 'on_hold')
+      .map(data => data.space_id);
+    if (gone.length > 0) {
+      setSelectedSpaces(prev => prev.filter(id => !gone.includes(id)));
     }
   }, [refetchSpaces]);
 
+  // The socket fell behind and resynced: reload the full map
+  const handleSnapshot = useCallback(() => {
+    refetchSpaces();
+  }, [refetchSpaces]);
+
   useSpaceSocket({
     tripId: id,
-    onSpaceUpdate: handleSpaceUpdate,
+    onSpacesUpdate: handleSpacesUpdate,
+    onSnapshot: handleSnapshot,
     enabled: !!id
   });
 
@@ -11,16 +11,23 @@ interface SpaceUpdateData {
 interface UseSpaceSocketOptions {
     tripId: string;
     onSpaceUpdate?: (data: SpaceUpdateData) => void;
+    // Called once per spaces_batch_update with every space that changed
+    onSpacesUpdate?: (spaces: SpaceUpdateData[]) => void;
+    // Called with the full space map after the socket fell behind and resynced
+    onSnapshot?: (data: unknown) => void;
     enabled?: boolean;
 }
 
 /**
  * Hook to connect to the space WebSocket for real-time updates.
  * Each client watching a trip gets instant updates when spaces change.
+ * Updates arrive as batches stamped with the trip's space_version; when one
+ * arrives out of order the hook asks the server for a full snapshot.
  */
-export function useSpaceSocket({ tripId, onSpaceUpdate, enabled = true }: UseSpaceSocketOptions) {
+export function useSpaceSocket({ tripId, onSpaceUpdate, onSpacesUpdate, onSnapshot, enabled = true }: UseSpaceSocketOptions) {
     const wsRef = useRef<WebSocket | null>(null);
     const reconnectTimeoutRef = useRef<ReturnType<typeof setTimeout> | null>(null);
+    const versionRef = useRef<number | null>(null);
 
     const connect = useCallback(() => {
         const { accessToken } = authStore.getState();
@@ -47,6 +54,10 @@ export function useSpaceSocket({ tripId, onSpaceUpdate, enabled = true }: UseSpa
             if (import.meta.env.DEV) {
                 console.log('[SpaceSocket] Connected to trip:', tripId);
             }
+            // After a reconnect we may have missed batches
+            if (versionRef.current !== null) {
+                ws.send(JSON.stringify({ action: 'sync', version: versionRef.current }));
+            }
         };
 
         ws.onmessage = (event) => {
@@ -56,7 +67,27 @@ export function useSpaceSocket({ tripId, onSpaceUpdate, enabled = true }: UseSpa
                     console.log('[SpaceSocket] Received:', message);
                 }
 
-                if (message.event === 'space_update' && onSpaceUpdate) {
+                if (message.event === 'spaces_batch_update') {
+                    const last = versionRef.current;
+                    if (last !== null && message.version <= last) {
+                        // Older than what we have: it may undo a newer change, so refetch the map
+                        ws.send(JSON.stringify({ action: 'sync' }));
+                        return;
+                    }
+                    versionRef.current = message.version;
+                    const spaces: SpaceUpdateData[] = message.data.spaces;
+                    if (onSpacesUpdate) {
+                        onSpacesUpdate(spaces);
+                    } else if (onSpaceUpdate) {
+                        spaces.forEach(onSpaceUpdate);
+                    }
+                } else if (message.event === 'spaces_resync') {
+                    // An update could not be relayed in full: fetch the whole map
+                    ws.send(JSON.stringify({ action: 'sync' }));
+                } else if (message.event === 'spaces_snapshot') {
+                    versionRef.current = message.version;
+                    onSnapshot?.(message.data);
+                } else if (message.event === 'space_update' && onSpaceUpdate) {
                     onSpaceUpdate(message.data);
                 }
             } catch (error) {
@@ -87,9 +118,10 @@ export function useSpaceSocket({ tripId, onSpaceUpdate, enabled = true }: UseSpa
         };
 
         wsRef.current = ws;
-    }, [tripId, onSpaceUpdate, enabled]);
+    }, [tripId, onSpaceUpdate, onSpacesUpdate, onSnapshot, enabled]);
 
     useEffect(() => {
+        versionRef.current = null;
         if (enabled && tripId) {
             connect();
         }
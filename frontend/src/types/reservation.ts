@@ -201,4 +201,6 @@ export interface PaginatedReservations {
     page: number;
     page_size: number;
     pages: number;
+    next_cursor?: string | null;
+    total_is_estimate?: boolean;
 }